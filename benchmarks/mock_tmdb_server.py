@@ -0,0 +1,148 @@
+# --- mock_tmdb_server.py ---
+# Servidor HTTP local que imita /search/multi, /movie/{id} y /tv/{id} de TMDb
+# con latencia y tasa de errores configurables, para medir el enriquecimiento sin red
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_LATENCY_SECONDS = 0.02
+DEFAULT_ERROR_RATE = 0.0
+GENEROS = ['Drama', 'Comedia', 'Acción', 'Crimen', 'Ciencia ficción', 'Documental', 'Animación', 'Misterio', 'Romance']
+
+_DETAILS_PATH = re.compile(r'^/3/(movie|tv)/(\d+)$')
+
+
+def _stable_int(text):
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def fake_search_results(query):
+    """Resultado determinista por título: mismo título -> mismo (media_type, id)."""
+    h = _stable_int(query.lower())
+    if h % 20 == 0:  # ~5% de títulos sin coincidencia
+        return []
+    media_type = 'tv' if h % 3 else 'movie'
+    key = 'name' if media_type == 'tv' else 'title'
+    return [{'media_type': media_type, 'id': h % 500000 + 1, key: query}]
+
+
+def fake_details(media_type, item_id):
+    h = _stable_int(f"{media_type}:{item_id}")
+    details = {
+        'id': item_id,
+        'overview': f"Sinopsis sintética de {media_type} {item_id}.",
+        'genres': [{'id': i, 'name': GENEROS[(h + i) % len(GENEROS)]} for i in range(1 + h % 3)],
+        'popularity': round((h % 10000) / 100, 2),
+        'vote_average': round((h % 100) / 10, 1),
+        'vote_count': h % 20000,
+    }
+    if media_type == 'movie':
+        details.update({'title': f"Película {item_id}", 'original_title': f"Movie {item_id}",
+                        'release_date': f"{1990 + h % 35}-{1 + h % 12:02d}-{1 + h % 28:02d}",
+                        'runtime': 80 + h % 70})
+    else:
+        details.update({'name': f"Serie {item_id}", 'original_name': f"Show {item_id}",
+                        'first_air_date': f"{1990 + h % 35}-{1 + h % 12:02d}-{1 + h % 28:02d}",
+                        'episode_run_time': [20 + h % 40]})
+    return details
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como la API real
+
+    def log_message(self, format, *args):  # Sin ruido en la salida de los benchmarks
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if server.latency_seconds:
+            time.sleep(server.latency_seconds)
+        if server.error_rate and server.rng_random() < server.error_rate:
+            # Mitad errores 500, mitad límites de tasa 429 con Retry-After
+            if server.rng_random() < 0.5:
+                return self._send_json(500, {'status_message': 'Internal error (simulado)'})
+            return self._send_json(429, {'status_message': 'Rate limit (simulado)'}, {'Retry-After': '1'})
+
+        url = urlparse(self.path)
+        if url.path == '/3/search/multi':
+            query = parse_qs(url.query).get('query', [''])[0]
+            results = fake_search_results(query)
+            return self._send_json(200, {'page': 1, 'results': results, 'total_results': len(results)})
+        match = _DETAILS_PATH.match(url.path)
+        if match:
+            return self._send_json(200, fake_details(match.group(1), int(match.group(2))))
+        return self._send_json(404, {'status_message': 'Not found'})
+
+
+class MockTMDbServer:
+    """
+    Servidor TMDb falso en un hilo de fondo. Uso:
+
+        with MockTMDbServer(latency_seconds=0.05, error_rate=0.02) as server:
+            requests.get(server.base_url + '/search/multi', params={'query': 'Dark'})
+    """
+
+    def __init__(self, latency_seconds=DEFAULT_LATENCY_SECONDS, error_rate=DEFAULT_ERROR_RATE, seed=42,
+                 host='127.0.0.1', port=0):
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency_seconds = latency_seconds
+        self._httpd.error_rate = error_rate
+        self._httpd.request_count = 0
+        rng = random.Random(seed)
+        lock = threading.Lock()
+
+        def rng_random():
+            with lock:
+                return rng.random()
+
+        def count_request():
+            with lock:
+                self._httpd.request_count += 1
+
+        self._httpd.rng_random = rng_random
+        self._httpd.count_request = count_request
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    @property
+    def request_count(self):
+        return self._httpd.request_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-tmdb', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
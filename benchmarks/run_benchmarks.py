@@ -0,0 +1,155 @@
+# --- run_benchmarks.py ---
+# Mide cada etapa del pipeline (lectura, fechas, limpieza de títulos, enriquecimiento,
+# unión y preparación para Power BI) sobre historiales sintéticos y guarda los tiempos en JSON.
+# Uso: python -m benchmarks.run_benchmarks --sizes 10000 100000 1000000
+
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+
+from benchmarks.mock_tmdb_server import MockTMDbServer, fake_details, fake_search_results
+from benchmarks.synthetic_history import write_history
+from scripts import powerbi_prep, run_etl
+from scripts.cli import setup_entry_point
+from scripts.tmdb_client import TMDb, Search, Movie, TV
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_ENRICH_TITLES = 200
+DEFAULT_WORKERS = 8
+DEFAULT_LATENCY_SECONDS = 0.02
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+@contextmanager
+def _timed(results, stage, rows, unit='filas'):
+    start = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - start
+    results[stage] = {'seconds': round(seconds, 4), 'rows': rows,
+                      'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None}
+    print(f"  {stage:<15} {seconds:9.3f} s  ({rows} {unit})")
+
+
+def build_lookup_table(titles):
+    """
+    Tabla TMDb para todos los títulos únicos generada en proceso con los mismos datos
+    que sirve el servidor falso; así la etapa de unión se mide con cobertura completa
+    sin tener que enriquecer miles de títulos por HTTP.
+    """
+    records = []
+    for title in titles:
+        results = fake_search_results(title)
+        if not results:
+            continue
+        media_type, item_id = results[0]['media_type'], results[0]['id']
+        d = fake_details(media_type, item_id)
+        records.append({
+            'search_title_query': title, 'tmdb_id': item_id,
+            'tmdb_title': d.get('title') or d.get('name'),
+            'tmdb_original_title': d.get('original_title') or d.get('original_name'),
+            'tmdb_overview': d['overview'], 'tmdb_genres': ', '.join(g['name'] for g in d['genres']),
+            'tmdb_popularity': d['popularity'], 'tmdb_vote_average': d['vote_average'],
+            'tmdb_vote_count': d['vote_count'], 'tmdb_media_type': media_type,
+            'tmdb_release_date': d.get('release_date') or d.get('first_air_date'),
+            'tmdb_runtime_minutes': d.get('runtime') or d['episode_run_time'][0],
+        })
+    return pd.DataFrame(records)
+
+
+def bench_size(n_rows, workdir, server, enrich_titles_limit, workers, seed):
+    print(f"Tamaño {n_rows} filas:")
+    results = {}
+    raw_path = os.path.join(workdir, f'history_{n_rows}.csv')
+    write_history(raw_path, n_rows, seed=seed)
+
+    with _timed(results, 'ingest', n_rows):
+        df = pd.read_csv(raw_path)
+    with _timed(results, 'parse_dates', n_rows):
+        df['Date'] = run_etl.parse_history_dates(df['Date'])
+        df = df.dropna(subset=['Date', 'Title'])
+    with _timed(results, 'clean_titles', n_rows):
+        df = run_etl.add_cleaned_titles(df)
+
+    unique_titles = [t for t in df['Title_Cleaned_For_API'].unique() if t]
+    sample = unique_titles[:enrich_titles_limit]
+    # Mismo cliente que el ETL (sesión keep-alive, backoff, Retry-After) apuntando al servidor falso
+    tmdb = TMDb('benchmark', base_url=server.base_url, pool_size=workers)
+    search_api, movie_api, tv_api = Search(tmdb), Movie(tmdb), TV(tmdb)
+    requests_before = server.request_count
+    with _timed(results, 'enrich', len(sample), unit='títulos'):
+        _, metrics = run_etl.enrich_titles(sample, search_api, movie_api, tv_api, cache=None, max_workers=workers)
+    tmdb.close()
+    results['enrich'].update({'unique_titles': len(unique_titles), 'http_requests': server.request_count - requests_before,
+                              'titles_per_second': results['enrich'].pop('rows_per_second'), **metrics})
+
+    df_tmdb = build_lookup_table(unique_titles)
+    with _timed(results, 'merge', n_rows):
+        df_final = run_etl.merge_tmdb_data(df, df_tmdb)
+
+    enriched_path = os.path.join(workdir, 'netflix_viewing_enriched.csv')
+    df_final.to_csv(enriched_path, index=False)
+    del df, df_final
+    outputs = {name: os.path.join(workdir, f'{name.lower()}.csv') for name in
+               ['PROCESSED_DATA_PATH', 'CALIDAD_TIPO_PATH', 'RESUMEN_CALIDAD_TIPO_PATH',
+                'GENEROS_PATH', 'GENEROS_POPULARES_PATH', 'CUBO_PATH']}
+    outputs['METRICAS_PATH'] = os.path.join(workdir, 'powerbi_metrics.json')
+    outputs['ALMACEN_PATH'] = os.path.join(workdir, 'netflix_store.sqlite')  # No existe: se lee el CSV de arriba
+    with patch.multiple(powerbi_prep, ENRICHED_DATA_PATH=enriched_path, **outputs):
+        with _timed(results, 'powerbi_prep', n_rows):
+            powerbi_prep.preparar_datos_para_powerbi()
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, enrich_titles_limit=DEFAULT_ENRICH_TITLES, workers=DEFAULT_WORKERS,
+                   latency_seconds=DEFAULT_LATENCY_SECONDS, error_rate=0.0, seed=42, output_path=None):
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'params': {'enrich_titles': enrich_titles_limit, 'workers': workers,
+                   'latency_seconds': latency_seconds, 'error_rate': error_rate, 'seed': seed},
+        'sizes': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='netflix_bench_') as workdir, \
+            MockTMDbServer(latency_seconds=latency_seconds, error_rate=error_rate, seed=seed) as server:
+        for n_rows in sizes:
+            report['sizes'][str(n_rows)] = bench_size(n_rows, workdir, server, enrich_titles_limit, workers, seed)
+
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {output_path}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline Netflix + TMDb con datos sintéticos.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Filas de historial a generar.")
+    parser.add_argument('--enrich-titles', type=int, default=DEFAULT_ENRICH_TITLES,
+                        help="Títulos únicos a enriquecer por HTTP contra el servidor falso en cada tamaño.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY_SECONDS,
+                        help="Latencia simulada por petición (segundos).")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fracción de peticiones que fallan (500/429).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Ruta del JSON de resultados (por defecto benchmarks/results/).")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    run_benchmarks(args.sizes, args.enrich_titles, args.workers, args.latency, args.error_rate, args.seed, args.output)
+
+
+if __name__ == "__main__":
+    setup_entry_point()
+    main()
@@ -0,0 +1,99 @@
+# --- synthetic_history.py ---
+# Generador de historiales de Netflix sintéticos (formato NetflixViewingHistory.csv)
+# con patrones realistas "Serie: Temporada N: Episodio" y un rango de fechas configurable
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_START_DATE = '2018-01-01'
+DEFAULT_END_DATE = '2025-06-30'
+NETFLIX_DATE_FORMAT = '%m/%d/%y'
+
+_PALABRAS = ['Casa', 'Papel', 'Noche', 'Sombra', 'Ciudad', 'Fuego', 'Mar', 'Reino', 'Código', 'Secreto',
+             'Lobo', 'Norte', 'Cielo', 'Tiempo', 'Oro', 'Hielo', 'Sangre', 'Luna', 'Isla', 'Silencio',
+             'Dark', 'Crown', 'Mirror', 'Stranger', 'Wild', 'Blue', 'Last', 'House', 'Game', 'Money']
+_EPISODIOS = ['Piloto', 'El comienzo', 'La huida', 'Revelaciones', 'Sin salida', 'El plan', 'Ciencia ilusionada',
+              'Válvulas de escape', 'La teoría de la elegancia', 'Final', 'Capítulo {n}', 'Episodio {n}']
+_FORMATOS_TEMPORADA = ['Temporada {n}', 'Season {n}', 'Parte {n}', 'Part {n}', 'Libro {n}']
+
+
+def _nombre(rng, palabras_min=1, palabras_max=3):
+    n = rng.integers(palabras_min, palabras_max + 1)
+    return ' '.join(rng.choice(_PALABRAS, size=n))
+
+
+def build_catalogue(n_shows, n_movies, seed=42):
+    """Catálogo de series (con nº de temporadas/episodios) y películas con nombres únicos."""
+    rng = np.random.default_rng(seed)
+    shows, movies, vistos = [], [], set()
+    while len(shows) < n_shows:
+        nombre = _nombre(rng)
+        # Algunas series tienen dos puntos en el propio nombre ("Star Wars: The Clone Wars")
+        if rng.random() < 0.1:
+            nombre = f"{nombre}: {_nombre(rng, 1, 2)}"
+        if nombre in vistos:
+            nombre = f"{nombre} {len(shows)}"
+        vistos.add(nombre)
+        shows.append({'nombre': nombre,
+                      'temporadas': int(rng.integers(1, 7)),
+                      'episodios': int(rng.integers(6, 14)),
+                      'formato': str(rng.choice(_FORMATOS_TEMPORADA))})
+    while len(movies) < n_movies:
+        nombre = _nombre(rng, 1, 4)
+        if nombre in vistos:
+            nombre = f"{nombre} {len(movies)}"
+        vistos.add(nombre)
+        movies.append(nombre)
+    return shows, movies
+
+
+def generate_history(n_rows, n_shows=800, n_movies=1200, series_share=0.75,
+                     start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE, seed=42):
+    """
+    Devuelve un DataFrame con columnas Title y Date (texto en formato Netflix '%m/%d/%y'),
+    ordenado de más reciente a más antiguo como la exportación real.
+    La popularidad de series y películas sigue una ley de Zipf, como en un historial real.
+    """
+    rng = np.random.default_rng(seed)
+    shows, movies = build_catalogue(n_shows, n_movies, seed=seed)
+
+    es_serie = rng.random(n_rows) < series_share
+    n_series = int(es_serie.sum())
+    pesos_series = 1.0 / np.arange(1, len(shows) + 1)
+    pesos_pelis = 1.0 / np.arange(1, len(movies) + 1)
+    idx_series = rng.choice(len(shows), size=n_series, p=pesos_series / pesos_series.sum())
+    idx_pelis = rng.choice(len(movies), size=n_rows - n_series, p=pesos_pelis / pesos_pelis.sum())
+
+    titulos = np.empty(n_rows, dtype=object)
+    temporadas = rng.integers(1, np.array([s['temporadas'] for s in shows])[idx_series] + 1)
+    episodios = rng.integers(1, np.array([s['episodios'] for s in shows])[idx_series] + 1)
+    nombres_ep = rng.integers(0, len(_EPISODIOS), size=n_series)
+    titulos_series = [
+        f"{shows[i]['nombre']}: {shows[i]['formato'].format(n=t)}: {_EPISODIOS[e].format(n=ep)}"
+        for i, t, ep, e in zip(idx_series, temporadas, episodios, nombres_ep)
+    ]
+    titulos[es_serie] = titulos_series
+    titulos[~es_serie] = [movies[i] for i in idx_pelis]
+
+    inicio, fin = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    dias = rng.integers(0, (fin - inicio).days + 1, size=n_rows)
+    fechas = (inicio + pd.to_timedelta(np.sort(dias)[::-1], unit='D'))
+    return pd.DataFrame({'Title': titulos, 'Date': fechas.strftime(NETFLIX_DATE_FORMAT)})
+
+
+def write_history(path, n_rows, seed=42, **kwargs):
+    generate_history(n_rows, seed=seed, **kwargs).to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un NetflixViewingHistory.csv sintético.")
+    parser.add_argument('output', help="Ruta del CSV a generar.")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start-date', default=DEFAULT_START_DATE)
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE)
+    args = parser.parse_args()
+    write_history(args.output, args.rows, seed=args.seed, start_date=args.start_date, end_date=args.end_date)
@@ -0,0 +1,148 @@
+# --- batch_etl.py ---
+# ETL por lotes para muchos perfiles/cuentas: los historiales se leen y limpian en paralelo
+# (un proceso por núcleo), los títulos se enriquecen una sola vez para todos los perfiles
+# y se escribe una salida enriquecida por perfil más una combinada.
+
+import argparse
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+try:
+    from scripts import run_etl
+    from scripts.cli import setup_entry_point
+    from scripts.data_io import ENRICHED_SCHEMA, OUTPUT_FORMATS, check_format_available, write_table
+    from scripts.title_catalogue import TitleCatalogue
+except ImportError:  # Ejecución directa: python scripts/batch_etl.py
+    import run_etl
+    from cli import setup_entry_point
+    from data_io import ENRICHED_SCHEMA, OUTPUT_FORMATS, check_format_available, write_table
+    from title_catalogue import TitleCatalogue
+
+# --- Constantes y Parámetros ---
+HISTORY_FILE_PATTERN = 'NetflixViewingHistory*.csv'
+PROFILES_OUTPUT_DIR = os.path.join(run_etl.PROJECT_ROOT, 'data', 'processed', 'profiles')
+COMBINED_OUTPUT_NAME = 'netflix_viewing_enriched_all_profiles.csv'
+
+
+def find_history_files(input_path):
+    """Acepta un directorio (busca NetflixViewingHistory*.csv dentro) o un patrón glob."""
+    pattern = os.path.join(input_path, HISTORY_FILE_PATTERN) if os.path.isdir(input_path) else input_path
+    return sorted(glob.glob(pattern))
+
+
+def profile_name_from_path(path):
+    # NetflixViewingHistory_ana.csv -> 'ana'; NetflixViewingHistory.csv -> 'NetflixViewingHistory'
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = stem.replace('NetflixViewingHistory', '', 1).strip(' _-')
+    return name or stem
+
+
+def load_profile_history(path):
+    """Trabajo de cada proceso: leer, validar y normalizar un historial. Devuelve (perfil, df, filas originales)."""
+    df_history = pd.read_csv(path)
+    if 'Title' not in df_history.columns or 'Date' not in df_history.columns:
+        raise ValueError(f"El CSV {path} debe contener 'Title' y 'Date'.")
+    original_rows = len(df_history)
+    return profile_name_from_path(path), run_etl.normalize_history(df_history), original_rows
+
+
+def run_batch_etl(input_path, output_dir=PROFILES_OUTPUT_DIR, processes=None, use_cache=True,
+                  max_workers=run_etl.ENRICHMENT_WORKERS, resume=False, output_format='csv'):
+    logging.info("--- ETL por lotes de perfiles de Netflix ---")
+    history_files = find_history_files(input_path)
+    if not history_files:
+        logging.error(f"No se encontraron historiales en: {input_path}")
+        return
+    logging.info(f"Perfiles encontrados: {len(history_files)}")
+
+    try:
+        check_format_available(output_format)
+    except ImportError as e:
+        logging.error(f"¡Error Crítico! {e}")
+        return
+
+    tmdb_api_key = os.getenv('TMDB_API_KEY')
+    if not tmdb_api_key:
+        logging.error("¡Error Crítico! No se encontró TMDB_API_KEY en el archivo .env o variable de entorno.")
+        return
+    tmdb_apis = run_etl.setup_tmdb_apis(tmdb_api_key, pool_size=max_workers)
+    if tmdb_apis is None:
+        return
+
+    # PASO 2: lectura y limpieza de todos los historiales en paralelo (CPU)
+    logging.info(f"PASO 2: Cargando y limpiando {len(history_files)} historiales en paralelo...")
+    profiles = {}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {path: executor.submit(load_profile_history, path) for path in history_files}
+        for path, future in futures.items():
+            try:
+                profile, df_history, original_rows = future.result()
+            except Exception as e:
+                logging.error(f"Perfil omitido, no se pudo cargar {path}: {e}")
+                continue
+            if profile in profiles:
+                logging.warning(f"Perfil '{profile}' duplicado ({path}). Se omite.")
+                continue
+            profiles[profile] = df_history
+            logging.info(f"Perfil '{profile}': {len(df_history)} filas válidas (Eliminadas: {original_rows - len(df_history)})")
+    if not profiles:
+        logging.error("No quedó ningún perfil válido.")
+        return
+
+    # PASO 3: un único conjunto global de títulos para todos los perfiles
+    unique_titles_seen = {}
+    for df_history in profiles.values():
+        unique_titles_seen.update(dict.fromkeys(df_history['Title_Cleaned_For_API'].unique()))
+    unique_titles = [str(title) for title in unique_titles_seen if pd.notna(title) and str(title).strip() != ""]
+    total_rows = sum(len(df_history) for df_history in profiles.values())
+    logging.info(f"PASO 3: {len(unique_titles)} títulos únicos globales para {total_rows} filas de {len(profiles)} perfiles.")
+
+    # PASO 4: cada título se enriquece una sola vez, sea cual sea el número de perfiles que lo vieron
+    tmdb_data_list, _ = run_etl.enrich_unique_titles(unique_titles, *tmdb_apis, use_cache, max_workers, resume)
+    # El catálogo compacto se construye una vez y se comparte entre todos los perfiles
+    catalogue = TitleCatalogue.from_records(tmdb_data_list)
+
+    # PASO 5 + 6: una salida por perfil y una combinada
+    logging.info(f"PASO 5/6: Escribiendo salidas por perfil en {output_dir}...")
+    combined_frames = []
+    for profile, df_history in profiles.items():
+        df_final = run_etl.merge_tmdb_data(df_history, catalogue)
+        write_table(df_final, os.path.join(output_dir, f"{profile}_enriched.csv"), output_format, schema=ENRICHED_SCHEMA)
+        combined_frames.append(df_final.assign(Profile=profile))
+    combined_path = os.path.join(output_dir, COMBINED_OUTPUT_NAME)
+    df_combined = pd.concat(combined_frames, ignore_index=True)
+    combined_path = write_table(df_combined, combined_path, output_format, schema=ENRICHED_SCHEMA)
+    logging.info(f"¡Éxito! {len(profiles)} perfiles escritos y salida combinada con {len(df_combined)} filas en {combined_path}")
+    if os.path.exists(run_etl.JOURNAL_PATH):
+        os.remove(run_etl.JOURNAL_PATH)
+    logging.info("\n--- Proceso ETL por lotes completado ---")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ETL por lotes para varios historiales de Netflix.")
+    parser.add_argument('input', help="Directorio con NetflixViewingHistory*.csv o patrón glob.")
+    parser.add_argument('--output-dir', default=PROFILES_OUTPUT_DIR, help="Directorio de salida.")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Procesos para leer y limpiar historiales (por defecto, uno por núcleo).")
+    parser.add_argument('--workers', type=int, default=run_etl.ENRICHMENT_WORKERS,
+                        help="Hilos concurrentes para el enriquecimiento (1 = secuencial).")
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de las salidas (parquet guarda tipos explícitos y necesita pyarrow).")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché persistente de TMDb.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanudar una ejecución interrumpida saltando los títulos ya registrados en el diario.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    run_batch_etl(args.input, output_dir=args.output_dir, processes=args.processes,
+                  use_cache=not args.no_cache, max_workers=args.workers, resume=args.resume,
+                  output_format=args.output_format)
+
+if __name__ == "__main__":
+    setup_entry_point()
+    main()
@@ -0,0 +1,97 @@
+# --- checkpoint.py ---
+# Diario de progreso (JSON lines) del enriquecimiento y escritura atómica de archivos,
+# para poder reanudar una ejecución interrumpida sin repetir llamadas a TMDb
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+JOURNAL_FSYNC_EVERY = 25
+
+
+class EnrichmentJournal:
+    """
+    Diario append-only: una línea JSON por título procesado, con su resultado
+    ('ok' + datos) o el fallo. Se hace fsync cada `fsync_every` registros.
+    """
+
+    def __init__(self, path, fsync_every=JOURNAL_FSYNC_EVERY, truncate=False):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'w' if truncate else 'a', encoding='utf-8')
+
+    def record(self, title, details):
+        entry = {'title': title, 'status': 'ok' if details else 'failed', 'data': details or None}
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def load_journal(path):
+    """
+    Devuelve {título: datos o None} con lo registrado en el diario.
+    Una última línea truncada (caída a mitad de escritura) se ignora.
+    """
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Línea {line_number} del diario {path} incompleta o corrupta. Se ignora.")
+                continue
+            entries[entry['title']] = entry.get('data') if entry.get('status') == 'ok' else None
+    return entries
+
+
+@contextmanager
+def open_atomic(path, mode='w', encoding='utf-8'):
+    """
+    Abre un temporal en el mismo directorio que `path` y, si el bloque termina sin errores,
+    lo renombra sobre `path`. Así nunca queda un archivo final a medias.
+    Con mode='wb' se abre en binario (p. ej. para Parquet).
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    binary = 'b' in mode
+    try:
+        with os.fdopen(fd, mode, encoding=None if binary else encoding, newline=None if binary else '') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_csv_atomic(df, path, **to_csv_kwargs):
+    """Escribe el CSV en un temporal del mismo directorio y lo renombra."""
+    with open_atomic(path, encoding=to_csv_kwargs.pop('encoding', 'utf-8')) as f:
+        df.to_csv(f, **to_csv_kwargs)
@@ -0,0 +1,62 @@
+# --- cli.py ---
+# Punto de entrada único del pipeline: python -m scripts.cli [-v] {etl,powerbi,batch,bench} [opciones del comando].
+# Solo aquí se cargan las variables de .env y se configura logging; el módulo de cada comando se importa
+# al elegirlo, así `--help` o `powerbi` no cargan requests ni el cliente TMDb.
+
+import argparse
+import importlib
+import logging
+import os
+import sys
+
+# --- Constantes y Parámetros ---
+LOG_FORMAT = '%(asctime)s - %(levelname)s - [%(funcName)s:%(lineno)d] - %(message)s'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+# Comando -> (módulo con main(argv), descripción)
+COMMANDS = {
+    'etl': ('scripts.run_etl', "ETL del historial de Netflix enriquecido con TMDb."),
+    'powerbi': ('scripts.powerbi_prep', "Prepara los datos enriquecidos para Power BI."),
+    'batch': ('scripts.batch_etl', "ETL por lotes para varios historiales de Netflix."),
+    'bench': ('benchmarks.run_benchmarks', "Benchmarks del pipeline con datos sintéticos."),
+}
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_entry_point(level=logging.INFO):
+    """Carga .env y configura logging. Lo llaman la CLI y los `__main__` de los scripts, nunca un import."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:  # python-dotenv es opcional si las variables ya están en el entorno
+        load_dotenv = None
+    if load_dotenv is not None:
+        load_dotenv()
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
+def load_command(command):
+    module_name = COMMANDS[command][0]
+    if PROJECT_ROOT not in sys.path:  # Ejecución directa: python scripts/cli.py
+        sys.path.insert(0, PROJECT_ROOT)
+    return importlib.import_module(module_name)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pipeline Netflix + TMDb. Las opciones de cada comando: <comando> --help.",
+        epilog="\n".join(f"  {name:<8} {description}" for name, (_, description) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='INFO', help="Nivel de logging (INFO por defecto).")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Equivale a --log-level DEBUG.")
+    parser.add_argument('command', choices=COMMANDS, help="Comando a ejecutar.")
+    parser.add_argument('command_args', nargs=argparse.REMAINDER, help="Opciones del comando.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    setup_entry_point(logging.DEBUG if args.verbose else getattr(logging, args.log_level))
+    return load_command(args.command).main(args.command_args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# --- cubo_agregados.py ---
+# Cubo de agregados precalculado en una sola pasada (año/mes/día de la semana × tipo × calidad × género)
+# con conteos y sumas de calificación, popularidad y tiempo visto. Las tablas resumen de Power BI
+# se derivan del cubo (miles de filas) en lugar de volver a agrupar millones de visualizaciones.
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONES_CUBO = ['Anio', 'Mes_Num', 'Dia_Semana_Num', 'Tipo_Medio_TMDb', 'Calidad', 'Genero']
+# Columna de origen -> nombre de la medida en el cubo
+MEDIDAS_CUBO = {
+    'Calificacion_Promedio_TMDb': 'Calificacion',
+    'Popularidad_TMDb': 'Popularidad',
+    'Tiempo_Visualizacion': 'Tiempo_Visto',
+}
+# Cada visualización aparece una vez con este género (totales) y una vez por cada uno de sus géneros
+TODOS_LOS_GENEROS = '(Todos)'
+
+
+def pares_genero(generos):
+    """
+    Posición de fila y género para cada género de cada fila. Solo se parten las cadenas
+    de géneros distintas; las filas se expanden con np.repeat.
+    """
+    codigos, cadenas = pd.factorize(generos)
+    listas = [[g.strip() for g in str(cadena).split(',') if g.strip() not in ('', 'Sin género')] for cadena in cadenas]
+    # El código -1 (sin géneros) cae en el último elemento, que vale 0
+    n_por_cadena = np.array([len(lista) for lista in listas] + [0], dtype=np.int64)
+    inicio_por_cadena = np.concatenate([[0], np.cumsum(n_por_cadena)[:-1]])
+    n_por_fila = n_por_cadena[codigos]
+    filas = np.repeat(np.arange(len(generos)), n_por_fila)
+    primer_par_de_fila = np.repeat(np.cumsum(n_por_fila) - n_por_fila, n_por_fila)
+    posiciones = np.repeat(inicio_por_cadena[codigos], n_por_fila) + (np.arange(len(filas)) - primer_par_de_fila)
+    planos = np.array([g for lista in listas for g in lista], dtype=object)
+    return filas, planos[posiciones]
+
+
+def construir_cubo(df):
+    """Agrupa una sola vez por todas las dimensiones y guarda Conteo, N_*, Suma_* y Media_* de cada medida."""
+    dimensiones_fila = [d for d in DIMENSIONES_CUBO if d != 'Genero']
+    base = df.reindex(columns=dimensiones_fila + list(MEDIDAS_CUBO)).reset_index(drop=True)
+    for col in MEDIDAS_CUBO:
+        base[col] = pd.to_numeric(base[col], errors='coerce')
+    generos = df['Generos_TMDb'].reset_index(drop=True) if 'Generos_TMDb' in df.columns else pd.Series(np.nan, index=base.index)
+    filas, generos_por_par = pares_genero(generos)
+    pares = pd.concat([base.assign(Genero=TODOS_LOS_GENEROS), base.iloc[filas].assign(Genero=generos_por_par)],
+                      ignore_index=True)
+
+    agregaciones = {'Conteo': (dimensiones_fila[0], 'size')}
+    for col, medida in MEDIDAS_CUBO.items():
+        agregaciones[f'N_{medida}'] = (col, 'count')
+        agregaciones[f'Suma_{medida}'] = (col, 'sum')
+    cubo = pares.groupby(DIMENSIONES_CUBO, dropna=False, observed=True, sort=True).agg(**agregaciones).reset_index()
+    return _anadir_medias(cubo)
+
+
+def _anadir_medias(tabla):
+    for medida in MEDIDAS_CUBO.values():
+        n = tabla[f'N_{medida}']
+        tabla[f'Media_{medida}'] = (tabla[f'Suma_{medida}'] / n).where(n > 0)
+    return tabla
+
+
+def consultar_cubo(cubo, por):
+    """
+    Re-agrega el cubo por las dimensiones de `por`. Sin 'Genero' en `por` se usan las filas de totales
+    (cada visualización cuenta una vez); con 'Genero', las filas por género.
+    """
+    por_genero = 'Genero' in por
+    filas = cubo[cubo['Genero'] != TODOS_LOS_GENEROS] if por_genero else cubo[cubo['Genero'] == TODOS_LOS_GENEROS]
+    sumables = ['Conteo'] + [f'{p}_{m}' for m in MEDIDAS_CUBO.values() for p in ('N', 'Suma')]
+    tabla = filas.groupby(por, observed=True)[sumables].sum().reset_index()
+    return _anadir_medias(tabla)
+
+
+def derivar_promedio_calidad_tipo(cubo):
+    tabla = consultar_cubo(cubo, ['Tipo_Medio_TMDb'])
+    return tabla[['Tipo_Medio_TMDb', 'Media_Calificacion']].rename(columns={'Media_Calificacion': 'Calificacion_Promedio_TMDb'})
+
+
+def derivar_resumen_calidad_tipo(cubo):
+    return consultar_cubo(cubo, ['Tipo_Medio_TMDb', 'Calidad'])[['Tipo_Medio_TMDb', 'Calidad', 'Conteo']]
+
+
+def derivar_generos_populares(cubo):
+    tabla = consultar_cubo(cubo, ['Genero'])
+    tabla = tabla.rename(columns={'Media_Popularidad': 'Popularidad_TMDb', 'Media_Calificacion': 'Calificacion_Promedio_TMDb'})
+    return (tabla[['Genero', 'Popularidad_TMDb', 'Calificacion_Promedio_TMDb', 'Conteo']]
+            .sort_values('Conteo', ascending=False).reset_index(drop=True))
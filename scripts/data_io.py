@@ -0,0 +1,153 @@
+# --- data_io.py ---
+# Lectura/escritura de las tablas del proyecto en CSV o en formato columnar (Parquet)
+# con un esquema tipado explícito, para que los consumidores no tengan que volver a
+# parsear fechas y números en cada carga.
+
+import os
+
+import pandas as pd
+
+try:
+    from scripts.checkpoint import open_atomic, write_csv_atomic
+except ImportError:  # Ejecución directa desde scripts/
+    from checkpoint import open_atomic, write_csv_atomic
+
+try:
+    import pyarrow  # Motor de Parquet para pandas
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+OUTPUT_FORMATS = ('csv', 'parquet')
+FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet'}
+
+MESES_ES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+            'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+DIAS_ES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+# --- Esquemas tipados ---
+ENRICHED_SCHEMA = {
+    'Title': 'string',
+    'Date': 'datetime64[ns]',
+    'Title_Cleaned_For_API': 'string',
+    'tmdb_id': 'Int64',
+    'tmdb_title': 'string',
+    'tmdb_original_title': 'string',
+    'tmdb_overview': 'string',
+    'tmdb_genres': 'string',
+    'tmdb_popularity': 'float64',
+    'tmdb_vote_average': 'float64',
+    'tmdb_vote_count': 'Int64',
+    'tmdb_media_type': 'category',
+    'tmdb_release_date': 'datetime64[ns]',
+    'tmdb_runtime_minutes': 'Int64',
+}
+
+POWERBI_SCHEMA = {
+    'Titulo_Original_Netflix': 'string',
+    'Fecha_Visualizacion': 'datetime64[ns]',
+    'Titulo_Limpio_Busqueda': 'string',
+    'ID_TMDb': 'Int64',
+    'Titulo_TMDb': 'string',
+    'Generos_TMDb': 'string',
+    'Genero': 'category',
+    'Popularidad_TMDb': 'float64',
+    'Calificacion_Promedio_TMDb': 'float64',
+    'Cantidad_Votos_TMDb': 'Int64',
+    'Tipo_Medio_TMDb': 'category',
+    'Tipo_Medio': 'category',
+    'Fecha_Estreno_TMDb': 'datetime64[ns]',
+    'Duracion_Minutos_TMDb': 'float64',
+    'Calidad': 'category',
+    'Categoria_Calidad': 'category',
+    'Anio': 'Int64',
+    'Mes_Num': 'Int64',
+    'Dia_Mes': 'Int64',
+    'Dia_Semana_Num': 'Int64',
+    'Hora_Visualizacion': 'Int64',
+    'Semana_Anio': 'Int64',
+    'Mes': pd.CategoricalDtype(MESES_ES, ordered=True),
+    'Dia_Semana': pd.CategoricalDtype(DIAS_ES, ordered=True),
+    'Tiempo_Desde_Estreno': 'Int64',
+    'Tiempo_Visualizacion': 'Int64',
+    'Conteo': 'Int64',
+    # Medidas del cubo de agregados (cubo_agregados.py)
+    'N_Calificacion': 'Int64',
+    'Suma_Calificacion': 'float64',
+    'Media_Calificacion': 'float64',
+    'N_Popularidad': 'Int64',
+    'Suma_Popularidad': 'float64',
+    'Media_Popularidad': 'float64',
+    'N_Tiempo_Visto': 'Int64',
+    'Suma_Tiempo_Visto': 'float64',
+    'Media_Tiempo_Visto': 'float64',
+    # Claves del esquema en estrella (esquema_estrella.py)
+    'Clave_Fecha': 'Int64',
+    'Clave_Titulo': 'Int64',
+    'Clave_Episodio': 'Int64',
+    'Clave_Genero': 'Int64',
+    'Clave_Tipo_Medio': 'Int64',
+    'Fecha': 'datetime64[ns]',
+}
+
+
+def apply_schema(df, schema):
+    """Devuelve una copia superficial de `df` con las columnas presentes convertidas al tipo del esquema."""
+    typed = df.copy(deep=False)
+    for col, dtype in schema.items():
+        if col not in typed.columns:
+            continue
+        if dtype == 'datetime64[ns]':
+            typed[col] = pd.to_datetime(typed[col], errors='coerce')
+        elif dtype == 'Int64':
+            typed[col] = pd.to_numeric(typed[col], errors='coerce').round().astype('Int64')
+        elif dtype == 'float64':
+            typed[col] = pd.to_numeric(typed[col], errors='coerce').astype('float64')
+        else:
+            typed[col] = typed[col].astype(dtype)
+    return typed
+
+
+def output_path(path, fmt):
+    """Cambia la extensión de `path` según el formato ('csv' o 'parquet')."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de salida no soportado: '{fmt}'. Usa uno de {OUTPUT_FORMATS}.")
+    return os.path.splitext(path)[0] + FORMAT_EXTENSIONS[fmt]
+
+
+def check_format_available(fmt):
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        raise ImportError("La salida Parquet necesita 'pyarrow' (pip install pyarrow).")
+
+
+def write_table(df, path, fmt='csv', schema=None):
+    """Escribe `df` de forma atómica en `path` (con la extensión del formato). Devuelve la ruta final."""
+    final_path = output_path(path, fmt)
+    if fmt == 'parquet':
+        check_format_available(fmt)
+        typed = apply_schema(df, schema) if schema else df
+        with open_atomic(final_path, mode='wb') as f:
+            typed.to_parquet(f, index=False)
+    else:
+        write_csv_atomic(df, final_path, index=False, encoding='utf-8')
+    return final_path
+
+
+def find_existing_table(path):
+    """
+    Busca la tabla en cualquiera de los formatos soportados (misma ruta base).
+    Si existen varias, devuelve la modificada más recientemente; None si no hay ninguna.
+    """
+    candidates = [output_path(path, fmt) for fmt in OUTPUT_FORMATS]
+    candidates = [candidate for candidate in candidates if os.path.exists(candidate)]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def read_table(path):
+    """Lee una tabla CSV o Parquet según su extensión. Parquet conserva los tipos del esquema."""
+    if path.endswith(FORMAT_EXTENSIONS['parquet']):
+        check_format_available('parquet')
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
@@ -0,0 +1,80 @@
+# --- date_normalization.py ---
+# Normalización de fechas del historial. Las exportaciones de Netflix traen pocas fechas distintas
+# (una por día) repetidas en miles de filas y con el formato del idioma de la cuenta: el formato se
+# detecta una vez con una muestra, solo se parsean los textos distintos y el resultado se reparte a las
+# filas por código. Los textos ya parseados se recuerdan entre bloques (streaming) y perfiles.
+
+import numpy as np
+import pandas as pd
+
+# --- Constantes y Parámetros ---
+# Por orden de preferencia: ante una muestra ambigua (todos los días <= 12) gana el primero que la lee entera
+DATE_FORMAT_CANDIDATES = ('%m/%d/%y', '%d/%m/%y', '%m/%d/%Y', '%d/%m/%Y', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S',
+                          '%d.%m.%y', '%d.%m.%Y', '%d-%m-%Y', '%Y/%m/%d')
+DATE_SAMPLE_SIZE = 500  # Textos distintos usados para detectar el formato
+
+
+def detect_date_format(values, candidates=DATE_FORMAT_CANDIDATES, sample_size=DATE_SAMPLE_SIZE):
+    """Formato candidato que lee más textos de una muestra repartida de `values`; None si ninguno lee alguno."""
+    values = pd.Index(values)
+    if len(values) == 0:
+        return None
+    sample = values[::max(1, len(values) // sample_size)][:sample_size]
+    best_format, best_parsed = None, 0
+    for date_format in candidates:
+        parsed = int(pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum())
+        if parsed > best_parsed:
+            best_format, best_parsed = date_format, parsed
+        if parsed == len(sample):
+            break
+    return best_format
+
+
+class DateNormalizer:
+    """
+    Parser de fechas con formato detectado una sola vez y memoria de los textos ya vistos.
+    `preferred_format` se prueba antes que el resto de candidatos.
+    """
+
+    def __init__(self, preferred_format=None, candidates=DATE_FORMAT_CANDIDATES, sample_size=DATE_SAMPLE_SIZE):
+        self.candidates = tuple(dict.fromkeys(((preferred_format,) if preferred_format else ()) + tuple(candidates)))
+        self.sample_size = sample_size
+        self.date_format = None
+        self._parsed = pd.Series([], index=pd.Index([], dtype=object), dtype='datetime64[ns]')  # texto -> fecha (NaT si no se pudo)
+        self.stats = {'rows': 0, 'unique_values': 0, 'fallback_values': 0, 'invalid_rows': 0}
+
+    def parse(self, values):
+        """Fechas de `values` (Series con su índice). Una columna ya tipada se devuelve tal cual."""
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        codes, uniques = pd.factorize(values.astype(object).where(values.notna(), None))
+        texts = pd.Index(uniques).astype(str).str.strip()
+        new_texts = texts[~texts.isin(self._parsed.index)].unique()
+        if len(new_texts):
+            self._parsed = pd.concat([self._parsed, self._parse_texts(new_texts)])
+        parsed_uniques = self._parsed.reindex(texts).to_numpy(dtype='datetime64[ns]')
+        # El código -1 (valor nulo) cae en el NaT añadido al final
+        result = pd.Series(np.append(parsed_uniques, np.datetime64('NaT', 'ns'))[codes], index=values.index)
+        self.stats['rows'] += len(values)
+        self.stats['unique_values'] += len(new_texts)
+        self.stats['invalid_rows'] += int(result.isna().sum())
+        return result
+
+    def _parse_texts(self, texts):
+        if self.date_format is None:
+            self.date_format = detect_date_format(texts, self.candidates, self.sample_size)
+        parsed = pd.Series(pd.NaT, index=texts, dtype='datetime64[ns]')
+        if self.date_format:
+            parsed[:] = pd.to_datetime(texts, format=self.date_format, errors='coerce')
+        # Textos con otro formato (exportaciones mezcladas): se prueban el resto de candidatos y, al final,
+        # la inferencia por elemento, siempre solo sobre los textos que siguen sin leer
+        fallback = parsed.isna()
+        for date_format in [f for f in self.candidates if f != self.date_format] + ['mixed']:
+            pending = parsed.isna().to_numpy()
+            if not pending.any():
+                break
+            parsed[pending] = pd.to_datetime(texts[pending], format=date_format, errors='coerce')
+        self.stats['fallback_values'] += int((fallback & parsed.notna()).sum())
+        return parsed
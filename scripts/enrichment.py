@@ -0,0 +1,62 @@
+# --- enrichment.py ---
+# Enriquecimiento concurrente de títulos con TMDb respetando un límite de peticiones compartido
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Constantes y Parámetros ---
+# TMDb admite del orden de 40-50 peticiones/segundo por IP; nos quedamos en la parte baja
+TMDB_REQUESTS_PER_SECOND = 40
+TMDB_BURST = 40
+PROGRESS_LOG_EVERY = 100
+
+
+class TokenBucket:
+    """
+    Limitador de tasa tipo token bucket, seguro entre hilos.
+    Se rellena a `rate` tokens por segundo hasta `capacity`; cada petición consume uno.
+    """
+
+    def __init__(self, rate=TMDB_REQUESTS_PER_SECOND, capacity=TMDB_BURST):
+        if rate <= 0:
+            raise ValueError("rate debe ser mayor que 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens=1):
+        """Bloquea hasta que haya `tokens` disponibles y los consume."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_seconds = (tokens - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def enrich_titles_concurrently(titles, lookup_fn, max_workers):
+    """
+    Ejecuta `lookup_fn(title)` para cada título en un pool de hilos acotado.
+    Devuelve los resultados en el mismo orden que `titles`, sea cual sea el orden de finalización.
+    """
+    total = len(titles)
+    results = []
+    logging.info(f"Enriqueciendo {total} títulos con {max_workers} hilos concurrentes...")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tmdb') as executor:
+        # executor.map conserva el orden de entrada, así la salida es determinista
+        for result in executor.map(lookup_fn, titles):
+            results.append(result)
+            if len(results) % PROGRESS_LOG_EVERY == 0:
+                logging.info(f"Progreso enriquecimiento: {len(results)}/{total} títulos.")
+    return results
@@ -0,0 +1,123 @@
+# --- esquema_estrella.py ---
+# Exportación en estrella para el modelo de Power BI: una tabla de hechos estrecha (una fila por
+# visualización con claves enteras y tiempo visto) y dimensiones de títulos TMDb, episodios, géneros
+# (tabla puente), fechas y tipo de medio. Los atributos del título y del calendario se guardan una sola vez:
+# dim_titulo tiene una fila por título de TMDb (no por episodio) y el título tal como lo escribe Netflix
+# va aparte, en la dimensión estrecha dim_episodio.
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scripts.cubo_agregados import pares_genero
+    from scripts.data_io import DIAS_ES, MESES_ES
+except ImportError:
+    from cubo_agregados import pares_genero
+    from data_io import DIAS_ES, MESES_ES
+
+# Atributos que dependen solo del título de TMDb (o del título buscado, si no hubo coincidencia)
+COLUMNAS_DIM_TITULO = ['Titulo_Limpio_Busqueda', 'ID_TMDb', 'Titulo_TMDb', 'Generos_TMDb',
+                       'Popularidad_TMDb', 'Calificacion_Promedio_TMDb', 'Cantidad_Votos_TMDb', 'Fecha_Estreno_TMDb',
+                       'Duracion_Minutos_TMDb', 'Calidad', 'Categoria_Calidad']
+TABLAS_ESTRELLA = ['hechos_visualizaciones', 'dim_titulo', 'dim_episodio', 'dim_genero', 'puente_titulo_genero', 'dim_fecha',
+                   'dim_tipo_medio']
+
+
+def clave_fecha(fechas):
+    """Clave entera AAAAMMDD de cada fecha (nula si falta)."""
+    fechas = pd.to_datetime(pd.Series(fechas), errors='coerce')
+    return (fechas.dt.year * 10000 + fechas.dt.month * 100 + fechas.dt.day).astype('Int64')
+
+
+def _clave(codigos):
+    """Códigos de factorize (-1 = nulo) -> claves Int64 desde 1."""
+    claves = pd.array(codigos + 1, dtype='Int64')
+    claves[codigos < 0] = pd.NA
+    return claves
+
+
+def _columna(df, col, relleno=np.nan):
+    return df[col] if col in df.columns else pd.Series(relleno, index=df.index)
+
+
+def clave_titulo(df):
+    """
+    Código de título por fila: (tipo de medio, ID_TMDb) si hubo coincidencia con TMDb y, si no, el título
+    limpio de búsqueda. Todos los episodios de una serie comparten código.
+    """
+    ids = pd.to_numeric(_columna(df, 'ID_TMDb'), errors='coerce').astype('Int64')
+    tipos = _columna(df, 'Tipo_Medio_TMDb').astype(object).fillna('').astype(str)
+    busqueda = _columna(df, 'Titulo_Limpio_Busqueda', '').astype(object).fillna('').astype(str)
+    claves = ('tmdb:' + tipos + ':' + ids.astype(str)).where(ids.notna(), 'busqueda:' + busqueda)
+    return pd.factorize(claves)[0]
+
+
+def construir_dim_fecha(fechas):
+    """Calendario continuo entre la primera y la última fecha (Power BI necesita días sin huecos)."""
+    fechas = pd.to_datetime(pd.Series(fechas), errors='coerce').dropna()
+    if fechas.empty:
+        dias = pd.DatetimeIndex([])
+    else:
+        dias = pd.date_range(fechas.min().normalize(), fechas.max().normalize(), freq='D')
+    return pd.DataFrame({
+        'Clave_Fecha': clave_fecha(dias),
+        'Fecha': dias,
+        'Anio': dias.year,
+        'Mes_Num': dias.month,
+        'Mes': pd.Categorical.from_codes(dias.month - 1, MESES_ES, ordered=True),
+        'Dia_Mes': dias.day,
+        'Dia_Semana_Num': dias.dayofweek,
+        'Dia_Semana': pd.Categorical.from_codes(dias.dayofweek, DIAS_ES, ordered=True),
+        'Semana_Anio': dias.isocalendar().week.to_numpy(),
+    })
+
+
+def construir_esquema_estrella(df):
+    """
+    Devuelve {nombre: DataFrame} con las tablas de TABLAS_ESTRELLA a partir del DataFrame
+    ancho de transformar_para_powerbi. Las claves son enteros consecutivos desde 1.
+    """
+    df = df.reset_index(drop=True)
+    n = len(df)
+    codigos_titulo = clave_titulo(df)
+    primera_fila = np.unique(codigos_titulo, return_index=True)[1]
+    codigos_episodio, episodios = pd.factorize(_columna(df, 'Titulo_Original_Netflix', '').fillna(''))
+    dim_episodio = pd.DataFrame({'Clave_Episodio': np.arange(1, len(episodios) + 1),
+                                 'Titulo_Original_Netflix': episodios})
+
+    codigos_tipo, valores_tipo = pd.factorize(_columna(df, 'Tipo_Medio_TMDb').astype(object))
+    dim_tipo_medio = pd.DataFrame({
+        'Clave_Tipo_Medio': np.arange(1, len(valores_tipo) + 1),
+        'Tipo_Medio_TMDb': valores_tipo,
+        'Tipo_Medio': valores_tipo,
+        'Es_Serie': valores_tipo == 'tv',
+        'Es_Pelicula': valores_tipo == 'movie',
+    })
+
+    dim_titulo = df.reindex(columns=COLUMNAS_DIM_TITULO).iloc[primera_fila].reset_index(drop=True)
+    dim_titulo.insert(0, 'Clave_Titulo', np.arange(1, len(dim_titulo) + 1))
+    dim_titulo['Clave_Tipo_Medio'] = _clave(codigos_tipo[primera_fila])
+
+    filas, generos = pares_genero(dim_titulo['Generos_TMDb'])
+    codigos_genero, valores_genero = pd.factorize(pd.Series(generos, dtype=object), sort=True)
+    dim_genero = pd.DataFrame({'Clave_Genero': np.arange(1, len(valores_genero) + 1), 'Genero': valores_genero})
+    puente = pd.DataFrame({'Clave_Titulo': filas + 1, 'Clave_Genero': codigos_genero + 1}).drop_duplicates(ignore_index=True)
+
+    fechas = _columna(df, 'Fecha_Visualizacion', pd.NaT)
+    hechos = pd.DataFrame({
+        'Clave_Fecha': clave_fecha(fechas),
+        'Clave_Titulo': codigos_titulo + 1,
+        'Clave_Episodio': codigos_episodio + 1,
+        'Clave_Tipo_Medio': _clave(codigos_tipo),
+        'Tiempo_Visualizacion': df['Tiempo_Visualizacion'] if 'Tiempo_Visualizacion' in df.columns else pd.NA,
+    }, index=pd.RangeIndex(n))
+
+    return {
+        'hechos_visualizaciones': hechos,
+        'dim_titulo': dim_titulo,
+        'dim_episodio': dim_episodio,
+        'dim_genero': dim_genero,
+        'puente_titulo_genero': puente,
+        'dim_fecha': construir_dim_fecha(fechas),
+        'dim_tipo_medio': dim_tipo_medio,
+    }
@@ -0,0 +1,68 @@
+# --- failures.py ---
+# Motivos de fallo del enriquecimiento y política de reintentos. Los fallos permanentes (TMDb no tiene
+# el título) se saltan en las siguientes ejecuciones hasta que vence su backoff, que se duplica con cada
+# intento; los transitorios (red, detalles que no llegan) se reintentan en una pasada aparte al final.
+
+import threading
+
+# --- Constantes y Parámetros ---
+FAILURE_NO_MATCH = 'no_match'          # Búsqueda sin resultados
+FAILURE_NO_MOVIE_TV = 'no_movie_tv'    # Resultados, pero ninguno es película o serie
+FAILURE_TYPE_ERROR = 'type_error'      # Respuesta con una forma inesperada (TypeError al leerla)
+FAILURE_NO_DETAILS = 'no_details'      # Se resolvió el id pero los detalles llegaron vacíos
+FAILURE_NETWORK = 'network'            # RequestException con los reintentos del cliente agotados
+FAILURE_REJECTED = 'rejected'          # HTTP 4xx que el cliente no reintenta (404, 422...): no cambiará al repetir
+FAILURE_AUTH = 'auth'                  # HTTP 401/403: API key inválida o sin permiso, no es culpa del título
+FAILURE_ERROR = 'error'                # Cualquier otra excepción
+FAILURE_BACKOFF = 'backoff'            # No se intentó: sigue en backoff por un fallo permanente anterior
+FAILURE_NOT_IN_SNAPSHOT = 'not_in_snapshot'  # Modo sin red: no está en la instantánea local, la API no se consultó
+FAILURE_CACHED_NO_MATCH = 'cached_no_match'  # Sin coincidencia según la caché TMDb: no se volvió a buscar
+
+PERMANENT_FAILURES = (FAILURE_NO_MATCH, FAILURE_NO_MOVIE_TV, FAILURE_TYPE_ERROR, FAILURE_REJECTED)
+TRANSIENT_FAILURES = (FAILURE_NO_DETAILS, FAILURE_NETWORK, FAILURE_ERROR)
+# Títulos que no se buscaron en TMDb en esta ejecución (o que TMDb no llegó a evaluar): no cuentan como intento
+UNATTEMPTED_FAILURES = (FAILURE_BACKOFF, FAILURE_NOT_IN_SNAPSHOT, FAILURE_CACHED_NO_MATCH, FAILURE_AUTH)
+AUTH_ERROR_STATUS = (401, 403)
+RETRY_SKIP_MIN_TITLES = 5         # Si fallan de forma transitoria todos los títulos y son al menos estos, la API está caída
+FAILURE_BACKOFF_DAYS = 7          # Espera tras el primer fallo permanente; 0 desactiva el salto
+FAILURE_BACKOFF_MAX_DAYS = 180
+
+
+def backoff_seconds(attempts, base_days=FAILURE_BACKOFF_DAYS, max_days=FAILURE_BACKOFF_MAX_DAYS):
+    """Espera antes de volver a buscar un título con `attempts` fallos permanentes: base × 2^(intentos-1), con tope."""
+    if not base_days or attempts < 1:
+        return 0.0
+    return min(base_days * 2 ** (attempts - 1), max_days) * 24 * 3600
+
+
+def request_failure_reason(error):
+    """Motivo de un RequestException que ya no se reintenta: 401/403 -> auth, otro 4xx -> rejected, el resto -> network."""
+    status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status_code in AUTH_ERROR_STATUS:
+        return FAILURE_AUTH
+    if status_code is not None and 400 <= status_code < 500 and status_code != 429:
+        return FAILURE_REJECTED
+    return FAILURE_NETWORK
+
+
+class FailureLog:
+    """Motivo del último fallo de cada título (o id) durante una ejecución; compartido entre hilos."""
+
+    def __init__(self):
+        self._reasons = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, reason):
+        with self._lock:
+            self._reasons[key] = reason
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._reasons.get(key, default)
+
+    def discard(self, key):
+        with self._lock:
+            self._reasons.pop(key, None)
+
+    def __len__(self):
+        return len(self._reasons)
@@ -0,0 +1,98 @@
+# --- incremental.py ---
+# Marca de agua (watermark) para el modo incremental del ETL:
+# solo se procesan las filas del historial posteriores a la última ejecución
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scripts.data_io import read_table
+except ImportError:  # Ejecución directa desde scripts/
+    from data_io import read_table
+
+TMDB_COLUMNS = ['tmdb_id', 'tmdb_title', 'tmdb_original_title', 'tmdb_overview', 'tmdb_genres',
+                'tmdb_popularity', 'tmdb_vote_average', 'tmdb_vote_count', 'tmdb_media_type',
+                'tmdb_release_date', 'tmdb_runtime_minutes']
+
+
+def compute_rows_digest(df):
+    """Hash de contenido de las filas (Title, Date), independiente del orden de las filas."""
+    if df.empty:
+        return hashlib.sha256(b'').hexdigest()
+    row_hashes = np.sort(pd.util.hash_pandas_object(df[['Title', 'Date']], index=False).to_numpy())
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def build_watermark(df_history):
+    """
+    La marca guarda la última fecha procesada y el hash de las filas anteriores a ese día.
+    Las filas del último día no entran en el hash porque la exportación de Netflix
+    puede añadir más visualizaciones a ese mismo día; se reprocesan en la siguiente ejecución.
+    """
+    last_date = df_history['Date'].max()
+    prior_rows = df_history[df_history['Date'] < last_date]
+    return {
+        'last_date': last_date.strftime('%Y-%m-%d'),
+        'rows_hash': compute_rows_digest(prior_rows),
+        'rows_count': int(len(prior_rows)),
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def load_watermark(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"No se pudo leer la marca de agua {path}: {e}")
+        return None
+
+
+def save_watermark(path, watermark):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, indent=2)
+
+
+def select_new_rows(df_history, watermark):
+    """
+    Devuelve las filas con Date >= last_date si el historial anterior no ha cambiado,
+    o None si hay que hacer un recálculo completo (sin marca o historial modificado).
+    """
+    if not watermark:
+        return None
+    last_date = pd.Timestamp(watermark['last_date'])
+    prior_rows = df_history[df_history['Date'] < last_date]
+    if len(prior_rows) != watermark.get('rows_count') or compute_rows_digest(prior_rows) != watermark.get('rows_hash'):
+        logging.warning("El historial anterior a la marca de agua ha cambiado. Se hará un recálculo completo.")
+        return None
+    return df_history[df_history['Date'] >= last_date]
+
+
+def split_existing_enriched(path, since_date):
+    """
+    Lee el archivo enriquecido previo (CSV o Parquet) y devuelve:
+    - las filas anteriores a `since_date`, que se conservan tal cual;
+    - una tabla de búsqueda (un registro por título limpio) con las columnas TMDb ya resueltas;
+    - el conjunto de títulos limpios ya enriquecidos (con tmdb_id); los fallidos se vuelven a buscar.
+    """
+    df_existing = read_table(path)
+    df_existing['Date'] = pd.to_datetime(df_existing['Date'], errors='coerce')
+    df_kept = df_existing[df_existing['Date'] < since_date]
+    tmdb_cols = [col for col in TMDB_COLUMNS if col in df_existing.columns]
+    if 'tmdb_id' in tmdb_cols:
+        df_lookup = (df_existing.loc[df_existing['tmdb_id'].notna(), ['Title_Cleaned_For_API'] + tmdb_cols]
+                     .drop_duplicates(subset='Title_Cleaned_For_API')
+                     .rename(columns={'Title_Cleaned_For_API': 'search_title_query'}))
+    else:
+        df_lookup = pd.DataFrame(columns=['search_title_query'])
+    known_titles = set(df_lookup['search_title_query'].dropna().astype(str))
+    return df_kept, df_lookup, known_titles
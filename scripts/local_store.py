@@ -0,0 +1,270 @@
+# --- local_store.py ---
+# Almacén local embebido (SQLite) que hace de fuente de verdad del pipeline: historial, catálogo de
+# títulos TMDb, títulos fallidos con sus reintentos y tablas derivadas. Las actualizaciones son upserts
+# indexados; exportar a CSV/Parquet es un paso aparte (export_table o `python -m scripts.local_store`).
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+try:
+    from scripts.data_io import ENRICHED_SCHEMA, OUTPUT_FORMATS, write_table
+    from scripts.failures import FAILURE_BACKOFF_DAYS, PERMANENT_FAILURES, backoff_seconds
+    from scripts.incremental import TMDB_COLUMNS
+except ImportError:  # Ejecución directa desde scripts/
+    from data_io import ENRICHED_SCHEMA, OUTPUT_FORMATS, write_table
+    from failures import FAILURE_BACKOFF_DAYS, PERMANENT_FAILURES, backoff_seconds
+    from incremental import TMDB_COLUMNS
+
+# --- Constantes y Parámetros ---
+STORE_SCHEMA_VERSION = 1
+DATE_STORAGE_FORMAT = '%Y-%m-%d'
+INSERT_BATCH_ROWS = 50000
+LOOKUP_BATCH_KEYS = 500  # Por debajo del límite de parámetros de SQLite
+# Tablas base del almacén; cualquier otro nombre válido es una tabla derivada (p. ej. las de Power BI)
+BASE_TABLES = ('history', 'tmdb_titles', 'failed_titles')
+ENRICHED_VIEW = 'enriched_history'
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS history (
+    row_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    title       TEXT NOT NULL,
+    viewed_on   TEXT NOT NULL,
+    title_key   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_title_key ON history (title_key);
+CREATE INDEX IF NOT EXISTS idx_history_viewed_on ON history (viewed_on);
+
+CREATE TABLE IF NOT EXISTS tmdb_titles (
+    search_title_query   TEXT PRIMARY KEY,
+    tmdb_id              INTEGER,
+    tmdb_title           TEXT,
+    tmdb_original_title  TEXT,
+    tmdb_overview        TEXT,
+    tmdb_genres          TEXT,
+    tmdb_popularity      REAL,
+    tmdb_vote_average    REAL,
+    tmdb_vote_count      INTEGER,
+    tmdb_media_type      TEXT,
+    tmdb_release_date    TEXT,
+    tmdb_runtime_minutes INTEGER,
+    updated_at           REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tmdb_titles_tmdb_id ON tmdb_titles (tmdb_id);
+
+CREATE TABLE IF NOT EXISTS failed_titles (
+    title_key     TEXT PRIMARY KEY,
+    reason        TEXT,
+    attempts      INTEGER NOT NULL,
+    first_failed  REAL NOT NULL,
+    last_attempt  REAL NOT NULL
+);
+
+CREATE VIEW IF NOT EXISTS {ENRICHED_VIEW} AS
+SELECT h.title AS Title, h.viewed_on AS Date, h.title_key AS Title_Cleaned_For_API,
+       {', '.join(f't.{col}' for col in TMDB_COLUMNS)}
+FROM history h LEFT JOIN tmdb_titles t ON t.search_title_query = h.title_key
+ORDER BY h.row_id;
+"""
+
+
+def _check_identifier(name):
+    if not _IDENTIFIER.match(name or ''):
+        raise ValueError(f"Nombre de tabla no válido: {name!r}")
+    return name
+
+
+def _to_sql_value(value):
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value.item() if hasattr(value, 'item') else value
+
+
+class LocalStore:
+    """
+    Conexión al almacén SQLite. Un solo escritor (lock), modo WAL para que las lecturas
+    no bloqueen. Las fechas se guardan como texto AAAA-MM-DD (ordenable e indexable).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {STORE_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Historial ---
+    def history_count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def replace_history(self, df_history, since_date=None):
+        """
+        Sustituye el historial desde `since_date` (todo si es None) por las filas de `df_history`
+        (columnas Title, Date y Title_Cleaned_For_API). Las filas anteriores no se tocan.
+        """
+        with self._lock, self._conn:
+            if since_date is None:
+                self._conn.execute("DELETE FROM history")
+            else:
+                self._conn.execute("DELETE FROM history WHERE viewed_on >= ?",
+                                   (pd.Timestamp(since_date).strftime(DATE_STORAGE_FORMAT),))
+            self._insert_history(df_history)
+
+    def append_history(self, df_history):
+        with self._lock, self._conn:
+            self._insert_history(df_history)
+
+    def _insert_history(self, df_history):
+        # Se llama con el lock tomado y dentro de una transacción
+        dates = pd.to_datetime(df_history['Date'], errors='coerce').dt.strftime(DATE_STORAGE_FORMAT)
+        keys = df_history.get('Title_Cleaned_For_API', pd.Series(None, index=df_history.index, dtype=object))
+        rows = zip(df_history['Title'].astype(str), dates, keys.astype(object).where(keys.notna(), None))
+        self._conn.executemany("INSERT INTO history (title, viewed_on, title_key) VALUES (?, ?, ?)", rows)
+
+    # --- Catálogo de títulos TMDb ---
+    def upsert_titles(self, records):
+        """Inserta o actualiza los registros TMDb (uno por search_title_query). Devuelve cuántos se guardaron."""
+        columns = ['search_title_query'] + TMDB_COLUMNS
+        now = time.time()
+        rows = [tuple(_to_sql_value(record.get(col)) for col in columns) + (now,)
+                for record in records if record and record.get('search_title_query')]
+        placeholders = ', '.join('?' * (len(columns) + 1))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO tmdb_titles ({', '.join(columns)}, updated_at) VALUES ({placeholders})", rows)
+            # Un título resuelto deja de estar en la lista de fallidos
+            self._conn.executemany("DELETE FROM failed_titles WHERE title_key = ?", [(row[0],) for row in rows])
+        return len(rows)
+
+    def known_title_keys(self):
+        """Claves de título ya enriquecidas (con tmdb_id); los fallidos no cuentan y pueden volver a buscarse."""
+        return {row[0] for row in self._conn.execute("SELECT search_title_query FROM tmdb_titles WHERE tmdb_id IS NOT NULL")}
+
+    def title_records(self, title_keys=None):
+        """Registros TMDb como diccionarios; con `title_keys`, solo esos (búsqueda por clave primaria)."""
+        columns = ['search_title_query'] + TMDB_COLUMNS
+        query = f"SELECT {', '.join(columns)} FROM tmdb_titles"
+        if title_keys is None:
+            rows = self._conn.execute(query).fetchall()
+        else:
+            title_keys, rows = list(title_keys), []
+            for start in range(0, len(title_keys), LOOKUP_BATCH_KEYS):
+                batch = title_keys[start:start + LOOKUP_BATCH_KEYS]
+                rows += self._conn.execute(f"{query} WHERE search_title_query IN ({', '.join('?' * len(batch))})",
+                                           batch).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    # --- Títulos fallidos ---
+    def record_failures(self, title_keys, reason='no_match'):
+        """
+        Registra (o suma un intento a) cada título que no se pudo enriquecer. `title_keys` puede ser
+        un diccionario {título: motivo}; si no, todos reciben `reason`.
+        """
+        reasons = title_keys if isinstance(title_keys, dict) else dict.fromkeys(title_keys, reason)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO failed_titles (title_key, reason, attempts, first_failed, last_attempt) VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT(title_key) DO UPDATE SET reason = excluded.reason, attempts = attempts + 1, "
+                "last_attempt = excluded.last_attempt",
+                [(key, key_reason, now, now) for key, key_reason in reasons.items()])
+
+    def failures(self):
+        return pd.read_sql_query("SELECT * FROM failed_titles ORDER BY last_attempt, title_key", self._conn)
+
+    def titles_in_backoff(self, base_days=FAILURE_BACKOFF_DAYS, now=None):
+        """Títulos con un fallo permanente cuyo backoff (creciente con los intentos) aún no ha vencido."""
+        if not base_days:
+            return set()
+        now = time.time() if now is None else now
+        rows = self._conn.execute(
+            f"SELECT title_key, attempts, last_attempt FROM failed_titles "
+            f"WHERE reason IN ({', '.join('?' * len(PERMANENT_FAILURES))})", PERMANENT_FAILURES).fetchall()
+        return {key for key, attempts, last_attempt in rows if last_attempt + backoff_seconds(attempts, base_days) > now}
+
+    # --- Vista enriquecida y tablas derivadas ---
+    def load_enriched(self, before=None):
+        """Historial unido al catálogo (mismas columnas que netflix_viewing_enriched); `before` filtra por fecha."""
+        query, params = f"SELECT * FROM {ENRICHED_VIEW}", ()
+        if before is not None:
+            query, params = query + " WHERE Date < ?", (pd.Timestamp(before).strftime(DATE_STORAGE_FORMAT),)
+        df = pd.read_sql_query(query, self._conn, params=params)
+        df['Date'] = pd.to_datetime(df['Date'], format=DATE_STORAGE_FORMAT, errors='coerce')
+        return df
+
+    def split_enriched(self, since_date, include_kept=True):
+        """
+        Equivalente a incremental.split_existing_enriched leyendo del almacén: filas anteriores a
+        `since_date` (vacío con include_kept=False), tabla de búsqueda del catálogo y claves ya enriquecidas.
+        """
+        df_kept = self.load_enriched(before=since_date) if include_kept else pd.DataFrame()
+        known_titles = self.known_title_keys()
+        df_lookup = pd.DataFrame(self.title_records(), columns=['search_title_query'] + TMDB_COLUMNS)
+        return df_kept, df_lookup[df_lookup['tmdb_id'].notna()], known_titles
+
+    def write_derived(self, name, df):
+        """Reemplaza la tabla derivada `name` por el contenido de `df`."""
+        name = _check_identifier(name)
+        if name in BASE_TABLES or name == ENRICHED_VIEW:
+            raise ValueError(f"'{name}' es una tabla base del almacén")
+        with self._lock:
+            df.to_sql(name, self._conn, if_exists='replace', index=False, chunksize=INSERT_BATCH_ROWS)
+            self._conn.commit()
+
+    def read_table(self, name):
+        return pd.read_sql_query(f"SELECT * FROM {_check_identifier(name)}", self._conn)
+
+    def table_names(self):
+        return [row[0] for row in self._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+
+    def export_table(self, name, path, fmt='csv', schema=None):
+        """Exporta una tabla o vista del almacén a CSV/Parquet. Devuelve la ruta escrita."""
+        if name == ENRICHED_VIEW:
+            return write_table(self.load_enriched(), path, fmt, schema=schema or ENRICHED_SCHEMA)
+        return write_table(self.read_table(name), path, fmt, schema=schema)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Consulta y exporta tablas del almacén local.")
+    parser.add_argument('store', help="Ruta del almacén SQLite (p. ej. data/processed/netflix_store.sqlite).")
+    parser.add_argument('table', nargs='?', help=f"Tabla o vista a exportar (p. ej. {ENRICHED_VIEW}). Sin ella, lista las tablas.")
+    parser.add_argument('output', nargs='?', help="Ruta del archivo exportado.")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv')
+    args = parser.parse_args()
+    with LocalStore(args.store) as store:
+        if not args.table:
+            for table in store.table_names():
+                print(table)
+        elif not args.output:
+            parser.error("Indica la ruta del archivo exportado.")
+        else:
+            logging.info(f"Exportada '{args.table}' a {store.export_table(args.table, args.output, args.format)}")
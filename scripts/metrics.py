@@ -0,0 +1,159 @@
+# --- metrics.py ---
+# Instrumentación de las ejecuciones: duración y filas/segundo por etapa, latencias de la API,
+# reintentos, tasa de acierto de la caché y memoria máxima (RSS), con informe JSON y perfil cProfile opcional
+
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, no se mide la memoria máxima
+    resource = None
+
+# Límites superiores (ms) de los cubos del histograma de latencias de la API
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def peak_rss_mb():
+    """Memoria residente máxima del proceso en MB, o None si la plataforma no la expone."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la da en KB y macOS en bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """
+    Acumula las métricas de una ejecución. Es segura entre hilos para que el
+    enriquecimiento concurrente pueda registrar latencias y reintentos.
+    """
+
+    def __init__(self, run_name):
+        self.run_name = run_name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.cache = None
+        self._latencies = {}
+        self._retries = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Mide la duración de un bloque. El dict devuelto permite fijar las filas
+        cuando solo se conocen dentro del bloque: `info['rows'] = len(df)`.
+        """
+        info = {'rows': rows}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            seconds = time.perf_counter() - start
+            rows = info.get('rows')
+            self.stages[name] = {
+                'seconds': round(seconds, 4),
+                'rows': rows,
+                'rows_per_second': round(rows / seconds, 1) if rows and seconds > 0 else None,
+                'peak_rss_mb': peak_rss_mb(),
+            }
+            logging.debug(f"Etapa '{name}': {seconds:.3f} s" + (f" ({rows} filas)" if rows is not None else ""))
+
+    def record_api_call(self, endpoint, seconds):
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(seconds)
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self._retries[endpoint] = self._retries.get(endpoint, 0) + 1
+
+    def record_error(self, endpoint):
+        with self._lock:
+            self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def set_cache_stats(self, stats):
+        self.cache = dict(stats)
+
+    def update_counters(self, counters):
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def api_summary(self):
+        summary = {}
+        with self._lock:
+            endpoints = set(self._latencies) | set(self._retries) | set(self._errors)
+            for endpoint in sorted(endpoints):
+                values_ms = sorted(s * 1000 for s in self._latencies.get(endpoint, []))
+                histogram = {f"<={limit}ms": 0 for limit in LATENCY_BUCKETS_MS}
+                histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] = 0
+                for value in values_ms:
+                    limit = next((b for b in LATENCY_BUCKETS_MS if value <= b), None)
+                    histogram[f"<={limit}ms" if limit is not None else f">{LATENCY_BUCKETS_MS[-1]}ms"] += 1
+                summary[endpoint] = {
+                    'calls': len(values_ms),
+                    'retries': self._retries.get(endpoint, 0),
+                    'errors': self._errors.get(endpoint, 0),
+                    'mean_ms': round(sum(values_ms) / len(values_ms), 1) if values_ms else None,
+                    'p50_ms': round(_percentile(values_ms, 0.50), 1) if values_ms else None,
+                    'p95_ms': round(_percentile(values_ms, 0.95), 1) if values_ms else None,
+                    'max_ms': round(values_ms[-1], 1) if values_ms else None,
+                    'histogram': histogram,
+                }
+        return summary
+
+    def report(self):
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': self.stages,
+            'api': self.api_summary(),
+            'cache': self.cache,
+            'counters': self.counters,
+        }
+
+    def write_report(self, path):
+        report = self.report()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        logging.info(f"Informe de métricas ({report['total_seconds']:.1f} s en total) guardado en: {path}")
+        return report
+
+
+@contextmanager
+def profiled(path=None):
+    """Si `path` no es None, perfila el bloque con cProfile y vuelca las estadísticas (pstats) en `path`."""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+        logging.info(f"Perfil cProfile guardado en: {path} (ver con: python -m pstats {path})")
@@ -6,10 +6,27 @@ import os
 import numpy as np
 from datetime import datetime
 import logging
-
-# Configuración de logging
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+import argparse
+try:
+    from scripts.data_io import OUTPUT_FORMATS, POWERBI_SCHEMA, check_format_available, find_existing_table, read_table, write_table
+    from scripts.metrics import RunMetrics, profiled
+    from scripts.cubo_agregados import (construir_cubo, derivar_generos_populares, derivar_promedio_calidad_tipo,
+                                        derivar_resumen_calidad_tipo)
+    from scripts.esquema_estrella import construir_esquema_estrella
+    from scripts.local_store import LocalStore
+    from scripts.simulacion import SEMILLA_SIMULACION, crear_generador, simular_datos_tmdb, simular_tiempo_visto
+    from scripts.cli import setup_entry_point
+    from scripts.date_normalization import DateNormalizer
+except ImportError:  # Ejecución directa: python scripts/powerbi_prep.py
+    from data_io import OUTPUT_FORMATS, POWERBI_SCHEMA, check_format_available, find_existing_table, read_table, write_table
+    from metrics import RunMetrics, profiled
+    from cubo_agregados import (construir_cubo, derivar_generos_populares, derivar_promedio_calidad_tipo,
+                                derivar_resumen_calidad_tipo)
+    from esquema_estrella import construir_esquema_estrella
+    from local_store import LocalStore
+    from simulacion import SEMILLA_SIMULACION, crear_generador, simular_datos_tmdb, simular_tiempo_visto
+    from cli import setup_entry_point
+    from date_normalization import DateNormalizer
 
 # Rutas de Archivos
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,92 +39,84 @@ CALIDAD_TIPO_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'promedio_ca
 RESUMEN_CALIDAD_TIPO_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'resumen_calidad_tipo.csv')
 GENEROS_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'netflix_analisis_generos.csv')
 GENEROS_POPULARES_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'generos_populares.csv')
+CUBO_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'cubo_agregados.csv')
+ESTRELLA_DIR = os.path.join(PROJECT_ROOT, 'data', 'processed', 'estrella')
+METRICAS_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'powerbi_metrics.json')
+# Almacén local que mantiene run_etl.py (mismo archivo que run_etl.STORE_PATH)
+ALMACEN_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'netflix_store.sqlite')
+
+# Modelos de exportación: tabla ancha (netflix_eda_processed), esquema en estrella (ESTRELLA_DIR) o ambos
+MODELOS_EXPORTACION = ('plano', 'estrella', 'ambos')
 
-def preparar_datos_para_powerbi():
+# Columnas que acompañan a cada género en netflix_analisis_generos.csv
+COLUMNAS_ANALISIS_GENEROS = ['Popularidad_TMDb', 'Calificacion_Promedio_TMDb', 'Tipo_Medio',
+                             'Fecha_Visualizacion', 'Anio', 'Titulo_TMDb']
+
+def abrir_almacen():
+    """Abre el almacén local si ya existe (lo crea el ETL); None si no hay o no se puede abrir."""
+    if not os.path.exists(ALMACEN_PATH):
+        return None
+    try:
+        return LocalStore(ALMACEN_PATH)
+    except Exception as e:
+        logging.warning(f"No se pudo abrir el almacén local {ALMACEN_PATH}: {e}")
+        return None
+
+def guardar_salida(df, ruta, formato_salida, almacen=None, exportar=True):
     """
-    Prepara los datos enriquecidos para su uso en Power BI
-    generando los archivos necesarios para los diferentes análisis
+    Guarda una tabla de salida: en el almacén como tabla derivada (con el nombre del archivo)
+    y, si exportar, como archivo CSV/Parquet. Devuelve la ruta del archivo o None.
     """
-    logging.info("Iniciando preparación de datos para Power BI...")
-    
-    # Verificar si existe el archivo de datos enriquecidos
-    if not os.path.exists(ENRICHED_DATA_PATH):
-        logging.error(f"No se encontró el archivo de datos enriquecidos: {ENRICHED_DATA_PATH}")
-        logging.info("Intentando usar el archivo de ejemplo...")
-        
-        # Cargar datos de ejemplo de Netflix (si el archivo real no existe)
-        raw_data_path = os.path.join(PROJECT_ROOT, 'data', 'raw', 'NetflixViewingHistory.csv')
-        if not os.path.exists(raw_data_path):
-            logging.error(f"No se encontró ni el archivo enriquecido ni el de historial: {raw_data_path}")
-            return
-        
-        df = pd.read_csv(raw_data_path)
-        logging.info(f"Cargado archivo de historial con {len(df)} registros")
-        
-        # Crear datos simulados para el análisis
-        df.rename(columns={'Title': 'Titulo_Original_Netflix', 'Date': 'Fecha_Visualizacion'}, inplace=True)
-        df['Fecha_Visualizacion'] = pd.to_datetime(df['Fecha_Visualizacion'], errors='coerce')
-        df['Titulo_Limpio_Busqueda'] = df['Titulo_Original_Netflix'].str.split(':', n=1).str[0]
-        
-        # Simular datos de TMDb
-        df['ID_TMDb'] = np.random.randint(1000, 10000, size=len(df))
-        df['Titulo_TMDb'] = df['Titulo_Limpio_Busqueda']
-        
-        # Géneros aleatorios
-        generos = ['Drama', 'Comedy', 'Action', 'Thriller', 'Romance', 'Sci-Fi', 'Horror', 'Documentary']
-        df['Generos_TMDb'] = [', '.join(np.random.choice(generos, size=np.random.randint(1, 3))) for _ in range(len(df))]
-        
-        # Métricas simuladas
-        df['Popularidad_TMDb'] = np.random.uniform(10, 100, size=len(df))
-        df['Calificacion_Promedio_TMDb'] = np.random.uniform(5, 9, size=len(df))
-        df['Cantidad_Votos_TMDb'] = np.random.randint(100, 20000, size=len(df))
-        
-        # Tipo de medio (70% series, 30% películas)
-        df['Tipo_Medio_TMDb'] = np.random.choice(['tv', 'movie'], size=len(df), p=[0.7, 0.3])
-        
-        # Fecha de estreno simulada
-        df['Fecha_Estreno_TMDb'] = pd.to_datetime('2015-01-01') + pd.to_timedelta(np.random.randint(0, 365*5, size=len(df)), unit='D')
-        
-        # Duración simulada
-        df['Duracion_Minutos_TMDb'] = df['Tipo_Medio_TMDb'].apply(
-            lambda x: np.random.randint(20, 60) if x == 'tv' else np.random.randint(80, 180)
-        )
-    else:
-        # Cargar datos enriquecidos reales
-        logging.info(f"Cargando datos enriquecidos desde: {ENRICHED_DATA_PATH}")
-        try:
-            df = pd.read_csv(ENRICHED_DATA_PATH)
-            
-            # Renombrar columnas si es necesario
-            rename_cols = {
-                'tmdb_id': 'ID_TMDb',
-                'tmdb_title': 'Titulo_TMDb',
-                'tmdb_genres': 'Generos_TMDb',
-                'tmdb_popularity': 'Popularidad_TMDb',
-                'tmdb_vote_average': 'Calificacion_Promedio_TMDb',
-                'tmdb_vote_count': 'Cantidad_Votos_TMDb',
-                'tmdb_media_type': 'Tipo_Medio_TMDb',
-                'tmdb_release_date': 'Fecha_Estreno_TMDb',
-                'tmdb_runtime_minutes': 'Duracion_Minutos_TMDb'
-            }
-            
-            # Aplicar renombrado solo para columnas que existen
-            rename_dict = {old: new for old, new in rename_cols.items() if old in df.columns}
-            if rename_dict:
-                df.rename(columns=rename_dict, inplace=True)
-            
-            logging.info(f"Datos enriquecidos cargados con {len(df)} registros")
-        except Exception as e:
-            logging.error(f"Error al cargar datos enriquecidos: {e}")
-            return
-    
-    # Procesamiento de datos para Power BI
-    logging.info("Procesando datos para análisis...")
+    if almacen is not None:
+        almacen.write_derived(os.path.splitext(os.path.basename(ruta))[0], df)
+    if exportar:
+        return write_table(df, ruta, formato_salida, schema=POWERBI_SCHEMA)
+    return None
+
+def explotar_generos(df):
+    """
+    Genera una fila por cada género de cada visualización (vectorizado con split/explode).
+    Las filas sin géneros y los géneros vacíos o 'Sin género' se descartan.
+    """
+    df = df.reset_index(drop=True)
+    generos = df['Generos_TMDb'].dropna().astype(str).str.split(',').explode().str.strip()
+    generos = generos[(generos != '') & (generos != 'Sin género')]
+    df_generos = df.reindex(columns=COLUMNAS_ANALISIS_GENEROS).loc[generos.index]
+    df_generos.insert(0, 'Genero', generos.to_numpy())
+    return df_generos.reset_index(drop=True)
+
+def renombrar_columnas_tmdb(df):
+    # Renombrar columnas si es necesario
+    rename_cols = {
+        'Title': 'Titulo_Original_Netflix',
+        'Date': 'Fecha_Visualizacion',
+        'Title_Cleaned_For_API': 'Titulo_Limpio_Busqueda',
+        'tmdb_id': 'ID_TMDb',
+        'tmdb_title': 'Titulo_TMDb',
+        'tmdb_genres': 'Generos_TMDb',
+        'tmdb_popularity': 'Popularidad_TMDb',
+        'tmdb_vote_average': 'Calificacion_Promedio_TMDb',
+        'tmdb_vote_count': 'Cantidad_Votos_TMDb',
+        'tmdb_media_type': 'Tipo_Medio_TMDb',
+        'tmdb_release_date': 'Fecha_Estreno_TMDb',
+        'tmdb_runtime_minutes': 'Duracion_Minutos_TMDb'
+    }
     
-    # Asegurarse que las fechas están en formato correcto
+    # Aplicar renombrado solo para columnas que existen
+    rename_dict = {old: new for old, new in rename_cols.items() if old in df.columns}
+    if rename_dict:
+        df.rename(columns=rename_dict, inplace=True)
+    return df
+
+def transformar_para_powerbi(df, rng=None):
+    """
+    Añade las columnas derivadas (fechas, calidad, tipo, tiempo visto) que usa el dashboard.
+    rng: numpy.random.Generator para simular el tiempo visto (por defecto, con SEMILLA_SIMULACION)
+    """
+    # Las fechas ya tipadas (Parquet, almacén) se dejan tal cual; las de texto se parsean por valores distintos
     for col in ['Fecha_Visualizacion', 'Fecha_Estreno_TMDb']:
         if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
+            df[col] = DateNormalizer().parse(df[col])
     
     # Convertir valores numéricos
     numeric_cols = ['Popularidad_TMDb', 'Calificacion_Promedio_TMDb', 
@@ -165,81 +174,196 @@ def preparar_datos_para_powerbi():
     
     # Simular tiempo de visualización si no existe
     if 'Duracion_Minutos_TMDb' in df.columns and 'Tiempo_Visualizacion' not in df.columns:
-        import random
+        df['Tiempo_Visualizacion'] = simular_tiempo_visto(df['Duracion_Minutos_TMDb'], df.get('Tipo_Medio_TMDb'), rng)
+    
+    return df
+
+def preparar_datos_para_powerbi(formato_salida='csv', ruta_metricas=None, ruta_perfil=None, semilla=SEMILLA_SIMULACION,
+                                modelo='plano', usar_almacen=True, exportar=True):
+    """
+    Prepara los datos enriquecidos para su uso en Power BI
+    generando los archivos necesarios para los diferentes análisis.
+    formato_salida: 'csv' o 'parquet' (tipos explícitos, requiere pyarrow)
+    ruta_metricas: informe JSON con la duración de cada etapa (por defecto METRICAS_PATH; '' para no generarlo)
+    ruta_perfil: si se indica, guarda un perfil cProfile de la ejecución
+    semilla: semilla de las columnas simuladas (misma semilla, mismos archivos)
+    modelo: 'plano' (tabla ancha), 'estrella' (hechos + dimensiones en ESTRELLA_DIR) o 'ambos'
+    usar_almacen: leer del almacén local (ALMACEN_PATH) si existe y guardar en él las tablas derivadas
+    exportar: escribir además las tablas como archivos (False: solo almacén)
+    """
+    if ruta_metricas is None:
+        ruta_metricas = METRICAS_PATH
+    metricas = RunMetrics('powerbi_prep')
+    almacen = abrir_almacen() if usar_almacen else None
+    try:
+        with profiled(ruta_perfil):
+            _preparar_datos_para_powerbi(metricas, formato_salida, semilla, modelo, almacen, exportar)
+    finally:
+        if almacen is not None:
+            almacen.close()
+        if ruta_metricas:
+            try:
+                metricas.write_report(ruta_metricas)
+            except Exception as e:
+                logging.warning(f"No se pudo guardar el informe de métricas: {e}")
+
+def _preparar_datos_para_powerbi(metricas, formato_salida, semilla, modelo, almacen=None, exportar=True):
+    logging.info("Iniciando preparación de datos para Power BI...")
+    rng = crear_generador(semilla)
+    try:
+        check_format_available(formato_salida)
+    except ImportError as e:
+        logging.error(str(e))
+        return
+    if modelo not in MODELOS_EXPORTACION:
+        logging.error(f"Modelo de exportación no soportado: {modelo} (opciones: {', '.join(MODELOS_EXPORTACION)})")
+        return
+    if almacen is None and not exportar:
+        logging.error(f"Sin almacén local ({ALMACEN_PATH}) ni exportación las tablas no se guardarían en ningún sitio.")
+        return
+    
+    # Origen de los datos: almacén local, archivo enriquecido (CSV o Parquet) o historial de ejemplo
+    ruta_enriquecida = find_existing_table(ENRICHED_DATA_PATH)
+    if almacen is not None and almacen.history_count() > 0:
+        # El almacén es la fuente de verdad del ETL: historial unido al catálogo TMDb
+        logging.info(f"Cargando datos enriquecidos desde el almacén local: {ALMACEN_PATH}")
+        try:
+            with metricas.stage('carga') as etapa:
+                df = renombrar_columnas_tmdb(almacen.load_enriched())
+                etapa['rows'] = len(df)
+            logging.info(f"Datos enriquecidos cargados con {len(df)} registros")
+        except Exception as e:
+            logging.error(f"Error al cargar datos del almacén local: {e}")
+            return
+    elif ruta_enriquecida is None:
+        logging.error(f"No se encontró el archivo de datos enriquecidos: {ENRICHED_DATA_PATH}")
+        logging.info("Intentando usar el archivo de ejemplo...")
         
-        def estimar_tiempo_visto(row):
-            if pd.isna(row['Duracion_Minutos_TMDb']) or row['Duracion_Minutos_TMDb'] == 0:
-                return None
-                
-            if row.get('Tipo_Medio_TMDb') == 'movie':
-                # Para películas, asumimos entre 70-100% de visualización
-                return round(row['Duracion_Minutos_TMDb'] * random.uniform(0.7, 1.0))
-            else:
-                # Para series, asumimos entre 80-100% de visualización de un episodio
-                return round(row['Duracion_Minutos_TMDb'] * random.uniform(0.8, 1.0))
+        # Cargar datos de ejemplo de Netflix (si el archivo real no existe)
+        raw_data_path = os.path.join(PROJECT_ROOT, 'data', 'raw', 'NetflixViewingHistory.csv')
+        if not os.path.exists(raw_data_path):
+            logging.error(f"No se encontró ni el archivo enriquecido ni el de historial: {raw_data_path}")
+            return
+        
+        with metricas.stage('carga') as etapa:
+            df = pd.read_csv(raw_data_path)
+            etapa['rows'] = len(df)
+        logging.info(f"Cargado archivo de historial con {len(df)} registros")
         
-        df['Tiempo_Visualizacion'] = df.apply(estimar_tiempo_visto, axis=1)
+        # Crear datos simulados para el análisis
+        df.rename(columns={'Title': 'Titulo_Original_Netflix', 'Date': 'Fecha_Visualizacion'}, inplace=True)
+        df['Fecha_Visualizacion'] = DateNormalizer().parse(df['Fecha_Visualizacion'])
+        df['Titulo_Limpio_Busqueda'] = df['Titulo_Original_Netflix'].str.split(':', n=1).str[0]
+        
+        # Simular datos de TMDb
+        simular_datos_tmdb(df, rng)
+    else:
+        # Cargar datos enriquecidos reales
+        logging.info(f"Cargando datos enriquecidos desde: {ruta_enriquecida}")
+        try:
+            with metricas.stage('carga') as etapa:
+                df = read_table(ruta_enriquecida)
+                etapa['rows'] = len(df)
+            
+            df = renombrar_columnas_tmdb(df)
+            
+            logging.info(f"Datos enriquecidos cargados con {len(df)} registros")
+        except Exception as e:
+            logging.error(f"Error al cargar datos enriquecidos: {e}")
+            return
+    
+    # Procesamiento de datos para Power BI
+    logging.info("Procesando datos para análisis...")
+    
+    with metricas.stage('transformacion', rows=len(df)):
+        df = transformar_para_powerbi(df, rng)
     
     # Guardar el DataFrame principal procesado
-    logging.info(f"Guardando datos procesados en: {PROCESSED_DATA_PATH}")
-    try:
-        df.to_csv(PROCESSED_DATA_PATH, index=False)
-        logging.info(f"Datos guardados exitosamente con {len(df)} filas y {len(df.columns)} columnas")
-    except Exception as e:
-        logging.error(f"Error al guardar los datos procesados: {e}")
-        return
+    if modelo in ('plano', 'ambos'):
+        logging.info(f"Guardando datos procesados ({formato_salida}) junto a: {PROCESSED_DATA_PATH}")
+        try:
+            with metricas.stage('guardado_principal', rows=len(df)):
+                ruta_guardada = guardar_salida(df, PROCESSED_DATA_PATH, formato_salida, almacen, exportar)
+            logging.info(f"Datos guardados exitosamente en {ruta_guardada or ALMACEN_PATH} con {len(df)} filas y {len(df.columns)} columnas")
+        except Exception as e:
+            logging.error(f"Error al guardar los datos procesados: {e}")
+            return
+    
+    # Esquema en estrella: hechos estrechos + dimensiones, cada una en su propio archivo
+    if modelo in ('estrella', 'ambos'):
+        logging.info(f"Guardando esquema en estrella ({formato_salida}) en: {ESTRELLA_DIR}")
+        try:
+            with metricas.stage('esquema_estrella', rows=len(df)):
+                if exportar: os.makedirs(ESTRELLA_DIR, exist_ok=True)
+                for nombre, tabla in construir_esquema_estrella(df).items():
+                    guardar_salida(tabla, os.path.join(ESTRELLA_DIR, f'{nombre}.csv'), formato_salida, almacen, exportar)
+                    logging.info(f"  {nombre}: {len(tabla)} filas, {len(tabla.columns)} columnas")
+        except Exception as e:
+            logging.error(f"Error al guardar el esquema en estrella: {e}")
+            return
+    
+    # Cubo de agregados: una sola agrupación sobre todas las filas; las tablas resumen se derivan de él
+    logging.info("Generando cubo de agregados...")
+    with metricas.stage('cubo_agregados', rows=len(df)) as etapa:
+        cubo = construir_cubo(df)
+        guardar_salida(cubo, CUBO_PATH, formato_salida, almacen, exportar)
+        etapa['rows'] = len(cubo)
+    logging.info(f"Cubo de agregados con {len(cubo)} celdas")
     
     # Generar DataFrames adicionales para análisis específicos
     
     # 1. Crear DataFrame para análisis de calidad
     if all(col in df.columns for col in ['Tipo_Medio', 'Calidad', 'Calificacion_Promedio_TMDb']):
         logging.info("Generando archivo de promedio de calidad por tipo...")
-        promedio_calidad_tipo = df.groupby('Tipo_Medio_TMDb')['Calificacion_Promedio_TMDb'].mean().reset_index()
-        promedio_calidad_tipo.to_csv(CALIDAD_TIPO_PATH, index=False)
+        with metricas.stage('promedio_calidad_tipo', rows=len(cubo)):
+            promedio_calidad_tipo = derivar_promedio_calidad_tipo(cubo)
+            guardar_salida(promedio_calidad_tipo, CALIDAD_TIPO_PATH, formato_salida, almacen, exportar)
         
         logging.info("Generando archivo de resumen de calidad por tipo...")
-        resumen_calidad_tipo = df.groupby(['Tipo_Medio_TMDb', 'Calidad']).size().reset_index(name='Conteo')
-        resumen_calidad_tipo.to_csv(RESUMEN_CALIDAD_TIPO_PATH, index=False)
+        with metricas.stage('resumen_calidad_tipo', rows=len(cubo)):
+            resumen_calidad_tipo = derivar_resumen_calidad_tipo(cubo)
+            guardar_salida(resumen_calidad_tipo, RESUMEN_CALIDAD_TIPO_PATH, formato_salida, almacen, exportar)
     
     # 2. Crear DataFrame para análisis de géneros
     if 'Generos_TMDb' in df.columns:
         logging.info("Generando archivos de análisis de géneros...")
         
         # Explotar la columna de géneros para crear una fila por género
-        generos_dfs = []
-        
-        for idx, row in df.iterrows():
-            generos = [g.strip() for g in str(row.get('Generos_TMDb', '')).split(',')] if pd.notna(row.get('Generos_TMDb', '')) else ['Sin género']
-            
-            for genero in generos:
-                if genero and genero != 'Sin género':
-                    genero_row = {
-                        'Genero': genero,
-                        'Popularidad_TMDb': row.get('Popularidad_TMDb'),
-                        'Calificacion_Promedio_TMDb': row.get('Calificacion_Promedio_TMDb'),
-                        'Tipo_Medio': row.get('Tipo_Medio'),
-                        'Fecha_Visualizacion': row.get('Fecha_Visualizacion'),
-                        'Anio': row.get('Anio'),
-                        'Titulo_TMDb': row.get('Titulo_TMDb')
-                    }
-                    generos_dfs.append(pd.DataFrame([genero_row]))
+        with metricas.stage('generos_explotados', rows=len(df)) as etapa:
+            df_generos = explotar_generos(df)
+            if not df_generos.empty:
+                guardar_salida(df_generos, GENEROS_PATH, formato_salida, almacen, exportar)
+            etapa['rows'] = len(df_generos)
         
-        if generos_dfs:
-            df_generos = pd.concat(generos_dfs, ignore_index=True)
-            df_generos.to_csv(GENEROS_PATH, index=False)
-            
+        if not df_generos.empty:
             # Generar análisis de géneros populares
-            generos_populares = df_generos.groupby('Genero').agg({
-                'Popularidad_TMDb': 'mean',
-                'Calificacion_Promedio_TMDb': 'mean',
-                'Genero': 'count'
-            }).rename(columns={'Genero': 'Conteo'}).sort_values('Conteo', ascending=False).reset_index()
-            
-            generos_populares.to_csv(GENEROS_POPULARES_PATH, index=False)
+            with metricas.stage('generos_populares', rows=len(cubo)):
+                generos_populares = derivar_generos_populares(cubo)
+                guardar_salida(generos_populares, GENEROS_POPULARES_PATH, formato_salida, almacen, exportar)
             
             logging.info(f"Generados {len(df_generos)} registros para análisis de géneros")
     
     logging.info("Preparación de datos para Power BI completada exitosamente")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepara los datos enriquecidos para Power BI.")
+    parser.add_argument('--formato', choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de los archivos generados (parquet guarda tipos explícitos y necesita pyarrow).")
+    parser.add_argument('--metricas', default=None, help="Ruta del informe JSON de métricas por etapa.")
+    parser.add_argument('--perfil', default=None, help="Guardar un perfil cProfile de la ejecución en esta ruta (.prof).")
+    parser.add_argument('--semilla', type=int, default=SEMILLA_SIMULACION,
+                        help="Semilla de las columnas simuladas (tiempo visto y datos de demostración).")
+    parser.add_argument('--modelo', choices=MODELOS_EXPORTACION, default='plano',
+                        help="'plano': tabla ancha; 'estrella': tabla de hechos y dimensiones en data/processed/estrella/; 'ambos'.")
+    parser.add_argument('--sin-almacen', action='store_true',
+                        help="No leer ni escribir el almacén local (data/processed/netflix_store.sqlite).")
+    parser.add_argument('--sin-exportar', action='store_true',
+                        help="Guardar las tablas solo en el almacén local, sin reescribir los archivos.")
+    args = parser.parse_args(argv)
+    preparar_datos_para_powerbi(formato_salida=args.formato, ruta_metricas=args.metricas, ruta_perfil=args.perfil,
+                                semilla=args.semilla, modelo=args.modelo, usar_almacen=not args.sin_almacen,
+                                exportar=not args.sin_exportar)
+
 if __name__ == "__main__":
-    preparar_datos_para_powerbi()
+    setup_entry_point()
+    main()
@@ -1,24 +1,44 @@
 # --- run_etl.py ---
+# Importar este módulo solo carga la biblioteca estándar y los ayudantes ligeros: pandas, requests y los
+# módulos que dependen de ellos se importan dentro de las funciones que los usan (`cli.py etl --help`,
+# batch_etl o powerbi_prep no pagan su carga hasta que de verdad se ejecuta el ETL).
 
-import pandas as pd
 import os
 import logging
 import time
-from dotenv import load_dotenv
-from tmdbv3api import TMDb, Search, Movie, TV # Para la parte principal del ETL
-import requests # Para la prueba directa y tmdbv3api la usa internamente
-import requests.exceptions
+import argparse
+from collections import Counter
+try:
+    from scripts.tmdb_cache import TMDbCache, CACHE_MISS
+    from scripts.enrichment import TokenBucket, enrich_titles_concurrently
+    from scripts.checkpoint import EnrichmentJournal, load_journal, open_atomic
+    from scripts.metrics import RunMetrics, profiled
+    from scripts.title_index import FUZZY_MATCH_THRESHOLD, TitleIndex
+    from scripts.cli import setup_entry_point
+    from scripts.tmdb_snapshot import TMDbSnapshot
+    from scripts.failures import (FAILURE_BACKOFF, FAILURE_BACKOFF_DAYS, FAILURE_ERROR, FAILURE_NETWORK, FAILURE_NO_DETAILS,
+                                  FAILURE_NO_MATCH, FAILURE_NO_MOVIE_TV, FAILURE_NOT_IN_SNAPSHOT, FAILURE_TYPE_ERROR,
+                                  FAILURE_AUTH, FAILURE_CACHED_NO_MATCH, RETRY_SKIP_MIN_TITLES, TRANSIENT_FAILURES,
+                                  UNATTEMPTED_FAILURES, FailureLog, request_failure_reason)
+except ImportError:  # Ejecución directa: python scripts/run_etl.py
+    from tmdb_cache import TMDbCache, CACHE_MISS
+    from enrichment import TokenBucket, enrich_titles_concurrently
+    from checkpoint import EnrichmentJournal, load_journal, open_atomic
+    from metrics import RunMetrics, profiled
+    from title_index import FUZZY_MATCH_THRESHOLD, TitleIndex
+    from cli import setup_entry_point
+    from tmdb_snapshot import TMDbSnapshot
+    from failures import (FAILURE_BACKOFF, FAILURE_BACKOFF_DAYS, FAILURE_ERROR, FAILURE_NETWORK, FAILURE_NO_DETAILS,
+                          FAILURE_NO_MATCH, FAILURE_NO_MOVIE_TV, FAILURE_NOT_IN_SNAPSHOT, FAILURE_TYPE_ERROR,
+                          FAILURE_AUTH, FAILURE_CACHED_NO_MATCH, RETRY_SKIP_MIN_TITLES, TRANSIENT_FAILURES,
+                          UNATTEMPTED_FAILURES, FailureLog, request_failure_reason)
 
-# --- Configuración General ---
-load_dotenv()
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(levelname)s - [%(funcName)s:%(lineno)d] - %(message)s')
+# Importar el módulo no configura logging ni carga .env: lo hace el punto de entrada (cli.py o __main__)
 
 # --- Constantes y Parámetros ---
 EXPECTED_DATE_FORMAT = '%m/%d/%y'  # <-- ¡¡AJUSTA ESTE FORMATO!!
-MAX_RETRIES = 3
-RETRY_DELAY_SECONDS = 5
 API_CALL_DELAY_SECONDS = 0.2
+ENRICHMENT_WORKERS = 1  # >1 activa el enriquecimiento concurrente con limitador compartido
 
 # --- Rutas de Archivos (Basado en la ubicación de este archivo) ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -26,99 +46,654 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 RAW_DATA_PATH = os.path.join(PROJECT_ROOT, 'data', 'raw', 'NetflixViewingHistory.csv')
 PROCESSED_DATA_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'netflix_viewing_enriched.csv')
 FAILED_TITLES_LOG_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'failed_api_titles.log')
+TMDB_CACHE_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'tmdb_cache.sqlite')
+WATERMARK_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'etl_watermark.json')
+JOURNAL_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'enrichment_journal.jsonl')
+METRICS_REPORT_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'etl_metrics.json')
+STORE_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'netflix_store.sqlite')
 
 # === Función para Limpiar Nombres ===
 def clean_netflix_title(raw_title):
+    # Versión para un solo título; el ETL usa map_canonical_titles sobre la columna completa
     if not isinstance(raw_title, str):
         return ""
-    parts = raw_title.split(':', 1)
-    cleaned_title = parts[0].strip()
-    return cleaned_title
+    try:
+        from scripts.title_normalization import canonical_title_keys
+    except ImportError:
+        from title_normalization import canonical_title_keys
+    return canonical_title_keys([raw_title]).iloc[0]
+
+# --- Funciones Auxiliares para API (cliente TMDb propio, ver tmdb_client.py) ---
+# Los reintentos con backoff y Retry-After los hace el cliente; aquí un RequestException ya es definitivo.
+# Un HTTPError 4xx no es un problema de red: se clasifica aparte (request_failure_reason) y no se reintenta.
+# Si el cliente tiene limitador propio (TMDb.rate_limiter), cada intento HTTP ya consume su token allí.
+def client_rate_limiter(tmdb_api):
+    return getattr(getattr(tmdb_api, 'tmdb', None), 'rate_limiter', None)
+
+def resolve_tmdb_match(title_to_search, tmdb_search_api, cache=None, rate_limiter=None, run_metrics=None, failures=None):
+    # Fase 1: título -> (media_type, id) con Search().multi. Las "sin coincidencia" se guardan en caché.
+    # Con `failures` (FailureLog) se anota el motivo de cada fallo bajo el título.
+    import requests
+    query_title = title_to_search.strip()
+    def failed(reason):
+        if failures is not None: failures.record(title_to_search, reason)
+        return None
+    try:
+        logging.debug("Búsqueda TMDb para '%s'", query_title)
+        if rate_limiter is not None and client_rate_limiter(tmdb_search_api) is None: rate_limiter.acquire()
+        call_started = time.perf_counter()
+        search_results = tmdb_search_api.multi({'query': query_title, 'language': 'es-ES'})
+        if run_metrics is not None: run_metrics.record_api_call('search/multi', time.perf_counter() - call_started)
+        if rate_limiter is None: time.sleep(API_CALL_DELAY_SECONDS)
+
+        if not search_results:
+            logging.info("No se encontró coincidencia relevante para '%s' en TMDb (búsqueda vacía).", query_title)
+            if cache is not None: cache.set(query_title, None)
+            return failed(FAILURE_NO_MATCH)
+        best_result = None
+        for res in search_results:
+            if hasattr(res, 'media_type') and res.media_type in ['movie', 'tv']:
+                best_result = res
+                break
+        if not best_result:
+            logging.info("No se encontró coincidencia 'movie' o 'tv' para '%s'.", query_title)
+            if cache is not None: cache.set(query_title, None)
+            return failed(FAILURE_NO_MOVIE_TV)
+
+        media_type = best_result.media_type
+        item_id = best_result.id
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            tmdb_api_title = best_result.title if media_type == 'movie' else best_result.name
+            logging.debug("Encontrado ID %s (%s) para '%s' como '%s'.", item_id, media_type, query_title, tmdb_api_title)
+        return media_type, item_id
+    except IndexError:
+        logging.warning("No se encontró coincidencia relevante (IndexError en resultados) para '%s'.", query_title)
+        if cache is not None: cache.set(query_title, None)
+        return failed(FAILURE_NO_MATCH)
+    except requests.exceptions.RequestException as e:
+        reason = request_failure_reason(e)
+        if reason == FAILURE_NETWORK:
+            logging.error("[ERROR API TMDb] Problema de red/conexión para '%s' (reintentos agotados): %s", query_title, e)
+        else:
+            logging.error("[ERROR API TMDb] TMDb rechazó la búsqueda de '%s' (%s): %s", query_title, reason, e)
+        return failed(reason)
+    except Exception as e:
+        logging.error("[ERROR Inesperado TMDb] en resolve_tmdb_match para '%s': %s", query_title, e)
+        return failed(FAILURE_TYPE_ERROR if isinstance(e, TypeError) else FAILURE_ERROR)
+
+def tmdb_record_from_details(details, media_type, item_id):
+    # Respuesta de detalles de TMDb (objeto o dict, de la API o de la instantánea) -> registro normalizado
+    details_dict = vars(details) if not isinstance(details, dict) else details
+    genres_list = details_dict.get('genres', [])
+    genres_str = ', '.join([genre['name'] if isinstance(genre, dict) else genre for genre in genres_list]) if genres_list else None
+    runtime_minutes = 0
+    if media_type == 'movie':
+        runtime_minutes = details_dict.get('runtime', 0)
+    elif media_type == 'tv':
+        episode_run_time = details_dict.get('episode_run_time', [])
+        if episode_run_time: runtime_minutes = episode_run_time[0]
+    return {
+        'tmdb_id': item_id,
+        'tmdb_title': details_dict.get('title') or details_dict.get('name'),
+        'tmdb_original_title': details_dict.get('original_title') or details_dict.get('original_name'),
+        'tmdb_overview': details_dict.get('overview'), 'tmdb_genres': genres_str,
+        'tmdb_popularity': details_dict.get('popularity'),
+        'tmdb_vote_average': details_dict.get('vote_average'),
+        'tmdb_vote_count': details_dict.get('vote_count'), 'tmdb_media_type': media_type,
+        'tmdb_release_date': details_dict.get('release_date') if media_type == 'movie' else details_dict.get('first_air_date'),
+        'tmdb_runtime_minutes': runtime_minutes if isinstance(runtime_minutes, (int, float)) and runtime_minutes else 0
+    }
+
+def fetch_tmdb_details(media_type, item_id, tmdb_movie_api, tmdb_tv_api, rate_limiter=None, run_metrics=None, failures=None):
+    # Fase 2: (media_type, id) -> registro normalizado con los detalles (sin 'search_title_query')
+    # Con `failures` (FailureLog) se anota el motivo de cada fallo bajo la clave (media_type, id).
+    import requests
+    def failed(reason):
+        if failures is not None: failures.record((media_type, item_id), reason)
+        return None
+    try:
+        details = None
+        if rate_limiter is not None and client_rate_limiter(tmdb_movie_api) is None: rate_limiter.acquire()
+        call_started = time.perf_counter()
+        if media_type == 'movie':
+            details = tmdb_movie_api.details(item_id)  # Quitar language, no es soportado para películas
+        elif media_type == 'tv':
+            details = tmdb_tv_api.details(item_id)
+        else:
+            logging.warning("Tipo de medio '%s' no soportado (ID: %s).", media_type, item_id)
+            return failed(FAILURE_NO_MOVIE_TV)
+        if run_metrics is not None: run_metrics.record_api_call(f'{media_type}/details', time.perf_counter() - call_started)
+        if not details:
+            logging.warning("No se pudieron obtener detalles para ID %s (%s).", item_id, media_type)
+            return failed(FAILURE_NO_DETAILS)
+        if rate_limiter is None: time.sleep(API_CALL_DELAY_SECONDS)
+        extracted_data = tmdb_record_from_details(details, media_type, item_id)
+        logging.info("-> Detalles OK para '%s' (ID: %s)", extracted_data['tmdb_title'], item_id)
+        return extracted_data
+    except requests.exceptions.RequestException as e:
+        reason = request_failure_reason(e)
+        if reason == FAILURE_NETWORK:
+            logging.error("[ERROR API TMDb] Problema de red/conexión para ID %s (reintentos agotados): %s", item_id, e)
+        else:
+            logging.error("[ERROR API TMDb] TMDb rechazó los detalles del ID %s (%s): %s", item_id, reason, e)
+        return failed(reason)
+    except Exception as e:
+        logging.error("[ERROR Inesperado TMDb] en fetch_tmdb_details para ID %s: %s", item_id, e)
+        return failed(FAILURE_TYPE_ERROR if isinstance(e, TypeError) else FAILURE_ERROR)
 
-# --- Funciones Auxiliares para API (usando tmdbv3api) ---
-def get_tmdb_details(title_to_search, tmdb_search_api, tmdb_movie_api, tmdb_tv_api, max_retries=MAX_RETRIES, delay_seconds=RETRY_DELAY_SECONDS):
-    logging.debug(f"Procesando título para API con tmdbv3api: '{title_to_search}' (Tipo: {type(title_to_search)})")
+def snapshot_record(snapshot, match):
+    # Registro normalizado con los campos que trae la instantánea (sin 'search_title_query')
+    return tmdb_record_from_details(snapshot.details(match), *match)
+
+def get_tmdb_details(title_to_search, tmdb_search_api, tmdb_movie_api, tmdb_tv_api, cache=None, rate_limiter=None, run_metrics=None,
+                     failures=None, snapshot=None, offline=False):
+    # Con `snapshot` (TMDbSnapshot) el título se resuelve en local; a la API solo se piden los detalles que falten.
+    # Con `offline` no se llama a la API: solo caché e instantánea.
+    logging.debug("Procesando título para API: '%s' (Tipo: %s)", title_to_search, type(title_to_search))
     if not isinstance(title_to_search, str) or not title_to_search.strip():
-        logging.warning(f"Título inválido o vacío proporcionado a get_tmdb_details: '{title_to_search}'. Saltando.")
+        logging.warning("Título inválido o vacío proporcionado a get_tmdb_details: '%s'. Saltando.", title_to_search)
         return None
     query_title = title_to_search.strip()
+    # La caché guarda tanto aciertos como títulos sin coincidencia (None); los errores de red no se guardan
+    if cache is not None:
+        cached = cache.get(query_title)
+        if cached is not CACHE_MISS:
+            logging.debug("'%s' servido desde caché TMDb (%s).", query_title, 'acierto' if cached else 'sin coincidencia')
+            if not cached and failures is not None: failures.record(title_to_search, FAILURE_CACHED_NO_MATCH)
+            return dict(cached, search_title_query=title_to_search) if cached else None
 
-    for attempt in range(max_retries):
-        try:
-            logging.debug(f"Intento de búsqueda tmdbv3api {attempt + 1}/{max_retries} para '{query_title}'")
-            search_results = tmdb_search_api.multi({'query': query_title, 'language': 'es-ES'})
-
-            if not search_results:
-                logging.info(f"No se encontró coincidencia relevante para '{query_title}' en TMDb (búsqueda tmdbv3api vacía).")
-                return None
-            best_result = None
-            for res in search_results:
-                if hasattr(res, 'media_type') and res.media_type in ['movie', 'tv']:
-                    best_result = res
-                    break
-            if not best_result:
-                logging.info(f"No se encontró coincidencia 'movie' o 'tv' para '{query_title}' (tmdbv3api).")
-                return None
-
-            media_type = best_result.media_type
-            item_id = best_result.id
-            tmdb_api_title = best_result.title if media_type == 'movie' else best_result.name
-            logging.debug(f"Encontrado ID {item_id} ({media_type}) para '{query_title}' como '{tmdb_api_title}'. Obteniendo detalles (tmdbv3api)...")
+    snapshot_match = snapshot.match(query_title) if snapshot is not None else None
+    if snapshot_match:
+        details = None
+        if not snapshot.has_details(snapshot_match) and not offline:
+            details = fetch_tmdb_details(*snapshot_match, tmdb_movie_api, tmdb_tv_api, rate_limiter=rate_limiter,
+                                         run_metrics=run_metrics, failures=failures)
+        # Solo se guardan en caché los detalles de la API; si no llegan, vale lo que tenga la instantánea
+        if details and cache is not None: cache.set(query_title, {'search_title_query': title_to_search, **details})
+        return {'search_title_query': title_to_search, **(details or snapshot_record(snapshot, snapshot_match))}
+    if offline:
+        if failures is not None: failures.record(title_to_search, FAILURE_NOT_IN_SNAPSHOT)
+        return None
 
-            details = None
-            if media_type == 'movie':
-                details = tmdb_movie_api.details(item_id)  # Quitar language, no es soportado para películas
-            elif media_type == 'tv':
-                details = tmdb_tv_api.details(item_id)
+    match = resolve_tmdb_match(title_to_search, tmdb_search_api, cache=cache, rate_limiter=rate_limiter, run_metrics=run_metrics,
+                               failures=failures)
+    if not match:
+        return None
+    details = fetch_tmdb_details(*match, tmdb_movie_api, tmdb_tv_api, rate_limiter=rate_limiter, run_metrics=run_metrics,
+                                 failures=failures)
+    if not details:
+        if failures is not None: failures.record(title_to_search, failures.get(match, FAILURE_NO_DETAILS))
+        return None
+    extracted_data = {'search_title_query': title_to_search, **details}
+    if cache is not None: cache.set(query_title, extracted_data)
+    return extracted_data
+
+def enrich_titles(titles, tmdb_search_api, tmdb_movie_api, tmdb_tv_api, cache=None, max_workers=1, journal=None, run_metrics=None,
+                  title_index=None, failures=None, snapshot=None, offline=False):
+    """
+    Enriquecimiento en dos fases:
+    1) cada título se resuelve a (media_type, id);
+    2) los detalles se piden una sola vez por id distinto y se reparten a todos los títulos que lo comparten.
+    Antes de ir a la red, los títulos sin acierto en caché (nuevos o fallidos) se buscan en la instantánea
+    `snapshot` (TMDbSnapshot), que se salta la fase 1, y después en `title_index`.
+    Con `offline` no se llama a la API: solo se usan caché, instantánea e índice local.
+    Con `failures` (FailureLog) queda anotado el motivo de cada título fallido.
+    Devuelve ({título: registro o None}, métricas).
+    """
+    results_by_title = {}
+    pending_titles = []
+    snapshot_matches = {}  # título -> (media_type, id) de la instantánea al que solo le faltan los detalles
+    matched_locally = matched_in_snapshot = served_from_cache = 0
+    for title in titles:
+        cached = cache.get(title.strip()) if cache is not None else CACHE_MISS
+        snapshot_match = None
+        if not (cached is not CACHE_MISS and cached) and snapshot is not None:
+            snapshot_match = snapshot.match(title)
+        if cached is not CACHE_MISS and cached:
+            record = dict(cached, search_title_query=title)
+            served_from_cache += 1
+        elif snapshot_match:
+            matched_in_snapshot += 1
+            if not snapshot.has_details(snapshot_match) and not offline:
+                snapshot_matches[title] = snapshot_match
+                continue
+            record = {'search_title_query': title, **snapshot_record(snapshot, snapshot_match)}
+        else:
+            local_match = title_index.lookup(title) if title_index is not None else None
+            if local_match:
+                matched_record, similarity = local_match
+                record = {**matched_record, 'search_title_query': title}
+                matched_locally += 1
+                # No se guarda en la caché TMDb: una coincidencia aproximada no debe durar lo que una respuesta de la API
+                logging.debug("'%s' resuelto en local como '%s' (similitud %.2f).", title, matched_record.get('tmdb_title'), similarity)
+            elif cached is CACHE_MISS and not offline:
+                pending_titles.append(title)
+                continue
             else:
-                logging.warning(f"Tipo de medio '{media_type}' no soportado (tmdbv3api) para '{query_title}' (ID: {item_id}).")
-                return None
-            if not details:
-                logging.warning(f"No se pudieron obtener detalles (tmdbv3api) para ID {item_id} ('{query_title}').")
-                return None
-            time.sleep(API_CALL_DELAY_SECONDS)
-            details_dict = vars(details) if not isinstance(details, dict) else details
-            genres_list = details_dict.get('genres', [])
-            genres_str = ', '.join([genre['name'] for genre in genres_list]) if genres_list else None
-            runtime_minutes = 0
-            if media_type == 'movie':
-                runtime_minutes = details_dict.get('runtime', 0)
-            elif media_type == 'tv':
-                episode_run_time = details_dict.get('episode_run_time', [])
-                if episode_run_time: runtime_minutes = episode_run_time[0]
-            
-            extracted_data = {
-                'search_title_query': title_to_search, 'tmdb_id': item_id,
-                'tmdb_title': details_dict.get('title') or details_dict.get('name'),
-                'tmdb_original_title': details_dict.get('original_title') or details_dict.get('original_name'),
-                'tmdb_overview': details_dict.get('overview'), 'tmdb_genres': genres_str,
-                'tmdb_popularity': details_dict.get('popularity'),
-                'tmdb_vote_average': details_dict.get('vote_average'),
-                'tmdb_vote_count': details_dict.get('vote_count'), 'tmdb_media_type': media_type,
-                'tmdb_release_date': details_dict.get('release_date') if media_type == 'movie' else details_dict.get('first_air_date'),
-                'tmdb_runtime_minutes': runtime_minutes if isinstance(runtime_minutes, (int, float)) and runtime_minutes else 0
-            }
-            logging.info(f"-> Detalles OK (tmdbv3api) para '{extracted_data['tmdb_title']}' (ID: {item_id})")
-            return extracted_data
-        except IndexError:
-            logging.warning(f"No se encontró coincidencia relevante (IndexError en resultados tmdbv3api) para '{query_title}'.")
-            return None
-        except requests.exceptions.RequestException as e:
-            logging.error(f"[ERROR API tmdbv3api] Problema de red/conexión para '{query_title}' (Intento {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1: time.sleep(delay_seconds)
-            else: logging.error(f"Reintentos tmdbv3api agotados para '{query_title}'."); return None
-        except TypeError as te:
-            if "quote_from_bytes" in str(te).lower() or "expected bytes" in str(te).lower():
-                logging.error(f"[ERROR TypeError - quote_from_bytes tmdbv3api] para '{query_title}' (Tipo: {type(query_title)}): {te}")
-            else: logging.error(f"[ERROR TypeError - OTRO tmdbv3api] para '{query_title}': {te}")
-            return None
+                record = None
+                if cached is not CACHE_MISS: served_from_cache += 1
+                # Sin red, un título ausente de la instantánea no se ha buscado en TMDb: no es un fallo permanente
+                reason = FAILURE_CACHED_NO_MATCH if cached is not CACHE_MISS else FAILURE_NOT_IN_SNAPSHOT
+                if failures is not None: failures.record(title, reason)
+        results_by_title[title] = record
+        if journal is not None: journal.record(title, record)
+
+    # Modo concurrente: todos los hilos comparten un único token bucket con el presupuesto real de TMDb
+    # (el del cliente, que limita también los reintentos, o uno propio si el cliente no lo trae)
+    rate_limiter = None
+    if max_workers > 1:
+        rate_limiter = client_rate_limiter(tmdb_search_api) or TokenBucket()
+    def run_all(fn, items):
+        if max_workers > 1:
+            return enrich_titles_concurrently(items, fn, max_workers)
+        return [fn(item) for item in items]
+
+    # Fase 1: resolver cada título pendiente a (media_type, id)
+    matches = run_all(lambda title: resolve_tmdb_match(title, tmdb_search_api, cache=cache, rate_limiter=rate_limiter,
+                                                       run_metrics=run_metrics, failures=failures),
+                      pending_titles)
+    titles_by_match = {}
+    for title, match in snapshot_matches.items():
+        titles_by_match.setdefault(match, []).append(title)
+    for title, match in zip(pending_titles, matches):
+        if match:
+            titles_by_match.setdefault(match, []).append(title)
+        else:
+            results_by_title[title] = None
+            if failures is not None and failures.get(title) is None: failures.record(title, FAILURE_NO_MATCH)
+            if journal is not None: journal.record(title, None)
+
+    # Fase 2: una llamada de detalles por id distinto, repartida a todos sus títulos
+    distinct_matches = list(titles_by_match)
+    resolved_titles = sum(len(group) for group in titles_by_match.values())
+    logging.info(f"Fase 2: {len(distinct_matches)} ids distintos para {resolved_titles} títulos resueltos.")
+    details_list = run_all(lambda match: fetch_tmdb_details(*match, tmdb_movie_api, tmdb_tv_api, rate_limiter=rate_limiter,
+                                                            run_metrics=run_metrics, failures=failures),
+                           distinct_matches)
+    for match, details in zip(distinct_matches, details_list):
+        for title in titles_by_match[match]:
+            record = {'search_title_query': title, **details} if details else None
+            if record and cache is not None: cache.set(title.strip(), record)
+            if not record and title in snapshot_matches:
+                # Sin detalles de la API, el título conserva lo que trae la instantánea
+                record = {'search_title_query': title, **snapshot_record(snapshot, match)}
+            if failures is not None:
+                if record: failures.discard(title)
+                else: failures.record(title, failures.get(match, FAILURE_NO_DETAILS))
+            results_by_title[title] = record
+            if journal is not None: journal.record(title, record)
+
+    metrics = {
+        'titles': len(titles),
+        'served_from_cache': served_from_cache,
+        'matched_locally': matched_locally,
+        'matched_in_snapshot': matched_in_snapshot,
+        'resolved_titles': resolved_titles,
+        'detail_calls': len(distinct_matches),
+        'detail_calls_saved': resolved_titles - len(distinct_matches),
+    }
+    if run_metrics is not None: run_metrics.update_counters(metrics)
+    return results_by_title, metrics
+
+# --- Pasos reutilizables del ETL (modo completo, streaming y por lotes) ---
+def setup_tmdb_apis(tmdb_api_key, pool_size=ENRICHMENT_WORKERS, run_metrics=None):
+    # Search, Movie y TV comparten una sola sesión HTTP (pool keep-alive con una conexión por hilo)
+    # y, con varios hilos, un token bucket por el que pasa cada intento, reintentos incluidos
+    try:
+        from scripts.tmdb_client import TMDB_BASE_URL, TMDb, Search, Movie, TV
+    except ImportError:
+        from tmdb_client import TMDB_BASE_URL, TMDb, Search, Movie, TV
+    try:
+        base_url = os.getenv('TMDB_BASE_URL', TMDB_BASE_URL)
+        rate_limiter = TokenBucket() if pool_size > 1 else None
+        tmdb_config = TMDb(tmdb_api_key, base_url=base_url, pool_size=pool_size, run_metrics=run_metrics,
+                           rate_limiter=rate_limiter)
+        tmdb_search_api = Search(tmdb_config)
+        tmdb_movie_api = Movie(tmdb_config)
+        tmdb_tv_api = TV(tmdb_config)
+        logging.info(f"¡Objetos API de TMDb listos para el ETL! ({base_url})")
+        return tmdb_search_api, tmdb_movie_api, tmdb_tv_api
+    except Exception as e:
+        logging.error(f"Error al configurar los objetos API de TMDb: {e}")
+        return None
+
+def load_tmdb_snapshot(snapshot_paths, run_metrics=None):
+    # Carga una o varias instantáneas JSON lines de TMDb en un índice en memoria; None si alguna no se puede leer
+    started = time.perf_counter()
+    try:
+        snapshot = TMDbSnapshot.from_files(snapshot_paths)
+    except Exception as e:
+        logging.error(f"¡Error Crítico! No se pudo cargar la instantánea de TMDb ({e}).")
+        return None
+    logging.info(f"Instantánea TMDb cargada: {len(snapshot)} películas y series de {len(snapshot_paths)} archivo(s) "
+                 f"en {time.perf_counter() - started:.1f} s.")
+    if run_metrics is not None: run_metrics.update_counters({'snapshot_entries': len(snapshot)})
+    return snapshot
+
+def run_api_diagnostic(tmdb_search_api, test_title="Inception"):
+    # Prueba opcional (--diagnostic): una búsqueda real para comprobar la API key y la conectividad
+    import requests
+    logging.info("--- Iniciando Prueba Directa (Diagnóstico) ---")
+    try:
+        results = tmdb_search_api.multi({'query': test_title, 'language': 'es-ES'})
+        logging.info(f"[PRUEBA DIRECTA EXITOSA] Respuesta para '{test_title}': {[vars(r) for r in results[:1]]}")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"[ERROR EN PRUEBA DIRECTA - RequestException] {e}")
+    except Exception as e:
+        logging.error(f"[ERROR INESPERADO EN PRUEBA DIRECTA] {e}")
+    logging.info("--- Fin Prueba Directa ---")
+
+def parse_history_dates(date_series, date_normalizer=None, run_metrics=None):
+    # Formato detectado con una muestra (EXPECTED_DATE_FORMAT primero); solo se parsean las fechas distintas.
+    # Un mismo DateNormalizer recuerda formato y textos entre bloques o perfiles.
+    import pandas as pd
+    try:
+        from scripts.date_normalization import DateNormalizer
+    except ImportError:
+        from date_normalization import DateNormalizer
+    if date_normalizer is None: date_normalizer = DateNormalizer(EXPECTED_DATE_FORMAT)
+    known_format = date_normalizer.date_format
+    invalid_before = date_normalizer.stats['invalid_rows']
+    dates = date_normalizer.parse(date_series)
+    if known_format is None and date_normalizer.date_format != EXPECTED_DATE_FORMAT:
+        logging.warning(f"El formato '{EXPECTED_DATE_FORMAT}' no coincide. Formato detectado: '{date_normalizer.date_format}'.")
+    invalid_rows = date_normalizer.stats['invalid_rows'] - invalid_before
+    if invalid_rows:
+        examples = pd.Series(date_series)[dates.isna()].dropna().astype(str).unique()[:5].tolist()
+        logging.warning(f"{invalid_rows} filas con fecha vacía o no reconocida se descartan" + (f" (p. ej. {examples})." if examples else "."))
+    if run_metrics is not None: run_metrics.update_counters({'invalid_date_rows': invalid_rows})
+    return dates
+
+def add_cleaned_titles(df_history):
+    # Solo se normalizan los títulos distintos ("Serie: Temporada N: Episodio" -> "Serie"); las filas reciben su clave por código
+    try:
+        from scripts.title_normalization import map_canonical_titles
+    except ImportError:
+        from title_normalization import map_canonical_titles
+    df_history['Title_Cleaned_For_API'] = map_canonical_titles(df_history['Title'])
+    return df_history
+
+def normalize_history(df_history, date_normalizer=None):
+    df_history['Date'] = parse_history_dates(df_history['Date'], date_normalizer)
+    df_history = df_history.dropna(subset=['Date', 'Title']).copy()
+    return add_cleaned_titles(df_history)
+
+def merge_tmdb_data(df_history, tmdb_data):
+    """
+    Unión izquierda del historial con el catálogo TMDb (TitleCatalogue o DataFrame de registros).
+    Se resuelve la posición de cada título distinto y las columnas se toman por posición.
+    """
+    import pandas as pd
+    try:
+        from scripts.title_catalogue import TitleCatalogue
+    except ImportError:
+        from title_catalogue import TitleCatalogue
+    if tmdb_data is None or len(tmdb_data) == 0:
+        return df_history.drop(columns=['Title_Cleaned_For_API'], errors='ignore')
+    catalogue = tmdb_data if isinstance(tmdb_data, TitleCatalogue) else TitleCatalogue.from_frame(tmdb_data)
+    positions = catalogue.positions(df_history['Title_Cleaned_For_API'])
+    # La columna Title_Cleaned_For_API se mantiene para revisión
+    df_final = df_history.reset_index(drop=True)
+    return pd.concat([df_final, catalogue.take(positions)], axis=1)
+
+def enrich_unique_titles(unique_titles, tmdb_search_api, tmdb_movie_api, tmdb_tv_api, use_cache, max_workers, resume, run_metrics=None,
+                         fuzzy_threshold=FUZZY_MATCH_THRESHOLD, store=None, failure_backoff_days=FAILURE_BACKOFF_DAYS,
+                         snapshot=None, offline=False):
+    # PASO 4: Enriquecimiento con API de TMDb (caché + diario de progreso + resumen)
+    # Devuelve (registros, {título fallido: motivo}). Con `store`, los títulos con un fallo permanente
+    # en backoff no se buscan; los fallos transitorios se reintentan en una pasada final.
+    # Con `snapshot` (TMDbSnapshot) los títulos se resuelven primero en la instantánea local; `offline`: sin API.
+    num_unique_titles = len(unique_titles)
+    logging.info(f"PASO 4: Contactando TMDb para {num_unique_titles} títulos...")
+    tmdb_cache = None
+    if use_cache:
+        try:
+            tmdb_cache = TMDbCache(TMDB_CACHE_PATH)
+            # Las entradas caducadas se borran al abrir: así no entran en el índice local de títulos
+            purged_entries = tmdb_cache.purge_expired()
+            if purged_entries: logging.info(f"Caché TMDb: eliminadas {purged_entries} entradas caducadas.")
+        except Exception as e:
+            logging.warning(f"No se pudo abrir la caché TMDb ({e}). Se continúa sin caché.")
+    # Índice local con todo lo ya visto en TMDb: los títulos parecidos se resuelven sin llamar a la API
+    title_index = None
+    if tmdb_cache is not None and fuzzy_threshold:
+        title_index = TitleIndex.from_records(tmdb_cache.cached_records(), threshold=fuzzy_threshold)
+        logging.info(f"Índice local de títulos: {len(title_index)} claves (umbral de similitud {fuzzy_threshold}).")
+    # Diario de progreso: cada resultado se persiste en cuanto llega para poder reanudar tras una caída
+    results_by_title = {}
+    if resume:
+        journal_entries = load_journal(JOURNAL_PATH)
+        results_by_title = {title: journal_entries[title] for title in unique_titles if title in journal_entries}
+        logging.info(f"Reanudando: {len(results_by_title)} títulos ya procesados según el diario {JOURNAL_PATH}")
+    failure_log = FailureLog()
+    titles_in_backoff = set()
+    if store is not None and failure_backoff_days:
+        try:
+            titles_in_backoff = store.titles_in_backoff(failure_backoff_days)
         except Exception as e:
-            logging.error(f"[ERROR Inesperado tmdbv3api] en get_tmdb_details para '{query_title}' (Intento {attempt + 1}/{max_retries}): {e}")
-            return None
-    return None
+            logging.warning(f"No se pudieron leer los títulos fallidos del almacén ({e}). Se buscarán todos.")
+    pending_titles, skipped_titles = [], 0
+    for title in unique_titles:
+        if title in results_by_title:
+            continue
+        if title in titles_in_backoff:
+            results_by_title[title] = None
+            failure_log.record(title, FAILURE_BACKOFF)
+            skipped_titles += 1
+        else:
+            pending_titles.append(title)
+    if skipped_titles:
+        logging.info(f"Omitidos {skipped_titles} títulos sin coincidencia en TMDb cuyo backoff aún no ha vencido.")
+    journal = EnrichmentJournal(JOURNAL_PATH, truncate=not resume)
+    try:
+        new_results, enrichment_metrics = enrich_titles(pending_titles, tmdb_search_api, tmdb_movie_api, tmdb_tv_api,
+                                                        cache=tmdb_cache, max_workers=max_workers, journal=journal,
+                                                        run_metrics=run_metrics, title_index=title_index, failures=failure_log,
+                                                        snapshot=snapshot, offline=offline)
+        results_by_title.update(new_results)
+        # Pasada de reintento: solo los fallos transitorios, cuando el resto de títulos ya está resuelto
+        retry_titles = [title for title in pending_titles
+                        if not results_by_title.get(title) and failure_log.get(title) in TRANSIENT_FAILURES]
+        recovered_titles = 0
+        if len(retry_titles) >= RETRY_SKIP_MIN_TITLES and len(retry_titles) == len(pending_titles):
+            # La API no respondió a ninguno de varios títulos: lo más probable es que no esté disponible
+            logging.warning(f"Se omite la pasada de reintento de {len(retry_titles)} títulos: la API no respondió a ninguno.")
+            retry_titles = []
+        if retry_titles:
+            logging.info(f"Pasada de reintento: {len(retry_titles)} títulos con fallos transitorios (red, detalles vacíos)...")
+            retry_results, _ = enrich_titles(retry_titles, tmdb_search_api, tmdb_movie_api, tmdb_tv_api, cache=tmdb_cache,
+                                             max_workers=max_workers, journal=journal, title_index=title_index,
+                                             failures=failure_log, snapshot=snapshot, offline=offline)
+            results_by_title.update(retry_results)
+            recovered_titles = sum(1 for title in retry_titles if results_by_title.get(title))
+            logging.info(f"Pasada de reintento: recuperados {recovered_titles} de {len(retry_titles)} títulos.")
+    finally:
+        journal.close()
+
+    tmdb_data_list = []
+    failed_titles = {}
+    for title_to_search_api in unique_titles:
+        details = results_by_title.get(title_to_search_api)
+        if details: tmdb_data_list.append(details)
+        else: failed_titles[title_to_search_api] = failure_log.get(title_to_search_api, FAILURE_NO_MATCH)
+
+    num_successful_api = len(tmdb_data_list)
+    logging.info(f"\n--- Resumen Búsqueda API ---")
+    logging.info(f"Información obtenida para {num_successful_api} de {num_unique_titles} títulos.")
+    logging.info(f"No se obtuvo info para {len(failed_titles)} títulos.")
+    if failed_titles:
+        reason_counts = Counter(failed_titles.values())
+        logging.info("Motivos: " + ", ".join(f"{reason} {count}" for reason, count in reason_counts.most_common()))
+        if FAILURE_AUTH in reason_counts:
+            logging.error(f"TMDb rechazó la API key en {reason_counts[FAILURE_AUTH]} títulos (HTTP 401/403). "
+                          f"Revisa TMDB_API_KEY; estos títulos no cuentan como intento fallido.")
+    if enrichment_metrics['matched_in_snapshot']:
+        logging.info(f"Resueltos en la instantánea local de TMDb (sin búsqueda en la API): {enrichment_metrics['matched_in_snapshot']} títulos.")
+    if enrichment_metrics['matched_locally']:
+        logging.info(f"Resueltos en local por similitud (sin llamar a la API): {enrichment_metrics['matched_locally']} títulos.")
+    logging.info(f"Llamadas de detalle: {enrichment_metrics['detail_calls']} "
+                 f"(ahorradas {enrichment_metrics['detail_calls_saved']} al agrupar títulos con el mismo tmdb_id).")
+    if tmdb_cache is not None:
+        cache_stats = tmdb_cache.stats()
+        logging.info(f"Caché TMDb: {cache_stats['hits']} aciertos, {cache_stats['misses']} fallos "
+                     f"(tasa de acierto {cache_stats['hit_rate']:.1%}).")
+        if run_metrics is not None: run_metrics.set_cache_stats(cache_stats)
+        tmdb_cache.close()
+    if failed_titles:
+        try:
+            os.makedirs(os.path.dirname(FAILED_TITLES_LOG_PATH), exist_ok=True)
+            with open(FAILED_TITLES_LOG_PATH, 'w', encoding='utf-8') as f:
+                for ft, reason in failed_titles.items(): f.write(f"{ft}\t{reason}\n")
+            logging.info(f"Lista de títulos fallidos guardada en: {FAILED_TITLES_LOG_PATH}")
+        except Exception as e: logging.error(f"No se pudo guardar log de fallidos: {e}")
+    if run_metrics is not None:
+        run_metrics.update_counters({'unique_titles': num_unique_titles, 'enriched_titles': num_successful_api,
+                                     'failed_titles': len(failed_titles), 'skipped_in_backoff': skipped_titles,
+                                     'retried_titles': len(retry_titles), 'recovered_on_retry': recovered_titles})
+    return tmdb_data_list, failed_titles
+
+def open_local_store():
+    # El almacén es la fuente de verdad; si no se puede abrir, el ETL sigue y solo exporta archivos
+    try:
+        try:
+            from scripts.local_store import LocalStore
+        except ImportError:
+            from local_store import LocalStore
+        return LocalStore(STORE_PATH)
+    except Exception as e:
+        logging.warning(f"No se pudo abrir el almacén local {STORE_PATH} ({e}). Se continúa sin almacén.")
+        return None
+
+def update_local_store(store, df_history, new_records, failed_titles, since_date=None):
+    # Upsert del catálogo y de los fallidos ({título: motivo}); el historial (si se pasa) se sustituye desde since_date
+    # (todo si es None). Los títulos que no se buscaron (backoff, ausentes de la instantánea sin red) no suman intento.
+    try:
+        store.upsert_titles(new_records)
+        store.record_failures({title: reason for title, reason in failed_titles.items() if reason not in UNATTEMPTED_FAILURES})
+        if df_history is not None:
+            store.replace_history(df_history, since_date)
+        logging.info(f"Almacén local actualizado: {len(new_records)} títulos TMDb, {len(failed_titles)} fallidos"
+                     + (f", {len(df_history)} filas de historial." if df_history is not None else "."))
+    except Exception as e:
+        logging.error(f"Error al actualizar el almacén local {STORE_PATH}: {e}")
+
+def _run_streaming_pipeline(tmdb_search_api, tmdb_movie_api, tmdb_tv_api, use_cache, max_workers, resume, memory_budget_mb,
+                            run_metrics, fuzzy_threshold, store=None, failure_backoff_days=FAILURE_BACKOFF_DAYS, snapshot=None,
+                            offline=False):
+    # Modo streaming: el historial nunca se carga entero; se recorre dos veces por bloques acotados
+    # memory_budget_mb=None usa STREAMING_MEMORY_BUDGET_MB
+    import pandas as pd
+    try:
+        from scripts.date_normalization import DateNormalizer
+        from scripts.streaming import STREAMING_MEMORY_BUDGET_MB, estimate_chunksize, iter_history_chunks
+        from scripts.title_catalogue import TitleCatalogue
+    except ImportError:
+        from date_normalization import DateNormalizer
+        from streaming import STREAMING_MEMORY_BUDGET_MB, estimate_chunksize, iter_history_chunks
+        from title_catalogue import TitleCatalogue
+    if memory_budget_mb is None: memory_budget_mb = STREAMING_MEMORY_BUDGET_MB
+    logging.info(f"PASO 2 (streaming): recorriendo {RAW_DATA_PATH} por bloques (presupuesto {memory_budget_mb} MB)...")
+    unique_titles_seen = {}
+    original_rows = cleaned_rows = 0
+    # Formato de fecha y textos ya parseados se comparten entre bloques y entre las dos pasadas
+    date_normalizer = DateNormalizer(EXPECTED_DATE_FORMAT)
+    normalize_chunk = lambda df_chunk: normalize_history(df_chunk, date_normalizer)
+    try:
+        with run_metrics.stage('first_pass') as stage:
+            chunksize = estimate_chunksize(RAW_DATA_PATH, memory_budget_mb)
+            logging.info(f"Primera pasada con bloques de {chunksize} filas.")
+            for df_chunk, raw_rows in iter_history_chunks(RAW_DATA_PATH, chunksize, normalize_chunk):
+                original_rows += raw_rows
+                cleaned_rows += len(df_chunk)
+                unique_titles_seen.update(dict.fromkeys(df_chunk['Title_Cleaned_For_API'].unique()))
+            stage['rows'] = original_rows
+    except Exception as e: logging.error(f"Error al cargar/limpiar CSV por bloques: {e}"); return
+    logging.info(f"Filas después de limpiar nulos/fechas: {cleaned_rows} (Eliminadas: {original_rows - cleaned_rows})")
+    if cleaned_rows == 0: logging.error("No quedaron filas válidas."); return
+
+    # PASO 3: los títulos únicos se acumulan en orden de aparición durante la primera pasada
+    unique_titles = [str(title) for title in unique_titles_seen if pd.notna(title) and str(title).strip() != ""]
+    if not unique_titles: logging.error("No se encontraron títulos únicos válidos."); return
+    logging.info(f"PASO 3: Títulos únicos (strings válidos) para API: {len(unique_titles)}")
+
+    # PASO 4: Enriquecimiento con API de TMDb
+    with run_metrics.stage('enrichment', rows=len(unique_titles)):
+        tmdb_data_list, failed_titles = enrich_unique_titles(unique_titles, tmdb_search_api, tmdb_movie_api, tmdb_tv_api,
+                                                              use_cache, max_workers, resume, run_metrics=run_metrics,
+                                                              fuzzy_threshold=fuzzy_threshold, store=store,
+                                                              failure_backoff_days=failure_backoff_days, snapshot=snapshot,
+                                                              offline=offline)
+    if store is not None:
+        # El historial se vuelca al almacén bloque a bloque durante la segunda pasada
+        update_local_store(store, None, tmdb_data_list, failed_titles)
+        store.replace_history(pd.DataFrame(columns=['Title', 'Date', 'Title_Cleaned_For_API']))
+
+    # PASO 5 + 6: segunda pasada, cada bloque se une con la tabla compacta de TMDb y se escribe al momento
+    catalogue = TitleCatalogue.from_records(tmdb_data_list)
+    lookup_bytes, lookup_bytes_per_row = catalogue.nbytes(), catalogue.bytes_per_joined_row()
+    logging.info(f"PASO 5/6 (streaming): uniendo por bloques con la tabla TMDb ({lookup_bytes / 1024 / 1024:.1f} MB) "
+                 f"y escribiendo en {PROCESSED_DATA_PATH}...")
+    written_rows = enriched_rows = 0
+    try:
+        chunksize = estimate_chunksize(RAW_DATA_PATH, memory_budget_mb, extra_bytes_per_row=lookup_bytes_per_row,
+                                       reserved_bytes=lookup_bytes)
+        logging.info(f"Segunda pasada con bloques de {chunksize} filas.")
+        with run_metrics.stage('merge_write') as stage, open_atomic(PROCESSED_DATA_PATH) as out:
+            for chunk_number, (df_chunk, _) in enumerate(iter_history_chunks(RAW_DATA_PATH, chunksize, normalize_chunk)):
+                df_chunk_final = merge_tmdb_data(df_chunk, catalogue)
+                df_chunk_final.to_csv(out, header=(chunk_number == 0), index=False)
+                if store is not None: store.append_history(df_chunk)
+                written_rows += len(df_chunk_final)
+                if 'tmdb_id' in df_chunk_final.columns: enriched_rows += int(df_chunk_final['tmdb_id'].notna().sum())
+            stage['rows'] = written_rows
+        logging.info(f"¡Éxito! Datos enriquecidos guardados. Filas escritas: {written_rows} (enriquecidas: {enriched_rows}).")
+    except Exception as e:
+        logging.error(f"Error al guardar CSV final por bloques: {e}")
+        return
+    if os.path.exists(JOURNAL_PATH):
+        os.remove(JOURNAL_PATH)
+    # Sin el historial completo en memoria no se calcula la marca de agua; se invalida la anterior
+    if os.path.exists(WATERMARK_PATH):
+        os.remove(WATERMARK_PATH)
+    logging.info("\n--- Proceso ETL (streaming) completado ---")
 
 # === La Receta Principal (Nuestra Función ETL) ===
-def run_netflix_etl():
+def run_netflix_etl(use_cache=True, max_workers=ENRICHMENT_WORKERS, incremental=False, resume=False,
+                    streaming=False, memory_budget_mb=None, output_format='csv',
+                    metrics_path=None, profile_path=None, diagnostic=False, fuzzy_threshold=FUZZY_MATCH_THRESHOLD,
+                    use_store=True, export=True, failure_backoff_days=FAILURE_BACKOFF_DAYS, snapshot_paths=(), offline=False):
+    # Cada ejecución deja un informe JSON de métricas (duración por etapa, API, caché, memoria).
+    # metrics_path=None usa METRICS_REPORT_PATH; '' desactiva el informe.
+    # use_store: actualizar el almacén local (STORE_PATH); export: escribir además el archivo enriquecido.
+    # failure_backoff_days: días que se salta un título sin coincidencia tras su primer fallo (0 = no saltar).
+    # snapshot_paths: volcados JSON lines de TMDb para resolver títulos en local; offline: no usar la API.
+    if metrics_path is None: metrics_path = METRICS_REPORT_PATH
+    run_metrics = RunMetrics('etl')
+    store = open_local_store() if use_store else None
+    try:
+        with profiled(profile_path):
+            _run_netflix_etl(run_metrics, use_cache, max_workers, incremental, resume, streaming, memory_budget_mb, output_format,
+                             diagnostic, fuzzy_threshold, store, export, failure_backoff_days, snapshot_paths, offline)
+    finally:
+        if store is not None: store.close()
+        if metrics_path:
+            try:
+                run_metrics.write_report(metrics_path)
+            except Exception as e:
+                logging.warning(f"No se pudo guardar el informe de métricas ({e}).")
+
+def _run_netflix_etl(run_metrics, use_cache, max_workers, incremental, resume, streaming, memory_budget_mb, output_format,
+                     diagnostic, fuzzy_threshold, store=None, export=True, failure_backoff_days=FAILURE_BACKOFF_DAYS,
+                     snapshot_paths=(), offline=False):
+    import pandas as pd
+    try:
+        from scripts.data_io import ENRICHED_SCHEMA, check_format_available, find_existing_table, write_table
+        from scripts.incremental import build_watermark, load_watermark, save_watermark, select_new_rows, split_existing_enriched
+        from scripts.title_catalogue import TitleCatalogue
+    except ImportError:
+        from data_io import ENRICHED_SCHEMA, check_format_available, find_existing_table, write_table
+        from incremental import build_watermark, load_watermark, save_watermark, select_new_rows, split_existing_enriched
+        from title_catalogue import TitleCatalogue
     logging.info("--- ¡Hola! Voy a empezar a organizar tus datos de Netflix ---")
 
     # PASO 1: Configuración y Verificación Inicial
@@ -126,135 +701,238 @@ def run_netflix_etl():
     if not os.path.exists(os.path.join(PROJECT_ROOT, ".env")):
         logging.warning("No se encontró archivo .env en la raíz del proyecto.")
     tmdb_api_key = os.getenv('TMDB_API_KEY')
-    if not tmdb_api_key:
+    if offline and not snapshot_paths:
+        logging.error("¡Error Crítico! El modo sin red necesita al menos una instantánea de TMDb (--snapshot).")
+        return
+    if not tmdb_api_key and not offline:
         logging.error("¡Error Crítico! No se encontró TMDB_API_KEY en el archivo .env o variable de entorno.")
         return
     logging.info(f"Directorio raíz del proyecto: {PROJECT_ROOT}")
     logging.info(f"Buscaré tu historial en: {RAW_DATA_PATH}")
     logging.info(f"Guardaré el resultado final en: {PROCESSED_DATA_PATH}")
     logging.info(f"Log de títulos fallidos en: {FAILED_TITLES_LOG_PATH}")
-
-    # --- INICIO BLOQUE DE PRUEBA DIRECTA CON REQUESTS ---
-    logging.info("--- Iniciando Prueba Directa con Requests (Diagnóstico) ---")
-    test_title = "Inception" 
-    test_search_url = f"https://api.themoviedb.org/3/search/multi"
-    test_params = { 'api_key': tmdb_api_key, 'query': test_title, 'language': 'es-ES' }
-    logging.debug(f"URL de prueba directa: {test_search_url}")
-    logging.debug(f"Parámetros de prueba directa: {test_params}")
+    if store is not None: logging.info(f"Almacén local en: {STORE_PATH}")
+    if store is None and not export:
+        logging.error("¡Error Crítico! Sin almacén local ni exportación el resultado no se guardaría en ningún sitio.")
+        return
+    if use_cache: logging.info(f"Caché de respuestas TMDb en: {TMDB_CACHE_PATH}")
     try:
-        response_test = requests.get(test_search_url, params=test_params, timeout=10)
-        response_test.raise_for_status() 
-        test_data = response_test.json()
-        logging.info(f"[PRUEBA DIRECTA EXITOSA] Respuesta para '{test_title}': {test_data.get('results', [])[:1]}")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"[ERROR EN PRUEBA DIRECTA - RequestException] {e}")
-    except TypeError as te: 
-        if "quote_from_bytes" in str(te).lower() or "expected bytes" in str(te).lower():
-            logging.error(f"[ERROR EN PRUEBA DIRECTA - TypeError quote_from_bytes] para '{test_title}': {te}")
-        else: logging.error(f"[ERROR EN PRUEBA DIRECTA - TypeError OTRO] para '{test_title}': {te}")
-    except Exception as e:
-        logging.error(f"[ERROR INESPERADO EN PRUEBA DIRECTA] {e}")
-    logging.info("--- Fin Prueba Directa con Requests ---")
-    # --- FIN BLOQUE DE PRUEBA DIRECTA CON REQUESTS ---
+        check_format_available(output_format)
+    except ImportError as e:
+        logging.error(f"¡Error Crítico! {e}")
+        return
 
     if not os.path.exists(RAW_DATA_PATH):
-        logging.error(f"¡Error Crítico! No se encontró el archivo de historial después de la prueba: {RAW_DATA_PATH}")
+        logging.error(f"¡Error Crítico! No se encontró el archivo de historial: {RAW_DATA_PATH}")
         return
 
-    # Configurar API de TMDb para el ETL principal
-    try:
-        tmdb_config = TMDb()
-        tmdb_config.api_key = tmdb_api_key
-        tmdb_search_api = Search()
-        tmdb_movie_api = Movie()
-        tmdb_tv_api = TV()
-        logging.info("¡Objetos API de TMDb (tmdbv3api) listos para el ETL!")
-    except Exception as e:
-        logging.error(f"Error al configurar los objetos API de TMDb (tmdbv3api): {e}")
-        return
+    snapshot = None
+    if snapshot_paths:
+        snapshot = load_tmdb_snapshot(snapshot_paths, run_metrics)
+        if snapshot is None:
+            return
+
+    # Configurar API de TMDb para el ETL principal (en modo sin red no hay APIs: solo caché e instantánea)
+    if offline:
+        logging.info("Modo sin red: los títulos se resuelven solo con la caché y la instantánea de TMDb.")
+        tmdb_search_api = tmdb_movie_api = tmdb_tv_api = None
+    else:
+        tmdb_apis = setup_tmdb_apis(tmdb_api_key, pool_size=max_workers, run_metrics=run_metrics)
+        if tmdb_apis is None:
+            return
+        tmdb_search_api, tmdb_movie_api, tmdb_tv_api = tmdb_apis
+        if diagnostic:
+            run_api_diagnostic(tmdb_search_api)
+
+    if streaming:
+        if incremental:
+            logging.error("El modo streaming no admite el modo incremental. Ejecuta uno u otro.")
+            return
+        if output_format != 'csv':
+            logging.error("El modo streaming escribe por bloques y solo admite salida CSV.")
+            return
+        if not export:
+            logging.error("El modo streaming escribe la salida por bloques y no admite --no-export.")
+            return
+        return _run_streaming_pipeline(tmdb_search_api, tmdb_movie_api, tmdb_tv_api,
+                                       use_cache, max_workers, resume, memory_budget_mb, run_metrics, fuzzy_threshold, store,
+                                       failure_backoff_days, snapshot, offline)
 
     # PASO 2: Extracción y Limpieza Inicial del Historial
     logging.info("PASO 2: Abriendo tu cuaderno de historial de Netflix...")
     try:
-        df_history = pd.read_csv(RAW_DATA_PATH)
+        with run_metrics.stage('ingest') as stage:
+            df_history = pd.read_csv(RAW_DATA_PATH)
+            stage['rows'] = len(df_history)
         logging.info(f"Cargado: {len(df_history)} filas, {len(df_history.columns)} columnas desde {RAW_DATA_PATH}")
         if 'Title' not in df_history.columns or 'Date' not in df_history.columns:
             logging.error("El CSV debe contener 'Title' y 'Date'.")
             return
         original_rows = len(df_history)
-        try:
-            df_history['Date'] = pd.to_datetime(df_history['Date'], format=EXPECTED_DATE_FORMAT, errors='raise')
-        except Exception:
-            logging.warning(f"El formato '{EXPECTED_DATE_FORMAT}' no coincide. Intentando inferir formato automáticamente...")
-            df_history['Date'] = pd.to_datetime(df_history['Date'], errors='coerce')
-        df_history = df_history.dropna(subset=['Date', 'Title'])
+        with run_metrics.stage('date_parse', rows=original_rows):
+            df_history['Date'] = parse_history_dates(df_history['Date'], run_metrics=run_metrics)
+            df_history = df_history.dropna(subset=['Date', 'Title'])
         cleaned_rows = len(df_history)
         logging.info(f"Filas después de limpiar nulos/fechas: {cleaned_rows} (Eliminadas: {original_rows - cleaned_rows})")
         if cleaned_rows == 0: logging.error("No quedaron filas válidas."); return
     except FileNotFoundError: logging.error(f"¡Error! No se encontró archivo: {RAW_DATA_PATH}"); return
     except Exception as e: logging.error(f"Error al cargar/limpiar CSV: {e}"); return
 
+    # Modo incremental: solo filas nuevas desde la marca de agua y títulos aún no enriquecidos
+    df_history_full = df_history
+    df_existing_kept = None
+    df_known_lookup = None
+    known_titles = set()
+    since_date = None
+    if incremental:
+        df_new_rows = None
+        # Con almacén, lo ya procesado se lee de él (consultas indexadas) en lugar de releer el archivo exportado
+        store_has_history = store is not None and store.history_count() > 0
+        existing_output_path = find_existing_table(PROCESSED_DATA_PATH)
+        if store_has_history or existing_output_path:
+            df_new_rows = select_new_rows(df_history, load_watermark(WATERMARK_PATH))
+        else:
+            logging.warning(f"No existe {PROCESSED_DATA_PATH} (CSV ni Parquet) ni historial en el almacén. Se hará un recálculo completo.")
+        if df_new_rows is not None:
+            since_date = df_new_rows['Date'].min() if not df_new_rows.empty else None
+            if since_date is None:
+                logging.info("Modo incremental: no hay filas nuevas desde la última ejecución. Nada que hacer.")
+                return
+            try:
+                if store_has_history:
+                    df_existing_kept, df_known_lookup, known_titles = store.split_enriched(since_date, include_kept=export)
+                else:
+                    df_existing_kept, df_known_lookup, known_titles = split_existing_enriched(existing_output_path, since_date)
+            except Exception as e:
+                since_date = None
+                logging.warning(f"No se pudo leer la salida enriquecida previa ({e}). Se hará un recálculo completo.")
+            else:
+                df_history = df_new_rows.copy()
+                logging.info(f"Modo incremental: {len(df_history)} filas a procesar desde {since_date:%Y-%m-%d} "
+                             f"({len(df_existing_kept)} filas previas se conservan).")
+
     # PASO 3: Identificar Títulos Únicos para API
     logging.info("PASO 3: Ordenando nombres de pelis/series...")
-    df_history['Title_Cleaned_For_API'] = df_history['Title'].fillna('').astype(str).apply(clean_netflix_title).str.strip()
+    with run_metrics.stage('title_cleaning', rows=len(df_history)):
+        df_history = add_cleaned_titles(df_history)
     unique_titles_series = df_history['Title_Cleaned_For_API'].unique()
+    logging.info(f"{df_history['Title'].nunique()} títulos distintos en el historial -> {len(unique_titles_series)} claves de búsqueda.")
     unique_titles = [str(title) for title in unique_titles_series if pd.notna(title) and str(title).strip() != ""]
+    if df_existing_kept is not None:
+        unique_titles = [title for title in unique_titles if title not in known_titles]
+        logging.info(f"Modo incremental: {len(unique_titles)} títulos nuevos (no presentes en la salida previa).")
     num_unique_titles = len(unique_titles)
-    if num_unique_titles == 0: logging.error("No se encontraron títulos únicos válidos."); return
+    if num_unique_titles == 0 and df_existing_kept is None: logging.error("No se encontraron títulos únicos válidos."); return
     logging.info(f"Títulos únicos (strings válidos) para API: {num_unique_titles}")
     logging.debug(f"Muestra títulos únicos: {unique_titles[:5]}")
 
     # PASO 4: Enriquecimiento con API de TMDb
-    logging.info(f"PASO 4: Contactando TMDb para {num_unique_titles} títulos...")
-    tmdb_data_list = []
-    failed_titles_list = []
-    for title_to_search_api in unique_titles:
-        details = get_tmdb_details(title_to_search_api, tmdb_search_api, tmdb_movie_api, tmdb_tv_api)
-        if details: tmdb_data_list.append(details)
-        else: failed_titles_list.append(title_to_search_api)
-        time.sleep(API_CALL_DELAY_SECONDS)
-
-    num_successful_api = len(tmdb_data_list)
-    logging.info(f"\n--- Resumen Búsqueda API ---")
-    logging.info(f"Información obtenida para {num_successful_api} de {num_unique_titles} títulos.")
-    logging.info(f"No se obtuvo info para {len(failed_titles_list)} títulos.")
-    if failed_titles_list:
-        try:
-            os.makedirs(os.path.dirname(FAILED_TITLES_LOG_PATH), exist_ok=True)
-            with open(FAILED_TITLES_LOG_PATH, 'w', encoding='utf-8') as f:
-                for ft in failed_titles_list: f.write(f"{ft}\n")
-            logging.info(f"Lista de títulos fallidos guardada en: {FAILED_TITLES_LOG_PATH}")
-        except Exception as e: logging.error(f"No se pudo guardar log de fallidos: {e}")
+    with run_metrics.stage('enrichment', rows=num_unique_titles):
+        tmdb_data_list, failed_titles = enrich_unique_titles(unique_titles, tmdb_search_api, tmdb_movie_api, tmdb_tv_api,
+                                                              use_cache, max_workers, resume, run_metrics=run_metrics,
+                                                              fuzzy_threshold=fuzzy_threshold, store=store,
+                                                              failure_backoff_days=failure_backoff_days, snapshot=snapshot,
+                                                              offline=offline)
 
     # PASO 5: Unión de Datos (Merge)
+    if store is not None:
+        with run_metrics.stage('store', rows=len(df_history)):
+            update_local_store(store, df_history, tmdb_data_list, failed_titles,
+                               since_date if df_existing_kept is not None else None)
+    if df_known_lookup is not None and not df_known_lookup.empty:
+        # Los títulos ya enriquecidos en ejecuciones anteriores se reutilizan sin llamar a la API
+        tmdb_data_list = tmdb_data_list + df_known_lookup.to_dict('records')
     if not tmdb_data_list:
         logging.warning("No se obtuvo info de TMDb. El archivo final solo contendrá historial original.")
-        df_final = df_history.copy()
-        if 'Title_Cleaned_For_API' in df_final.columns:
-             df_final = df_final.drop(columns=['Title_Cleaned_For_API'], errors='ignore')
+        df_final = merge_tmdb_data(df_history, None)
     else:
-        logging.info(f"PASO 5: Uniendo info de TMDb ({num_successful_api} títulos) con historial ({len(df_history)} filas)...")
-        df_tmdb_data = pd.DataFrame(tmdb_data_list)
-        logging.info(f"Creada tabla API con {len(df_tmdb_data)} filas y {len(df_tmdb_data.columns)} columnas.")
-        logging.debug(f"Columnas en df_tmdb_data: {df_tmdb_data.columns.tolist()}")
-        df_final = pd.merge(df_history, df_tmdb_data, left_on='Title_Cleaned_For_API', right_on='search_title_query', how='left')
-        cols_to_drop = ['search_title_query']
-        # df_final = df_final.drop(columns=['Title_Cleaned_For_API'], errors='ignore') # Mantener para revisión
-        df_final = df_final.drop(columns=cols_to_drop, errors='ignore')
+        logging.info(f"PASO 5: Uniendo info de TMDb ({len(tmdb_data_list)} títulos) con historial ({len(df_history)} filas)...")
+        with run_metrics.stage('merge', rows=len(df_history)):
+            catalogue = TitleCatalogue.from_records(tmdb_data_list)
+            logging.info(f"Creado catálogo TMDb con {len(catalogue)} títulos y {len(catalogue.columns)} columnas "
+                         f"({catalogue.nbytes() / 1024 / 1024:.1f} MB).")
+            df_final = merge_tmdb_data(df_history, catalogue)
         logging.info(f"¡Unión completada! Tabla final: {len(df_final)} filas, {len(df_final.columns)} columnas.")
         enriched_rows = df_final['tmdb_id'].notna().sum()
         logging.info(f"Filas del historial enriquecidas: {enriched_rows} (de {len(df_history)})")
-        logging.debug(f"Primeras filas df_final:\n{df_final.head()}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Primeras filas df_final:\n%s", df_final.head())
+    if df_existing_kept is not None:
+        df_final = pd.concat([df_existing_kept, df_final], ignore_index=True)
+        logging.info(f"Modo incremental: salida combinada con {len(df_final)} filas.")
 
-    # PASO 6: Guardar Resultado Final
-    logging.info(f"PASO 6: Guardando resultado final en {PROCESSED_DATA_PATH}...")
+    # PASO 6: Guardar Resultado Final (exportación del almacén a archivo; se omite con --no-export)
+    if export:
+        logging.info(f"PASO 6: Guardando resultado final ({output_format}) en {PROCESSED_DATA_PATH}...")
+        try:
+            # Escritura atómica: temporal + rename, nunca queda un archivo final a medias
+            with run_metrics.stage('write', rows=len(df_final)):
+                saved_path = write_table(df_final, PROCESSED_DATA_PATH, output_format, schema=ENRICHED_SCHEMA)
+            logging.info(f"¡Éxito! Datos enriquecidos guardados en {saved_path}.")
+        except Exception as e:
+            logging.error(f"Error al guardar CSV final: {e}")
+            return
+    else:
+        logging.info(f"PASO 6: Exportación omitida; los datos están en el almacén {STORE_PATH}.")
+    # El diario solo hace falta mientras la salida final no está escrita
+    if os.path.exists(JOURNAL_PATH):
+        os.remove(JOURNAL_PATH)
     try:
-        os.makedirs(os.path.dirname(PROCESSED_DATA_PATH), exist_ok=True)
-        df_final.to_csv(PROCESSED_DATA_PATH, index=False, encoding='utf-8')
-        logging.info(f"¡Éxito! Datos enriquecidos guardados.")
+        save_watermark(WATERMARK_PATH, build_watermark(df_history_full))
+        logging.debug(f"Marca de agua actualizada en {WATERMARK_PATH}")
     except Exception as e:
-        logging.error(f"Error al guardar CSV final: {e}")
+        logging.warning(f"No se pudo actualizar la marca de agua ({e}). La próxima ejecución incremental será completa.")
     logging.info("\n--- Proceso ETL completado ---")
 
+def _parse_args(argv=None):
+    try:
+        from scripts.data_io import OUTPUT_FORMATS
+    except ImportError:
+        from data_io import OUTPUT_FORMATS
+    parser = argparse.ArgumentParser(description="ETL del historial de Netflix enriquecido con TMDb.")
+    parser.add_argument('--workers', type=int, default=ENRICHMENT_WORKERS,
+                        help="Hilos concurrentes para el enriquecimiento (1 = secuencial).")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché persistente de TMDb.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Procesar solo las filas nuevas desde la última ejecución y fusionarlas con la salida previa.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanudar una ejecución interrumpida saltando los títulos ya registrados en el diario.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Leer y escribir el historial por bloques sin cargarlo entero en memoria.")
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='csv',
+                        help="Formato de la salida enriquecida (parquet guarda tipos explícitos y necesita pyarrow).")
+    parser.add_argument('--memory-budget-mb', type=int, default=None,
+                        help="Presupuesto de memoria para el modo streaming (MB; por defecto STREAMING_MEMORY_BUDGET_MB de streaming.py).")
+    parser.add_argument('--metrics-report', dest='metrics_path', default=None,
+                        help="Ruta del informe JSON de métricas de la ejecución.")
+    parser.add_argument('--profile', dest='profile_path', default=None,
+                        help="Guardar un perfil cProfile de la ejecución en esta ruta (.prof).")
+    parser.add_argument('--fuzzy-threshold', type=float, default=FUZZY_MATCH_THRESHOLD,
+                        help="Similitud mínima (0-1) para resolver un título con el índice local de títulos ya vistos (0 lo desactiva).")
+    parser.add_argument('--failure-backoff-days', type=float, default=FAILURE_BACKOFF_DAYS,
+                        help="Días que se salta un título sin coincidencia en TMDb tras su primer fallo; se duplica con cada "
+                             "fallo (0 = buscarlos siempre). Los fallos se guardan en el almacén local.")
+    parser.add_argument('--snapshot', dest='snapshot_paths', action='append', default=[], metavar='PATH',
+                        help="Volcado JSON lines (.json o .json.gz) de TMDb con id, título, título original, popularidad y "
+                             "tipo para resolver los títulos sin búsquedas en la API. Puede repetirse (películas y series).")
+    parser.add_argument('--offline', action='store_true',
+                        help="No usar la API de TMDb: solo caché e instantáneas (--snapshot). No necesita TMDB_API_KEY.")
+    parser.add_argument('--no-store', action='store_true',
+                        help="No actualizar el almacén local SQLite (data/processed/netflix_store.sqlite).")
+    parser.add_argument('--no-export', action='store_true',
+                        help="Guardar solo en el almacén local, sin reescribir el archivo enriquecido.")
+    parser.add_argument('--diagnostic', action='store_true',
+                        help="Hacer una búsqueda de prueba ('Inception') antes del ETL para comprobar la API key y la red.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    run_netflix_etl(use_cache=not args.no_cache, max_workers=args.workers, incremental=args.incremental, resume=args.resume,
+                    streaming=args.streaming, memory_budget_mb=args.memory_budget_mb, output_format=args.output_format,
+                    metrics_path=args.metrics_path, profile_path=args.profile_path, diagnostic=args.diagnostic,
+                    fuzzy_threshold=args.fuzzy_threshold, use_store=not args.no_store, export=not args.no_export,
+                    failure_backoff_days=args.failure_backoff_days, snapshot_paths=args.snapshot_paths, offline=args.offline)
+
 if __name__ == "__main__":
-    run_netflix_etl()
\ No newline at end of file
+    setup_entry_point()
+    main()
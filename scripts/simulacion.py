@@ -0,0 +1,65 @@
+# --- simulacion.py ---
+# Simulación vectorizada (NumPy) de las columnas que no vienen en los datos: tiempo visto y,
+# para el modo de demostración sin datos enriquecidos, los campos de TMDb.
+# Todo sale de un numpy.random.Generator con semilla: misma semilla, mismos datos.
+
+import numpy as np
+import pandas as pd
+
+# --- Constantes y Parámetros ---
+SEMILLA_SIMULACION = 42
+# Fracción vista de la duración: películas 70-100 %, episodios de series 80-100 %
+FRACCION_VISTA_PELICULA = (0.7, 1.0)
+FRACCION_VISTA_SERIE = (0.8, 1.0)
+GENEROS_DEMO = ['Drama', 'Comedy', 'Action', 'Thriller', 'Romance', 'Sci-Fi', 'Horror', 'Documentary']
+PROPORCION_SERIES_DEMO = 0.7
+DURACION_SERIE_DEMO = (20, 60)      # minutos, extremo superior excluido
+DURACION_PELICULA_DEMO = (80, 180)
+
+
+def crear_generador(semilla=SEMILLA_SIMULACION):
+    return np.random.default_rng(semilla)
+
+
+def simular_tiempo_visto(duracion, tipo_medio=None, rng=None):
+    """
+    Minutos vistos por visualización: duración × fracción aleatoria según el tipo (redondeado).
+    Nulo si la duración falta o es 0. Devuelve una Series Int64 con el índice de `duracion`.
+    """
+    rng = rng if rng is not None else crear_generador()
+    duracion = pd.to_numeric(pd.Series(duracion), errors='coerce')
+    minutos = duracion.to_numpy(dtype=float, na_value=np.nan)
+    if tipo_medio is None:
+        es_pelicula = np.zeros(len(minutos), dtype=bool)
+    else:
+        es_pelicula = (pd.Series(tipo_medio).astype(object) == 'movie').to_numpy()
+    bajo = np.where(es_pelicula, FRACCION_VISTA_PELICULA[0], FRACCION_VISTA_SERIE[0])
+    alto = np.where(es_pelicula, FRACCION_VISTA_PELICULA[1], FRACCION_VISTA_SERIE[1])
+    visto = np.round(minutos * rng.uniform(bajo, alto))
+    visto[np.isnan(minutos) | (minutos == 0)] = np.nan
+    return pd.Series(visto, index=duracion.index).astype('Int64')
+
+
+def simular_datos_tmdb(df, rng=None):
+    """Rellena en bloque las columnas de TMDb de un historial sin enriquecer (modo de demostración)."""
+    rng = rng if rng is not None else crear_generador()
+    n = len(df)
+    df['ID_TMDb'] = rng.integers(1000, 10000, size=n)
+    df['Titulo_TMDb'] = df['Titulo_Limpio_Busqueda']
+
+    # Uno o dos géneros distintos por fila
+    generos = np.array(GENEROS_DEMO, dtype=object)
+    primero = rng.integers(0, len(generos), size=n)
+    segundo = (primero + rng.integers(1, len(generos), size=n)) % len(generos)
+    dos_generos = rng.random(n) < 0.5
+    df['Generos_TMDb'] = np.where(dos_generos, generos[primero] + ', ' + generos[segundo], generos[primero])
+
+    df['Popularidad_TMDb'] = rng.uniform(10, 100, size=n)
+    df['Calificacion_Promedio_TMDb'] = rng.uniform(5, 9, size=n)
+    df['Cantidad_Votos_TMDb'] = rng.integers(100, 20000, size=n)
+    es_serie = rng.random(n) < PROPORCION_SERIES_DEMO
+    df['Tipo_Medio_TMDb'] = np.where(es_serie, 'tv', 'movie')
+    df['Fecha_Estreno_TMDb'] = pd.to_datetime('2015-01-01') + pd.to_timedelta(rng.integers(0, 365 * 5, size=n), unit='D')
+    df['Duracion_Minutos_TMDb'] = np.where(es_serie, rng.integers(*DURACION_SERIE_DEMO, size=n),
+                                           rng.integers(*DURACION_PELICULA_DEMO, size=n))
+    return df
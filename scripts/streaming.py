@@ -0,0 +1,43 @@
+# --- streaming.py ---
+# Lectura por bloques del historial para procesar exportaciones más grandes que la RAM
+# con un presupuesto de memoria configurable
+
+import logging
+
+import pandas as pd
+
+# --- Constantes y Parámetros ---
+STREAMING_MEMORY_BUDGET_MB = 256
+SAMPLE_ROWS = 5000
+MIN_CHUNK_ROWS = 1000
+# Copias intermedias por bloque (normalización + resultado de la unión)
+CHUNK_OVERHEAD_FACTOR = 3
+
+
+def estimate_chunksize(csv_path, memory_budget_mb, extra_bytes_per_row=0, reserved_bytes=0,
+                       sample_rows=SAMPLE_ROWS, overhead_factor=CHUNK_OVERHEAD_FACTOR):
+    """
+    Calcula cuántas filas caben en un bloque a partir de una muestra del CSV.
+    `extra_bytes_per_row` cubre las columnas añadidas en la unión con TMDb y
+    `reserved_bytes` la memoria ya ocupada (p. ej. la tabla de búsqueda de TMDb).
+    """
+    sample = pd.read_csv(csv_path, nrows=sample_rows)
+    if sample.empty:
+        return MIN_CHUNK_ROWS
+    bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+    row_cost = (bytes_per_row + extra_bytes_per_row) * overhead_factor
+    available_bytes = memory_budget_mb * 1024 * 1024 - reserved_bytes
+    if available_bytes <= 0:
+        logging.warning(f"El presupuesto de {memory_budget_mb} MB no cubre la tabla de búsqueda. "
+                        f"Se usarán bloques mínimos de {MIN_CHUNK_ROWS} filas.")
+        return MIN_CHUNK_ROWS
+    return max(MIN_CHUNK_ROWS, int(available_bytes / row_cost))
+
+
+def iter_history_chunks(csv_path, chunksize, normalize_chunk):
+    """Itera el historial por bloques ya normalizados; devuelve (bloque, filas leídas antes de limpiar)."""
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        if 'Title' not in chunk.columns or 'Date' not in chunk.columns:
+            raise ValueError("El CSV debe contener 'Title' y 'Date'.")
+        raw_rows = len(chunk)
+        yield normalize_chunk(chunk), raw_rows
@@ -0,0 +1,121 @@
+# --- title_catalogue.py ---
+# Catálogo TMDb compacto para unirlo al historial: cada título tiene una clave entera (su posición),
+# los textos repetidos se guardan una vez como categorías (un código entero por título) y la unión es
+# un `take` por posición en lugar de un merge por string. Los géneros se guardan como lista ordenada de
+# códigos sobre un vocabulario (offsets + códigos) y solo se vuelven a unir como texto al sacarlos.
+
+import numpy as np
+import pandas as pd
+
+# --- Constantes y Parámetros ---
+KEY_COLUMN = 'search_title_query'
+INTEGER_COLUMNS = ('tmdb_id', 'tmdb_vote_count', 'tmdb_runtime_minutes')
+GENRES_COLUMN = 'tmdb_genres'
+GENRE_SEPARATOR = ', '  # Igual que tmdb_record_from_details
+
+
+def encode_genres(values):
+    """
+    Textos 'Drama, Crime' -> (offsets, códigos, vocabulario): los géneros del título i son
+    vocabulario[códigos[offsets[i]:offsets[i + 1]]], en el orden de TMDb. Sin géneros = lista vacía.
+    """
+    text_codes, texts = pd.factorize(pd.Series(values, dtype=object))
+    vocabulary = {}
+    lists = [[vocabulary.setdefault(name.strip(), len(vocabulary)) for name in str(text).split(',') if name.strip()]
+             for text in texts]
+    # Cada texto distinto se parte una vez; las entradas reciben la lista de su texto
+    lists.append([])  # código -1 (nulo)
+    per_entry = [lists[code] for code in text_codes]
+    lengths = np.fromiter((len(codes) for codes in per_entry), dtype=np.int32, count=len(per_entry))
+    offsets = np.zeros(len(per_entry) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    codes = np.fromiter((code for codes in per_entry for code in codes), dtype=np.int16, count=int(offsets[-1]))
+    return offsets, codes, pd.Index(list(vocabulary), dtype=object)
+
+
+def decode_genres(offsets, codes, vocabulary, positions):
+    """Texto de géneros de cada posición (None si no tiene), en el orden guardado."""
+    names = vocabulary.to_numpy()
+    return [GENRE_SEPARATOR.join(names[codes[offsets[i]:offsets[i + 1]]]) or None for i in positions]
+
+
+class TitleCatalogue:
+    """
+    Tabla TMDb en formato columnar, una entrada por search_title_query (gana la primera).
+    Textos: códigos int32 + valores únicos. Números: Int64 para ids y recuentos, float64 el resto.
+    """
+
+    def __init__(self, keys, columns):
+        self.keys = pd.Index(keys, dtype=object)
+        # nombre -> ('text', códigos, categorías) | ('number', array) | ('genres', offsets, códigos, vocabulario)
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_records(cls, records):
+        return cls.from_frame(pd.DataFrame([record for record in records if record]))
+
+    @classmethod
+    def from_frame(cls, df_tmdb_data):
+        """Construye el catálogo desde la tabla de registros TMDb (columnas search_title_query + tmdb_*)."""
+        if df_tmdb_data is None or df_tmdb_data.empty or KEY_COLUMN not in df_tmdb_data.columns:
+            return cls([], {})
+        df = df_tmdb_data[df_tmdb_data[KEY_COLUMN].notna()].drop_duplicates(subset=KEY_COLUMN)
+        columns = {}
+        for col in df.columns:
+            if col == KEY_COLUMN:
+                continue
+            values = df[col]
+            if col == GENRES_COLUMN:
+                columns[col] = ('genres',) + encode_genres(values)
+            elif col in INTEGER_COLUMNS:
+                columns[col] = ('number', pd.to_numeric(values, errors='coerce').round().astype('Int64').array)
+            elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                columns[col] = ('number', values.to_numpy(dtype='float64', na_value=np.nan))
+            else:
+                codes, categories = pd.factorize(values.astype(object))
+                columns[col] = ('text', codes.astype(np.int32), categories)
+        return cls(df[KEY_COLUMN].astype(str).to_numpy(), columns)
+
+    def positions(self, title_keys):
+        """Posición en el catálogo (-1 si no está) de cada clave; el hash solo se hace sobre las claves distintas."""
+        codes, uniques = pd.factorize(pd.Series(title_keys, dtype=object))
+        # El código -1 (clave nula) cae en el -1 añadido al final
+        return np.append(self.keys.get_indexer(uniques), -1)[codes]
+
+    def take(self, positions):
+        """Columnas TMDb para cada posición (-1 = sin datos); los textos salen como categóricos."""
+        positions = np.asarray(positions, dtype=np.intp)
+        taken = {}
+        for col, stored in self.columns.items():
+            if stored[0] == 'number':
+                taken[col] = pd.api.extensions.take(stored[1], positions, allow_fill=True)
+            elif stored[0] == 'genres':
+                # Solo se decodifican los títulos presentes; el resultado es un categórico como el resto de textos
+                found = positions >= 0
+                present_codes, present = pd.factorize(positions[found])
+                text_codes, texts = pd.factorize(pd.Series(decode_genres(*stored[1:], present), dtype=object))
+                codes = np.full(len(positions), -1, dtype=np.int32)
+                codes[found] = text_codes[present_codes]
+                taken[col] = pd.Categorical.from_codes(codes, categories=texts)
+            else:
+                codes = np.append(stored[1], np.int32(-1))[positions]
+                taken[col] = pd.Categorical.from_codes(codes, categories=stored[2])
+        return pd.DataFrame(taken, index=pd.RangeIndex(len(positions)))
+
+    def nbytes(self):
+        total = self.keys.memory_usage(deep=True)
+        for stored in self.columns.values():
+            total += stored[1].nbytes
+            if stored[0] == 'text':
+                total += stored[2].memory_usage(deep=True)
+            elif stored[0] == 'genres':
+                total += stored[2].nbytes + stored[3].memory_usage(deep=True)
+        return int(total)
+
+    def bytes_per_joined_row(self):
+        """Bytes que añade la unión a cada fila del historial: un código o un valor por columna."""
+        return sum(stored[1].dtype.itemsize + 1 if stored[0] == 'number' else np.dtype(np.int32).itemsize
+                   for stored in self.columns.values())
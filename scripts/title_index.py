@@ -0,0 +1,120 @@
+# --- title_index.py ---
+# Índice local de títulos ya vistos en TMDb (título buscado, tmdb_title y tmdb_original_title)
+# con claves normalizadas sin acentos y trigramas, para resolver títulos nuevos o fallidos sin llamar a la API.
+# Los trigramas se cuentan como multiconjunto: una palabra repetida ('Mirror Mirror') no se confunde con una sola.
+
+import re
+import unicodedata
+from collections import Counter
+
+# --- Constantes y Parámetros ---
+FUZZY_MATCH_THRESHOLD = 0.885  # Similitud mínima (Dice sobre trigramas); un plural en un título corto se queda en 0.88
+MIN_TITLE_LENGTH = 4           # Por debajo, solo se acepta coincidencia exacta normalizada
+MIN_LENGTH_RATIO = 0.8         # Longitud mínima del título más corto respecto al más largo
+INDEXED_FIELDS = ('search_title_query', 'tmdb_title', 'tmdb_original_title')
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_ROMAN_NUMERAL = re.compile(r'^(?=[ivxlc])(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$')
+_ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10, 'l': 50, 'c': 100}
+
+
+def normalize_title(title):
+    """Minúsculas, sin acentos ni signos de puntuación y con espacios simples: 'Élite ¡Ya!' -> 'elite ya'."""
+    if not isinstance(title, str):
+        return ''
+    folded = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALNUM.sub(' ', folded.lower()).strip()
+
+
+def trigrams(normalized):
+    """Multiconjunto (Counter) de trigramas del título normalizado."""
+    padded = f"  {normalized} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def same_word_order(key, candidate):
+    """Las palabras que comparten ambos títulos aparecen en el mismo orden ('mar money' no es 'money mar')."""
+    shared = set(key.split()) & set(candidate.split())
+    in_key = [word for word in dict.fromkeys(key.split()) if word in shared]
+    in_candidate = [word for word in dict.fromkeys(candidate.split()) if word in shared]
+    return in_key == in_candidate
+
+
+def number_tokens(normalized):
+    """Números del título normalizado (arábigos y romanos) como enteros: 'rocky ii' y 'rocky 2' -> (2,)."""
+    numbers = []
+    for word in normalized.split():
+        if word.isdigit():
+            numbers.append(int(word))
+        elif _ROMAN_NUMERAL.match(word):
+            values = [_ROMAN_VALUES[char] for char in word]
+            numbers.append(sum(-v if v < nxt else v for v, nxt in zip(values, values[1:] + [0])))
+    return tuple(numbers)
+
+
+class TitleIndex:
+    """
+    Índice invertido trigrama -> títulos. Cada título indexado apunta al registro
+    TMDb completo del que salió, así una coincidencia local devuelve los mismos datos
+    que habría devuelto la API.
+    """
+
+    def __init__(self, threshold=FUZZY_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._records = {}     # título normalizado -> registro TMDb
+        self._grams = {}       # título normalizado -> Counter de trigramas
+        self._postings = {}    # trigrama -> conjunto de títulos normalizados
+
+    def __len__(self):
+        return len(self._records)
+
+    @classmethod
+    def from_records(cls, records, threshold=FUZZY_MATCH_THRESHOLD):
+        index = cls(threshold)
+        for record in records:
+            index.add(record)
+        return index
+
+    def add(self, record):
+        """Indexa el registro por cada uno de sus títulos; el primero que llega para una clave se queda."""
+        if not record or record.get('tmdb_id') is None:
+            return
+        for field in INDEXED_FIELDS:
+            key = normalize_title(record.get(field))
+            if not key or key in self._records:
+                continue
+            self._records[key] = record
+            grams = trigrams(key)
+            self._grams[key] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def lookup(self, title):
+        """Devuelve (registro, similitud) del título indexado más parecido por encima del umbral, o None."""
+        key = normalize_title(title)
+        if not key:
+            return None
+        if key in self._records:
+            return self._records[key], 1.0
+        if len(key) < MIN_TITLE_LENGTH:
+            return None
+        grams = trigrams(key)
+        size = sum(grams.values())
+        shared = Counter()
+        for gram, count in grams.items():
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += min(count, self._grams[candidate][gram])
+        # Las secuelas se parecen mucho entre sí ('Misión imposible 3' / '2'): solo valen candidatos con los mismos números.
+        # Tampoco los de longitud muy distinta ni los que cambian el orden de las palabras.
+        numbers = number_tokens(key)
+        best_key, best_score = None, 0.0
+        for candidate, common in shared.items():
+            if (number_tokens(candidate) != numbers or min(len(key), len(candidate)) < MIN_LENGTH_RATIO * max(len(key), len(candidate))
+                    or not same_word_order(key, candidate)):
+                continue
+            score = 2.0 * common / (size + sum(self._grams[candidate].values()))
+            if score > best_score or (score == best_score and candidate < best_key):  # Desempate estable
+                best_key, best_score = candidate, score
+        if best_key is None or best_score < self.threshold:
+            return None
+        return self._records[best_key], best_score
@@ -0,0 +1,50 @@
+# --- title_normalization.py ---
+# Normalización vectorizada de títulos de Netflix: reconoce los sufijos de temporada, parte
+# y episodio ("Serie: Temporada 2: Episodio") y se queda con el nombre de la serie como clave de búsqueda.
+# Se trabaja sobre los títulos distintos y el resultado se reparte a las filas con factorize (O(títulos únicos)).
+
+import re
+
+import pandas as pd
+
+# Segmentos que marcan el inicio de la parte "temporada/episodio" de un título. Los números romanos solo
+# cuentan en mayúsculas ((?-i:...) anula IGNORECASE) y tras una palabra explícita; las abreviaturas T/S
+# solo con dígitos ("T1", "S2"), para que "Six" o "TV" no se lean como S + IX o T + V.
+_NUMERO = r'(?:\d+|(?-i:[IVXLC]+)|uno|dos|tres|cuatro|cinco|one|two|three|four|five)'
+SEASON_MARKERS = (
+    rf'(?:temporada|season|parte|part|volumen|volume|vol\.?|libro|book|cap[ií]tulo|chapter|episodio|episode|serie|series|'
+    rf'colecci[oó]n|collection)\s*{_NUMERO}\b'
+    r'|[ts]\s*\d+\b'
+    r'|\d+(?:\.?ª|ª|º|st|nd|rd|th)?\s*(?:temporada|season|parte|part)\b'
+    r'|temporada\s+[uú]nica|miniserie|miniseries|serie\s+limitada|limited\s+series'
+)
+# El nombre de la serie es el prefijo más corto que va seguido de un segmento marcador
+_SHOW_BEFORE_MARKER = re.compile(rf'^(?P<show>.+?)\s*:\s*(?:{SEASON_MARKERS})\s*(?::|$)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s{2,}|[\t\n\r\f\v]')  # Solo lo que hay que cambiar: más rápido que \s+
+
+
+def canonical_title_keys(titles):
+    """
+    Clave de búsqueda TMDb para cada título (Series de títulos, idealmente ya únicos):
+    - con un segmento de temporada/parte/episodio en la posición i > 0, la clave son los segmentos anteriores
+      ("Star Wars: The Clone Wars: Temporada 1: ..." -> "Star Wars: The Clone Wars");
+    - sin marcador, la clave es el primer segmento, como hasta ahora ("Dark: Secretos" -> "Dark").
+    """
+    titles = pd.Series(titles, dtype=object).fillna('').astype(str).str.replace(_WHITESPACE, ' ', regex=True).str.strip()
+    show_names = titles.str.extract(_SHOW_BEFORE_MARKER, expand=False)
+    first_segment = titles.str.split(':', n=1).str[0]
+    return show_names.fillna(first_segment).str.strip()
+
+
+def build_title_mapping(raw_titles):
+    """Tabla de correspondencia título original -> clave canónica, una fila por título distinto."""
+    unique_titles = pd.Series(pd.unique(pd.Series(raw_titles, dtype=object).fillna('').astype(str)), dtype=object)
+    return pd.DataFrame({'Title': unique_titles, 'Title_Cleaned_For_API': canonical_title_keys(unique_titles)})
+
+
+def map_canonical_titles(raw_titles):
+    """Devuelve la clave canónica de cada fila normalizando solo los títulos distintos."""
+    codes, uniques = pd.factorize(pd.Series(raw_titles).fillna('').astype(str))
+    keys = canonical_title_keys(pd.Series(uniques, dtype=object)).to_numpy()
+    index = raw_titles.index if isinstance(raw_titles, pd.Series) else None
+    return pd.Series(keys[codes], index=index, dtype=object)
@@ -0,0 +1,121 @@
+# --- tmdb_cache.py ---
+# Caché persistente (SQLite) de respuestas de TMDb para no repetir búsquedas entre ejecuciones
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# --- Constantes y Parámetros ---
+CACHE_TTL_SECONDS = 30 * 24 * 3600       # Aciertos: 30 días
+CACHE_MISS_TTL_SECONDS = 7 * 24 * 3600   # Títulos sin coincidencia: 7 días
+CACHE_MAX_ENTRIES = 50000
+
+# Marca para distinguir "no está en caché" de "está en caché como fallo (None)"
+CACHE_MISS = object()
+
+
+class TMDbCache:
+    """
+    Caché clave/valor en SQLite con TTL por entrada, límite de tamaño con
+    desalojo LRU y contadores de aciertos/fallos.
+    Un valor None representa un título que TMDb no pudo resolver.
+    """
+
+    def __init__(self, db_path, ttl_seconds=CACHE_TTL_SECONDS, miss_ttl_seconds=CACHE_MISS_TTL_SECONDS,
+                 max_entries=CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tmdb_cache (
+                cache_key   TEXT PRIMARY KEY,
+                value       TEXT,
+                expires_at  REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tmdb_cache_last_access ON tmdb_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Devuelve el valor guardado (puede ser None) o CACHE_MISS si no existe o expiró."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM tmdb_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM tmdb_cache WHERE cache_key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return CACHE_MISS
+            self._conn.execute("UPDATE tmdb_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0]) if row[0] is not None else None
+
+    def contains(self, key):
+        """Comprueba si hay una entrada vigente sin tocar contadores ni el orden LRU."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tmdb_cache WHERE cache_key = ? AND expires_at >= ?", (key, time.time())).fetchone()
+        return row is not None
+
+    def cached_records(self):
+        """Todos los aciertos vigentes (sin los 'sin coincidencia'), sin tocar contadores ni el orden LRU."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM tmdb_cache WHERE value IS NOT NULL AND expires_at >= ?", (time.time(),)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def set(self, key, value, ttl_seconds=None):
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds if value is not None else self.miss_ttl_seconds
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False, default=str) if value is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tmdb_cache (cache_key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now + ttl_seconds, now))
+            self._evict_if_needed()
+            self._conn.commit()
+
+    def _evict_if_needed(self):
+        # Se llama con el lock tomado
+        if not self.max_entries:
+            return
+        total = self._conn.execute("SELECT COUNT(*) FROM tmdb_cache").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM tmdb_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM tmdb_cache ORDER BY last_access ASC LIMIT ?)", (excess,))
+            logging.debug(f"Caché TMDb: desalojadas {excess} entradas (LRU).")
+
+    def purge_expired(self):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM tmdb_cache WHERE expires_at < ?", (time.time(),)).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
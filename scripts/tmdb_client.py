@@ -0,0 +1,148 @@
+# --- tmdb_client.py ---
+# Cliente HTTP propio para la API v3 de TMDb: una sola sesión con pool de conexiones keep-alive,
+# timeouts por petición, reintentos con backoff exponencial + jitter y respeto de Retry-After en los 429.
+# Con un limitador (rate_limiter, p. ej. enrichment.TokenBucket) cada intento, reintentos incluidos, consume un token.
+# Expone la misma interfaz que usábamos de tmdbv3api (TMDb, Search().multi, Movie/TV().details).
+
+import logging
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+
+import requests
+import requests.exceptions
+from requests.adapters import HTTPAdapter
+
+# --- Constantes y Parámetros ---
+TMDB_BASE_URL = 'https://api.themoviedb.org/3'
+CONNECT_TIMEOUT_SECONDS = 3.05
+READ_TIMEOUT_SECONDS = 10
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30
+MAX_RETRY_AFTER_SECONDS = 60
+POOL_SIZE = 10
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_DETAILS_PATH = re.compile(r'^/(movie|tv)/\d+$')
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS, rng=random):
+    """Backoff exponencial con jitter completo: uniforme en [0, min(cap, base * 2^attempt)]."""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value, now=None):
+    """Segundos a esperar según la cabecera Retry-After (segundos o fecha HTTP), o None si no es válida."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+def endpoint_label(path):
+    """Nombre estable del endpoint para métricas: '/movie/603' -> 'movie/details'."""
+    match = _DETAILS_PATH.match(path)
+    return f"{match.group(1)}/details" if match else path.strip('/')
+
+
+class TMDb:
+    """
+    Configuración y transporte compartidos por Search, Movie y TV.
+    Todas las peticiones pasan por la misma requests.Session, así las conexiones TLS
+    se reutilizan (keep-alive) en lugar de abrir una nueva por llamada.
+    """
+
+    def __init__(self, api_key, base_url=TMDB_BASE_URL, timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS),
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE_SECONDS, backoff_max=BACKOFF_MAX_SECONDS,
+                 pool_size=POOL_SIZE, run_metrics=None, session=None, sleep=time.sleep, rate_limiter=None):
+        if not api_key:
+            raise ValueError("Se necesita una API key de TMDb")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.run_metrics = run_metrics
+        self.rate_limiter = rate_limiter  # Objeto con acquire(), compartido por todos los hilos
+        self._sleep = sleep
+        if session is None:
+            session = requests.Session()
+            # Un pool por host con tantas conexiones como hilos de enriquecimiento; los reintentos los hacemos aquí
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    def _retry_delay(self, response, attempt):
+        if response is not None and response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, MAX_RETRY_AFTER_SECONDS)
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max)
+
+    def get(self, path, params=None):
+        """
+        GET con reintentos solo para errores transitorios (red, timeout, 429 y 5xx).
+        Devuelve el JSON decodificado; si se agotan los intentos o el error no es
+        recuperable (p. ej. 401/404) lanza la excepción de requests correspondiente.
+        """
+        url = self.base_url + path
+        query = {'api_key': self.api_key, **(params or {})}
+        endpoint = endpoint_label(path)
+        for attempt in range(self.max_retries):
+            response = None
+            try:
+                if self.rate_limiter is not None: self.rate_limiter.acquire()
+                response = self.session.get(url, params=query, timeout=self.timeout)
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.exceptions.HTTPError(f"{response.status_code} para {url}", response=response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            if self.run_metrics is not None: self.run_metrics.record_error(endpoint)
+            if attempt == self.max_retries - 1:
+                raise error
+            delay = self._retry_delay(response, attempt)
+            logging.warning(f"TMDb {endpoint}: {error} (intento {attempt + 1}/{self.max_retries}). "
+                            f"Reintentando en {delay:.2f} s...")
+            if self.run_metrics is not None: self.run_metrics.record_retry(endpoint)
+            self._sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+class _TMDbApi:
+    def __init__(self, tmdb):
+        self.tmdb = tmdb
+
+
+class Search(_TMDbApi):
+    def multi(self, params):
+        """Búsqueda multi: acepta el dict de parámetros ({'query': ..., 'language': ...})."""
+        if isinstance(params, str):
+            params = {'query': params}
+        data = self.tmdb.get('/search/multi', params)
+        return [SimpleNamespace(**result) for result in data.get('results', [])]
+
+
+class Movie(_TMDbApi):
+    def details(self, movie_id, params=None):
+        return self.tmdb.get(f'/movie/{movie_id}', params)
+
+
+class TV(_TMDbApi):
+    def details(self, tv_id, params=None):
+        return self.tmdb.get(f'/tv/{tv_id}', params)
@@ -0,0 +1,136 @@
+# --- tmdb_snapshot.py ---
+# Instantánea local de TMDb para enriquecer sin red: un volcado JSON lines (gzip o texto plano) con una
+# entrada por película o serie, como los exportes diarios de ids de TMDb (movie_ids_*.json.gz,
+# tv_series_ids_*.json.gz). Se indexa por título normalizado y tipo de medio; una búsqueda es una
+# consulta a un diccionario en memoria en lugar de una llamada a Search().multi.
+
+import gzip
+import json
+import logging
+import os
+
+try:
+    from scripts.title_index import normalize_title
+except ImportError:  # Ejecución directa desde scripts/
+    from title_index import normalize_title
+
+# --- Constantes y Parámetros ---
+SNAPSHOT_MEDIA_TYPES = ('movie', 'tv')
+# Prefijo del nombre de archivo -> tipo de medio, para las entradas sin campo media_type
+SNAPSHOT_FILE_PREFIXES = (('tv_series', 'tv'), ('tv', 'tv'), ('movie', 'movie'))
+# Una entrada con todos estos campos trae los detalles completos y no hace falta pedirlos a la API
+SNAPSHOT_DETAIL_FIELDS = ('overview', 'genres')
+SNAPSHOT_EXTRA_FIELDS = ('overview', 'genres', 'vote_average', 'vote_count', 'release_date', 'first_air_date',
+                         'runtime', 'episode_run_time')
+_EXTRA_FIELD_SET = frozenset(SNAPSHOT_EXTRA_FIELDS)
+
+
+def media_type_from_path(path):
+    """Tipo de medio deducido del nombre del exporte (tv_series_ids_... -> 'tv'); None si no se reconoce."""
+    name = os.path.basename(path).lower()
+    for prefix, media_type in SNAPSHOT_FILE_PREFIXES:
+        if name.startswith(prefix):
+            return media_type
+    return None
+
+
+def _open_snapshot(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+class TMDbSnapshot:
+    """
+    Índice (título normalizado, tipo de medio) -> (tipo de medio, id) sobre una o varias instantáneas.
+    Cada título y título original de una entrada es una clave; si varias entradas comparten clave gana la
+    más popular, igual que en el orden de resultados de la búsqueda de TMDb.
+    Por entrada se guardan solo título, título original y popularidad; los campos de detalle, si vienen.
+    """
+
+    def __init__(self):
+        self._entries = {}   # (media_type, id) -> (título, título original, popularidad)
+        self._details = {}   # (media_type, id) -> campos de detalle presentes en el volcado
+        self._index = {}     # (clave, media_type) -> (media_type, id)
+        self._best = {}      # clave -> (media_type, id) más popular entre películas y series
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def from_files(cls, paths):
+        snapshot = cls()
+        for path in paths:
+            snapshot.load(path)
+        return snapshot
+
+    def load(self, path, media_type=None):
+        """Añade las entradas de un volcado JSON lines. Devuelve cuántas se indexaron."""
+        default_media_type = media_type or media_type_from_path(path)
+        loaded = skipped = 0
+        with _open_snapshot(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                if self.add(entry, default_media_type):
+                    loaded += 1
+                else:
+                    skipped += 1
+        if skipped:
+            logging.warning(f"Instantánea {path}: {skipped} líneas sin id, tipo de medio o título se ignoran.")
+        return loaded
+
+    def add(self, entry, media_type=None):
+        """Indexa una entrada del volcado (id, title/name, original_title/original_name, popularity, media_type)."""
+        media_type = entry.get('media_type') or media_type
+        item_id = entry.get('id')
+        if media_type not in SNAPSHOT_MEDIA_TYPES or item_id is None:
+            return False
+        title = entry.get('title') or entry.get('name')
+        original_title = entry.get('original_title') or entry.get('original_name')
+        if not title and not original_title:
+            return False
+        match = (media_type, item_id)
+        popularity = entry.get('popularity') or 0.0
+        self._entries[match] = (title or original_title, original_title or title, popularity)
+        extra_fields = entry.keys() & _EXTRA_FIELD_SET  # Los exportes diarios no traen ninguno
+        if extra_fields:
+            extra = {field: entry[field] for field in extra_fields if entry[field] is not None}
+            if extra:
+                self._details[match] = extra
+        for key in {normalize_title(text) for text in {title, original_title}}:
+            if not key:
+                continue
+            if self._more_popular(match, self._index.get((key, media_type))):
+                self._index[(key, media_type)] = match
+            if self._more_popular(match, self._best.get(key)):
+                self._best[key] = match
+        return True
+
+    def _more_popular(self, match, current):
+        return current is None or self._entries[match][2] > self._entries[current][2]
+
+    def match(self, title, media_type=None):
+        """(media_type, id) del título normalizado, del tipo pedido o el más popular de ambos; None si no está."""
+        key = normalize_title(title)
+        if not key:
+            return None
+        if media_type is not None:
+            return self._index.get((key, media_type))
+        return self._best.get(key)
+
+    def has_details(self, match):
+        details = self._details.get(match, {})
+        return all(field in details for field in SNAPSHOT_DETAIL_FIELDS)
+
+    def details(self, match):
+        """Entrada con la forma de una respuesta de detalles de TMDb (solo con los campos del volcado)."""
+        title, original_title, popularity = self._entries[match]
+        title_field, original_field = ('title', 'original_title') if match[0] == 'movie' else ('name', 'original_name')
+        return {'id': match[1], title_field: title, original_field: original_title, 'popularity': popularity,
+                **self._details.get(match, {})}
@@ -0,0 +1,51 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+from unittest.mock import patch
+from scripts.batch_etl import run_batch_etl, profile_name_from_path
+from scripts.title_catalogue import TitleCatalogue
+
+class TestBatchETL(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmp_dir.name, 'raw')
+        self.output_dir = os.path.join(self.tmp_dir.name, 'out')
+        os.makedirs(self.input_dir)
+        pd.DataFrame({'Title': ['Dark: Temporada 1: Secretos', 'Roma'], 'Date': ['1/2/23', '1/1/23']}).to_csv(
+            os.path.join(self.input_dir, 'NetflixViewingHistory_ana.csv'), index=False)
+        pd.DataFrame({'Title': ['Roma', 'Inception'], 'Date': ['2/2/23', '2/1/23']}).to_csv(
+            os.path.join(self.input_dir, 'NetflixViewingHistory_luis.csv'), index=False)
+        self.patches = [
+            patch('scripts.run_etl.JOURNAL_PATH', os.path.join(self.tmp_dir.name, 'journal.jsonl')),
+            patch('scripts.run_etl.FAILED_TITLES_LOG_PATH', os.path.join(self.tmp_dir.name, 'failed.log')),
+            patch('scripts.run_etl.setup_tmdb_apis', return_value=(None, None, None)),
+            patch.dict(os.environ, {'TMDB_API_KEY': 'test_api_key'}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        self.tmp_dir.cleanup()
+
+    def test_profile_name_from_path(self):
+        self.assertEqual(profile_name_from_path('/x/NetflixViewingHistory_ana.csv'), 'ana')
+        self.assertEqual(profile_name_from_path('/x/NetflixViewingHistory.csv'), 'NetflixViewingHistory')
+
+    @patch('scripts.run_etl.fetch_tmdb_details', side_effect=lambda media_type, item_id, *a, **k: {'tmdb_id': item_id})
+    @patch('scripts.run_etl.resolve_tmdb_match', side_effect=lambda title, *a, **k: ('movie', len(title)))
+    def test_titles_enriched_once_across_profiles(self, mock_resolve, mock_fetch):
+        with patch('scripts.title_catalogue.TitleCatalogue.from_frame', wraps=TitleCatalogue.from_frame) as from_frame:
+            run_batch_etl(self.input_dir, output_dir=self.output_dir, processes=2, use_cache=False)
+        self.assertEqual(sorted(c.args[0] for c in mock_resolve.call_args_list), ['Dark', 'Inception', 'Roma'])
+        self.assertEqual(from_frame.call_count, 1)  # Un catálogo para todos los perfiles
+
+        df_ana = pd.read_csv(os.path.join(self.output_dir, 'ana_enriched.csv'))
+        df_luis = pd.read_csv(os.path.join(self.output_dir, 'luis_enriched.csv'))
+        df_all = pd.read_csv(os.path.join(self.output_dir, 'netflix_viewing_enriched_all_profiles.csv'))
+        self.assertEqual(len(df_ana), 2)
+        self.assertEqual(len(df_luis), 2)
+        self.assertEqual(df_all.groupby('Profile').size().to_dict(), {'ana': 2, 'luis': 2})
+        self.assertEqual(df_all['tmdb_id'].notna().sum(), 4)
@@ -0,0 +1,44 @@
+import unittest
+import pandas as pd
+import requests
+from benchmarks.synthetic_history import generate_history
+from benchmarks.mock_tmdb_server import MockTMDbServer
+from scripts.run_etl import add_cleaned_titles, parse_history_dates
+from scripts.tmdb_client import TMDb, Search, Movie, TV
+
+class TestSyntheticHistory(unittest.TestCase):
+    def test_history_has_netflix_shape_and_is_reproducible(self):
+        df = generate_history(2000, seed=7)
+        self.assertEqual(list(df.columns), ['Title', 'Date'])
+        self.assertEqual(len(df), 2000)
+        pd.testing.assert_frame_equal(df, generate_history(2000, seed=7))
+        # Fechas en el formato de la exportación, de más reciente a más antigua
+        dates = parse_history_dates(df['Date'])
+        self.assertFalse(dates.isna().any())
+        self.assertTrue(dates.is_monotonic_decreasing)
+        # La mayoría son episodios "Serie: Temporada: Episodio" que se agrupan al limpiar
+        self.assertGreater(df['Title'].str.count(':').ge(2).mean(), 0.5)
+        self.assertLess(add_cleaned_titles(df)['Title_Cleaned_For_API'].nunique(), df['Title'].nunique())
+
+class TestMockTMDbServer(unittest.TestCase):
+    def test_adapters_answer_search_and_details(self):
+        with MockTMDbServer(latency_seconds=0) as server:
+            tmdb = TMDb('test', base_url=server.base_url)
+            search, movie, tv = Search(tmdb), Movie(tmdb), TV(tmdb)
+            results = search.multi({'query': 'Casa Papel', 'language': 'es-ES'})
+            self.assertEqual(results, search.multi({'query': 'Casa Papel'}))  # Determinista
+            if results:
+                api = movie if results[0].media_type == 'movie' else tv
+                details = api.details(results[0].id)
+                self.assertEqual(details['id'], results[0].id)
+                self.assertTrue(details['genres'])
+            self.assertEqual(requests.get(server.base_url + '/unknown').status_code, 404)
+
+    def test_error_injection(self):
+        with MockTMDbServer(latency_seconds=0, error_rate=1.0) as server:
+            response = requests.get(server.base_url + '/movie/1')
+            self.assertIn(response.status_code, (429, 500))
+            tmdb = TMDb('test', base_url=server.base_url, max_retries=2, sleep=lambda seconds: None)
+            with self.assertRaises(requests.exceptions.HTTPError):
+                Search(tmdb).multi({'query': 'Dark'})
+            self.assertEqual(server.request_count, 1 + 2)  # 1 directa + 2 intentos del cliente
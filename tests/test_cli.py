@@ -0,0 +1,46 @@
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from scripts import cli
+
+
+def _run_python(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=cli.PROJECT_ROOT, capture_output=True, text=True,
+                          check=True).stdout.split()
+
+
+class TestCli(unittest.TestCase):
+    def test_comando_recibe_sus_opciones(self):
+        module = mock.Mock()
+        with mock.patch('scripts.cli.load_command', return_value=module) as load_command, \
+                mock.patch('scripts.cli.setup_entry_point') as setup:
+            cli.main(['-v', 'etl', '--workers', '4', '--no-store'])
+        load_command.assert_called_once_with('etl')
+        module.main.assert_called_once_with(['--workers', '4', '--no-store'])
+        setup.assert_called_once_with(10)  # -v -> DEBUG
+
+    def test_cada_comando_tiene_main(self):
+        for command in cli.COMMANDS:
+            self.assertTrue(callable(cli.load_command(command).main), command)
+
+    def test_comando_desconocido(self):
+        with mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+            cli.main(['deploy'])
+
+    def test_importar_la_cli_no_carga_dependencias_pesadas(self):
+        loaded = _run_python("import sys, scripts.cli; print('pandas' in sys.modules, 'requests' in sys.modules)")
+        self.assertEqual(loaded, ['False', 'False'])
+
+    def test_importar_run_etl_no_carga_dependencias_pesadas(self):
+        loaded = _run_python("import sys, scripts.run_etl; print('pandas' in sys.modules, 'requests' in sys.modules)")
+        self.assertEqual(loaded, ['False', 'False'])
+
+    def test_importar_los_scripts_no_configura_logging(self):
+        handlers = _run_python("import logging, scripts.run_etl, scripts.powerbi_prep; "
+                               "print(len(logging.getLogger().handlers), logging.getLogger().level)")
+        self.assertEqual(handlers, ['0', '30'])  # Sin handlers y nivel WARNING por defecto
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from scripts.cubo_agregados import (TODOS_LOS_GENEROS, construir_cubo, consultar_cubo, derivar_generos_populares,
+                                    derivar_promedio_calidad_tipo, derivar_resumen_calidad_tipo)
+from scripts.powerbi_prep import explotar_generos
+from tests.test_powerbi_prep import SAMPLE_EDA_PATH
+
+def generos_populares_referencia(df_generos):
+    # Cálculo original sobre la tabla explotada, usado como referencia para la tabla derivada del cubo
+    return df_generos.groupby('Genero').agg({
+        'Popularidad_TMDb': 'mean',
+        'Calificacion_Promedio_TMDb': 'mean',
+        'Genero': 'count'
+    }).rename(columns={'Genero': 'Conteo'}).sort_values('Conteo', ascending=False).reset_index()
+
+class TestCuboAgregados(unittest.TestCase):
+    def setUp(self):
+        df = pd.read_csv(SAMPLE_EDA_PATH)
+        extra = df.head(3).copy()
+        extra['Generos_TMDb'] = [np.nan, 'Drama, , Comedy', 'Sin género, Horror']
+        extra['Tiempo_Visualizacion'] = [np.nan, 30, 45]
+        self.df = pd.concat([df, extra]).set_index(np.arange(len(df) + 3) * 7)
+        self.cubo = construir_cubo(self.df)
+
+    def test_totales_cuentan_cada_fila_una_vez(self):
+        totales = self.cubo[self.cubo['Genero'] == TODOS_LOS_GENEROS]
+        self.assertEqual(totales['Conteo'].sum(), len(self.df))
+        self.assertEqual(totales['N_Tiempo_Visto'].sum(), self.df['Tiempo_Visualizacion'].notna().sum())
+        self.assertAlmostEqual(totales['Suma_Popularidad'].sum(), self.df['Popularidad_TMDb'].sum())
+
+    def test_tablas_resumen_derivadas_coinciden_con_groupby(self):
+        esperado = self.df.groupby('Tipo_Medio_TMDb')['Calificacion_Promedio_TMDb'].mean().reset_index()
+        assert_frame_equal(derivar_promedio_calidad_tipo(self.cubo), esperado)
+        esperado = self.df.groupby(['Tipo_Medio_TMDb', 'Calidad']).size().reset_index(name='Conteo')
+        assert_frame_equal(derivar_resumen_calidad_tipo(self.cubo), esperado)
+        esperado = generos_populares_referencia(explotar_generos(self.df))
+        assert_frame_equal(derivar_generos_populares(self.cubo), esperado)
+
+    def test_consulta_por_fecha(self):
+        obtenido = consultar_cubo(self.cubo, ['Anio', 'Mes_Num']).set_index(['Anio', 'Mes_Num'])
+        esperado = self.df.groupby(['Anio', 'Mes_Num'])['Tiempo_Visualizacion'].agg(['size', 'mean'])
+        self.assertEqual(obtenido['Conteo'].tolist(), esperado['size'].tolist())
+        np.testing.assert_allclose(obtenido['Media_Tiempo_Visto'], esperado['mean'])
+
+    def test_sin_generos(self):
+        cubo = construir_cubo(self.df.drop(columns='Generos_TMDb'))
+        self.assertEqual(set(cubo['Genero']), {TODOS_LOS_GENEROS})
+        self.assertTrue(derivar_generos_populares(cubo).empty)
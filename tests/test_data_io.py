@@ -0,0 +1,45 @@
+import unittest
+import os
+import tempfile
+import time
+import pandas as pd
+from scripts.data_io import ENRICHED_SCHEMA, POWERBI_SCHEMA, apply_schema, find_existing_table, read_table, write_table
+
+class TestColumnarOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base_path = os.path.join(self.tmp_dir.name, 'netflix_viewing_enriched.csv')
+        self.df = pd.DataFrame({
+            'Title': ['Dark: Temporada 1', 'Roma'],
+            'Date': ['2023-01-02', '2023-01-01'],
+            'tmdb_id': [70523.0, None],
+            'tmdb_vote_count': ['5000', None],
+            'tmdb_media_type': ['tv', 'movie'],
+            'tmdb_runtime_minutes': [53.0, 135.0],
+        })
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parquet_roundtrip_keeps_schema_types(self):
+        path = write_table(self.df, self.base_path, 'parquet', schema=ENRICHED_SCHEMA)
+        self.assertTrue(path.endswith('.parquet'))
+        df_read = read_table(path)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df_read['Date']))
+        self.assertEqual(str(df_read['tmdb_id'].dtype), 'Int64')
+        self.assertEqual(str(df_read['tmdb_vote_count'].dtype), 'Int64')
+        self.assertIsInstance(df_read['tmdb_media_type'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.isna(df_read['tmdb_id'].iloc[1]))
+
+    def test_find_existing_table_prefers_latest(self):
+        self.assertIsNone(find_existing_table(self.base_path))
+        write_table(self.df, self.base_path, 'csv')
+        time.sleep(0.01)
+        parquet_path = write_table(self.df, self.base_path, 'parquet', schema=ENRICHED_SCHEMA)
+        self.assertEqual(find_existing_table(self.base_path), parquet_path)
+
+    def test_apply_schema_does_not_mutate_input(self):
+        df = pd.DataFrame({'Mes': ['Marzo', 'Enero'], 'Calidad': ['Alta', 'Baja']})
+        typed = apply_schema(df, POWERBI_SCHEMA)
+        self.assertEqual(typed['Mes'].sort_values().tolist(), ['Enero', 'Marzo'])
+        self.assertNotIsInstance(df['Mes'].dtype, pd.CategoricalDtype)
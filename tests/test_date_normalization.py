@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from scripts.date_normalization import DateNormalizer, detect_date_format
+from scripts.run_etl import EXPECTED_DATE_FORMAT, parse_history_dates
+
+class TestDateNormalization(unittest.TestCase):
+    def test_detects_locale_format_from_sample(self):
+        self.assertEqual(detect_date_format(['1/2/23', '12/31/22']), '%m/%d/%y')
+        self.assertEqual(detect_date_format(['1/2/23', '31/12/22']), '%d/%m/%y')
+        self.assertEqual(detect_date_format(['31.12.2022']), '%d.%m.%Y')
+        self.assertIsNone(detect_date_format(['sin fecha']))
+
+    def test_parses_unique_values_and_keeps_index(self):
+        values = pd.Series(['1/2/23', ' 1/2/23', None, '2023-05-01', 'xx', '12/31/22'], index=[5, 3, 9, 1, 7, 2])
+        normalizer = DateNormalizer(EXPECTED_DATE_FORMAT)
+        dates = normalizer.parse(values)
+        self.assertEqual(dates.index.tolist(), [5, 3, 9, 1, 7, 2])
+        self.assertEqual(dates.dropna().dt.strftime('%Y-%m-%d').tolist(), ['2023-01-02', '2023-01-02', '2023-05-01', '2022-12-31'])
+        self.assertEqual(normalizer.date_format, '%m/%d/%y')
+        self.assertEqual(normalizer.stats, {'rows': 6, 'unique_values': 4, 'fallback_values': 1, 'invalid_rows': 2})
+
+    def test_seen_texts_are_not_parsed_again(self):
+        normalizer = DateNormalizer()
+        normalizer.parse(pd.Series(['1/2/23', '1/3/23'] * 50))
+        with patch('scripts.date_normalization.pd.to_datetime') as to_datetime:
+            dates = normalizer.parse(pd.Series(['1/3/23', '1/2/23']))
+        to_datetime.assert_not_called()
+        self.assertEqual(dates.dt.day.tolist(), [3, 2])
+        self.assertEqual(normalizer.stats['unique_values'], 2)
+
+    def test_typed_dates_pass_through(self):
+        dates = pd.Series(pd.to_datetime(['2023-01-01', None]))
+        self.assertIs(DateNormalizer().parse(dates), dates)
+
+    def test_matches_fixed_format_parsing(self):
+        days = pd.date_range('2021-01-01', periods=400).strftime('%m/%d/%y')
+        values = pd.Series(np.random.default_rng(3).choice(days, 5000))
+        expected = pd.to_datetime(values, format=EXPECTED_DATE_FORMAT)
+        self.assertTrue((parse_history_dates(values) == expected).all())
+
+    def test_dropped_rows_are_reported(self):
+        with self.assertLogs(level='WARNING') as log:
+            dates = parse_history_dates(pd.Series(['1/2/23', 'ayer', None]))
+        self.assertEqual(dates.isna().sum(), 2)
+        self.assertTrue(any("2 filas con fecha vacía o no reconocida" in msg and "ayer" in msg for msg in log.output))
+
+if __name__ == '__main__':
+    unittest.main()
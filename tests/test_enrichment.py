@@ -0,0 +1,28 @@
+import unittest
+import random
+import time
+from scripts.enrichment import TokenBucket, enrich_titles_concurrently
+
+class TestConcurrentEnrichment(unittest.TestCase):
+    def test_results_keep_input_order(self):
+        titles = [f"Titulo {i}" for i in range(50)]
+
+        def lookup(title):
+            time.sleep(random.uniform(0, 0.005))
+            return title.upper()
+
+        results = enrich_titles_concurrently(titles, lookup, max_workers=8)
+        self.assertEqual(results, [t.upper() for t in titles])
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, capacity=5)
+        start = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        # 5 tokens de ráfaga + 10 a 100/s => al menos ~0.1 s
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    def test_token_bucket_rejects_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
@@ -0,0 +1,90 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from scripts import powerbi_prep
+from scripts.esquema_estrella import TABLAS_ESTRELLA, construir_esquema_estrella
+from scripts.powerbi_prep import explotar_generos
+from tests.test_powerbi_prep import SAMPLE_EDA_PATH
+
+class TestEsquemaEstrella(unittest.TestCase):
+    def setUp(self):
+        df = pd.read_csv(SAMPLE_EDA_PATH, parse_dates=['Fecha_Visualizacion'])
+        extra = df.head(2).copy()
+        extra['Tipo_Medio_TMDb'] = np.nan
+        extra[['Fecha_Visualizacion', 'Anio', 'Mes', 'Dia_Semana']] = [pd.NaT, np.nan, np.nan, np.nan]
+        self.df = pd.concat([df, df.head(3), extra]).set_index(np.arange(len(df) + 5) * 3)
+        self.tablas = construir_esquema_estrella(self.df)
+
+    def test_hechos_reconstruyen_la_tabla_ancha(self):
+        hechos = self.tablas['hechos_visualizaciones']
+        self.assertEqual(list(self.tablas), TABLAS_ESTRELLA)
+        self.assertEqual(len(hechos), len(self.df))
+        self.assertEqual(hechos.columns.tolist(), ['Clave_Fecha', 'Clave_Titulo', 'Clave_Episodio', 'Clave_Tipo_Medio',
+                                                   'Tiempo_Visualizacion'])
+        unido = (hechos.merge(self.tablas['dim_titulo'].drop(columns='Clave_Tipo_Medio'), on='Clave_Titulo', how='left')
+                 .merge(self.tablas['dim_episodio'], on='Clave_Episodio', how='left')
+                 .merge(self.tablas['dim_fecha'], on='Clave_Fecha', how='left')
+                 .merge(self.tablas['dim_tipo_medio'], on='Clave_Tipo_Medio', how='left'))
+        ancho = self.df.reset_index(drop=True)
+        for col in ['Titulo_Original_Netflix', 'Titulo_TMDb', 'ID_TMDb', 'Generos_TMDb', 'Calificacion_Promedio_TMDb', 'Anio', 'Mes', 'Dia_Semana',
+                    'Tipo_Medio_TMDb']:
+            esperado = ancho[col].astype(object).where(ancho[col].notna(), None).tolist()
+            obtenido = unido[col].astype(object).where(unido[col].notna(), None).tolist()
+            self.assertEqual(obtenido, esperado, col)
+        self.assertEqual(hechos['Clave_Fecha'].isna().sum(), 2)
+        self.assertEqual(hechos['Clave_Tipo_Medio'].isna().sum(), 2)
+
+    def test_dimensiones_sin_repeticiones(self):
+        # Una fila por título de TMDb (tipo de medio + id): los episodios de una serie comparten clave de título
+        dim_titulo = self.tablas['dim_titulo']
+        self.assertEqual(len(dim_titulo), len(self.df.drop_duplicates(['Tipo_Medio_TMDb', 'ID_TMDb'])))
+        self.assertLess(len(dim_titulo), self.df['Titulo_Original_Netflix'].nunique())
+        self.assertEqual(len(self.tablas['dim_episodio']), self.df['Titulo_Original_Netflix'].nunique())
+        self.assertEqual(self.tablas['dim_episodio'].columns.tolist(), ['Clave_Episodio', 'Titulo_Original_Netflix'])
+        dim_fecha = self.tablas['dim_fecha']
+        self.assertTrue(dim_fecha['Clave_Fecha'].is_unique)
+        dias = self.df['Fecha_Visualizacion'].dt.normalize()
+        self.assertEqual(len(dim_fecha), (dias.max() - dias.min()).days + 1)
+        self.assertEqual(self.tablas['dim_tipo_medio']['Tipo_Medio_TMDb'].tolist(), ['tv', 'movie'])
+
+    def test_puente_de_generos(self):
+        puente = (self.tablas['puente_titulo_genero']
+                  .merge(self.tablas['dim_genero'], on='Clave_Genero')
+                  .merge(self.tablas['dim_titulo'][['Clave_Titulo', 'Titulo_TMDb']], on='Clave_Titulo'))
+        esperado = explotar_generos(self.df.drop_duplicates(['Tipo_Medio_TMDb', 'ID_TMDb']))
+        self.assertEqual(sorted(zip(puente['Titulo_TMDb'], puente['Genero'])),
+                         sorted(zip(esperado['Titulo_TMDb'], esperado['Genero'])))
+
+    def test_titulos_sin_tmdb_por_titulo_buscado(self):
+        df = pd.DataFrame({
+            'Titulo_Original_Netflix': ['Dark: T1: E1', 'Dark: T1: E2', 'Casero: Parte 1', 'Casero: Parte 2', 'Otro'],
+            'Titulo_Limpio_Busqueda': ['Dark', 'Dark', 'Casero', 'Casero', 'Otro'],
+            'ID_TMDb': [70523, 70523, np.nan, np.nan, 70523],
+            'Tipo_Medio_TMDb': ['tv', 'tv', np.nan, np.nan, 'movie'],
+        })
+        tablas = construir_esquema_estrella(df)
+        # Mismo id en película y serie son títulos distintos; sin coincidencia se agrupa por título buscado
+        self.assertEqual(tablas['hechos_visualizaciones']['Clave_Titulo'].tolist(), [1, 1, 2, 2, 3])
+        self.assertEqual(tablas['hechos_visualizaciones']['Clave_Episodio'].tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(tablas['dim_titulo']['Titulo_Limpio_Busqueda'].tolist(), ['Dark', 'Casero', 'Otro'])
+
+    def test_exportacion_estrella(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            df = pd.read_csv(SAMPLE_EDA_PATH)
+            enriquecido = os.path.join(tmp, 'enriquecido.csv')
+            df.to_csv(enriquecido, index=False)
+            salidas = {nombre: os.path.join(tmp, f'{nombre}.csv') for nombre in
+                       ['PROCESSED_DATA_PATH', 'CALIDAD_TIPO_PATH', 'RESUMEN_CALIDAD_TIPO_PATH', 'GENEROS_PATH',
+                        'GENEROS_POPULARES_PATH', 'CUBO_PATH']}
+            with patch.multiple(powerbi_prep, ENRICHED_DATA_PATH=enriquecido, ESTRELLA_DIR=os.path.join(tmp, 'estrella'),
+                                ALMACEN_PATH=os.path.join(tmp, 'store.sqlite'), **salidas):
+                powerbi_prep.preparar_datos_para_powerbi(ruta_metricas='', modelo='estrella')
+            self.assertFalse(os.path.exists(salidas['PROCESSED_DATA_PATH']))
+            self.assertTrue(os.path.exists(salidas['CUBO_PATH']))
+            for nombre in TABLAS_ESTRELLA:
+                self.assertTrue(os.path.exists(os.path.join(tmp, 'estrella', f'{nombre}.csv')), nombre)
+            hechos = pd.read_csv(os.path.join(tmp, 'estrella', 'hechos_visualizaciones.csv'))
+            self.assertEqual(len(hechos), len(df))
@@ -0,0 +1,102 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest.mock import patch
+import pandas as pd
+from scripts import powerbi_prep
+from scripts.failures import FAILURE_BACKOFF_MAX_DAYS, backoff_seconds
+from scripts.local_store import ENRICHED_VIEW, LocalStore
+
+DARK = {'search_title_query': 'Dark', 'tmdb_id': 70523, 'tmdb_title': 'Dark', 'tmdb_genres': 'Drama, Crime',
+        'tmdb_popularity': 50.5, 'tmdb_vote_average': 8.4, 'tmdb_vote_count': 7000, 'tmdb_media_type': 'tv',
+        'tmdb_release_date': '2017-12-01', 'tmdb_runtime_minutes': 55}
+ROMA = {'search_title_query': 'Roma', 'tmdb_id': 426426, 'tmdb_title': 'Roma', 'tmdb_genres': 'Drama',
+        'tmdb_popularity': 12.0, 'tmdb_vote_average': 7.7, 'tmdb_vote_count': 4000, 'tmdb_media_type': 'movie',
+        'tmdb_release_date': '2018-08-30', 'tmdb_runtime_minutes': 135}
+
+def history(rows):
+    return pd.DataFrame(rows, columns=['Title', 'Date', 'Title_Cleaned_For_API']).assign(Date=lambda d: pd.to_datetime(d['Date']))
+
+class TestLocalStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = LocalStore(os.path.join(self.tmp_dir.name, 'store.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_enriched_view_joins_history_and_catalogue(self):
+        self.store.upsert_titles([DARK, None, {'tmdb_id': 1}])
+        self.store.replace_history(history([('Dark: T1: Secretos', '2023-01-02', 'Dark'), ('Otra', '2023-01-01', 'Otra')]))
+        df = self.store.load_enriched()
+        self.assertEqual(df.columns[:3].tolist(), ['Title', 'Date', 'Title_Cleaned_For_API'])
+        self.assertEqual(df['tmdb_id'].tolist()[0], 70523)
+        self.assertTrue(pd.isna(df['tmdb_id'].iloc[1]))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['Date']))
+
+    def test_replace_history_since_date_keeps_older_rows(self):
+        self.store.replace_history(history([('A', '2023-01-01', 'A'), ('B', '2023-01-02', 'B')]))
+        self.store.replace_history(history([('B', '2023-01-02', 'B'), ('C', '2023-01-03', 'C')]), since_date='2023-01-02')
+        self.assertEqual(self.store.load_enriched()['Title'].tolist(), ['A', 'B', 'C'])
+        kept, lookup, known = self.store.split_enriched(pd.Timestamp('2023-01-03'))
+        self.assertEqual(kept['Title'].tolist(), ['A', 'B'])
+        self.assertEqual(known, set())  # Ninguna clave enriquecida: todas pueden volver a buscarse
+        self.assertTrue(lookup.empty)
+        self.store.upsert_titles([DARK])
+        self.assertEqual(self.store.split_enriched(pd.Timestamp('2023-01-03'))[2], {'Dark'})
+
+    def test_failures_count_attempts_and_clear_on_success(self):
+        self.store.record_failures(['Roma', 'X'])
+        self.store.record_failures(['Roma'], reason='network')
+        failures = self.store.failures().set_index('title_key')
+        self.assertEqual(failures.loc['Roma', 'attempts'], 2)
+        self.assertEqual(failures.loc['Roma', 'reason'], 'network')
+        self.store.upsert_titles([ROMA])
+        self.assertEqual(self.store.failures()['title_key'].tolist(), ['X'])
+        self.assertEqual([r['tmdb_id'] for r in self.store.title_records(['Roma', 'Nada'])], [426426])
+
+    def test_titles_in_backoff_only_for_permanent_failures(self):
+        self.store.record_failures({'Roma': 'no_match', 'Dark': 'network', 'X': 'no_movie_tv'})
+        self.store.record_failures(['X'])
+        now = time.time()
+        self.assertEqual(self.store.titles_in_backoff(7, now=now), {'Roma', 'X'})
+        # Un fallo: 7 días; dos fallos: 14 días
+        self.assertEqual(self.store.titles_in_backoff(7, now=now + 8 * 24 * 3600), {'X'})
+        self.assertEqual(self.store.titles_in_backoff(7, now=now + 15 * 24 * 3600), set())
+        self.assertEqual(self.store.titles_in_backoff(0), set())
+        self.assertEqual(backoff_seconds(20, base_days=7), FAILURE_BACKOFF_MAX_DAYS * 24 * 3600)
+
+    def test_derived_tables_and_export(self):
+        self.store.write_derived('resumen', pd.DataFrame({'Tipo': ['tv'], 'Conteo': [3]}))
+        self.assertEqual(self.store.read_table('resumen')['Conteo'].tolist(), [3])
+        with self.assertRaises(ValueError):
+            self.store.write_derived('history', pd.DataFrame())
+        with self.assertRaises(ValueError):
+            self.store.read_table('resumen; DROP TABLE history')
+        self.store.upsert_titles([DARK])
+        self.store.replace_history(history([('Dark', '2023-01-02', 'Dark')]))
+        path = self.store.export_table(ENRICHED_VIEW, os.path.join(self.tmp_dir.name, 'export.csv'))
+        self.assertEqual(pd.read_csv(path)['tmdb_title'].tolist(), ['Dark'])
+
+
+class TestPowerBIFromStore(unittest.TestCase):
+    def test_reads_store_and_writes_derived_tables(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store_path = os.path.join(tmp, 'store.sqlite')
+            with LocalStore(store_path) as store:
+                store.upsert_titles([DARK, ROMA])
+                store.replace_history(history([('Dark: T1: Secretos', '2023-01-02', 'Dark'), ('Roma', '2023-01-01', 'Roma')]))
+            # Las tablas derivadas toman el nombre del archivo de salida
+            salidas = {nombre: os.path.join(tmp, os.path.basename(getattr(powerbi_prep, nombre))) for nombre in
+                       ['PROCESSED_DATA_PATH', 'CALIDAD_TIPO_PATH', 'RESUMEN_CALIDAD_TIPO_PATH', 'GENEROS_PATH',
+                        'GENEROS_POPULARES_PATH', 'CUBO_PATH']}
+            with patch.multiple(powerbi_prep, ENRICHED_DATA_PATH=os.path.join(tmp, 'no_existe.csv'), ALMACEN_PATH=store_path,
+                                **salidas):
+                powerbi_prep.preparar_datos_para_powerbi(ruta_metricas='', exportar=False)
+            self.assertEqual([f for f in os.listdir(tmp) if f.endswith('.csv')], [])
+            with LocalStore(store_path) as store:
+                self.assertEqual(len(store.read_table('netflix_eda_processed')), 2)
+                populares = store.read_table('generos_populares')
+                self.assertEqual(populares.set_index('Genero')['Conteo'].to_dict(), {'Drama': 2, 'Crime': 1})
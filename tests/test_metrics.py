@@ -0,0 +1,50 @@
+import unittest
+import os
+import json
+import pstats
+import tempfile
+from scripts.metrics import RunMetrics, profiled
+
+class TestRunMetrics(unittest.TestCase):
+    def test_stage_records_duration_and_rows_per_second(self):
+        metrics = RunMetrics('test')
+        with metrics.stage('carga') as stage:
+            sum(range(10000))
+            stage['rows'] = 100
+        info = metrics.stages['carga']
+        self.assertEqual(info['rows'], 100)
+        self.assertGreater(info['seconds'], 0)
+        self.assertGreater(info['rows_per_second'], 0)
+
+    def test_api_summary_histogram_and_retries(self):
+        metrics = RunMetrics('test')
+        for seconds in (0.01, 0.04, 0.2, 7.0):
+            metrics.record_api_call('search/multi', seconds)
+        metrics.record_error('search/multi')
+        metrics.record_retry('search/multi')
+        summary = metrics.api_summary()['search/multi']
+        self.assertEqual(summary['calls'], 4)
+        self.assertEqual(summary['retries'], 1)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['histogram']['<=50ms'], 2)
+        self.assertEqual(summary['histogram']['<=250ms'], 1)
+        self.assertEqual(summary['histogram']['>5000ms'], 1)
+        self.assertEqual(summary['max_ms'], 7000.0)
+
+    def test_report_and_profile_are_written(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            metrics = RunMetrics('test')
+            metrics.set_cache_stats({'hits': 3, 'misses': 1, 'hit_rate': 0.75})
+            metrics.update_counters({'detail_calls': 2})
+            metrics.update_counters({'detail_calls': 1})
+            profile_path = os.path.join(tmp, 'run.prof')
+            with profiled(profile_path):
+                sorted(range(1000), reverse=True)
+            metrics.write_report(os.path.join(tmp, 'metrics.json'))
+            with open(os.path.join(tmp, 'metrics.json'), encoding='utf-8') as f:
+                report = json.load(f)
+            self.assertEqual(report['run'], 'test')
+            self.assertEqual(report['cache']['hit_rate'], 0.75)
+            self.assertEqual(report['counters']['detail_calls'], 3)
+            self.assertIn('peak_rss_mb', report)
+            self.assertGreater(pstats.Stats(profile_path).total_calls, 0)
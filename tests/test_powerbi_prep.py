@@ -0,0 +1,44 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+from scripts.powerbi_prep import PROJECT_ROOT, explotar_generos
+
+SAMPLE_EDA_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'netflix_eda_processed.csv')
+
+def explotar_generos_legacy(df):
+    # Implementación original (iterrows + un DataFrame por género), usada como referencia
+    generos_dfs = []
+    for idx, row in df.iterrows():
+        generos = [g.strip() for g in str(row.get('Generos_TMDb', '')).split(',')] if pd.notna(row.get('Generos_TMDb', '')) else ['Sin género']
+        for genero in generos:
+            if genero and genero != 'Sin género':
+                genero_row = {
+                    'Genero': genero,
+                    'Popularidad_TMDb': row.get('Popularidad_TMDb'),
+                    'Calificacion_Promedio_TMDb': row.get('Calificacion_Promedio_TMDb'),
+                    'Tipo_Medio': row.get('Tipo_Medio'),
+                    'Fecha_Visualizacion': row.get('Fecha_Visualizacion'),
+                    'Anio': row.get('Anio'),
+                    'Titulo_TMDb': row.get('Titulo_TMDb')
+                }
+                generos_dfs.append(pd.DataFrame([genero_row]))
+    return pd.concat(generos_dfs, ignore_index=True)
+
+class TestAnalisisGeneros(unittest.TestCase):
+    def setUp(self):
+        df = pd.read_csv(SAMPLE_EDA_PATH)
+        # Casos límite: sin géneros, géneros vacíos, 'Sin género' literal e índice no consecutivo
+        extra = df.head(3).copy()
+        extra['Generos_TMDb'] = [np.nan, 'Drama, , Comedy', 'Sin género, Horror']
+        self.df = pd.concat([df, extra]).set_index(np.arange(len(df) + 3) * 7)
+
+    def test_matches_legacy_output(self):
+        esperado = explotar_generos_legacy(self.df)
+        obtenido = explotar_generos(self.df)
+        self.assertEqual(obtenido.columns.tolist(), esperado.columns.tolist())
+        self.assertEqual(obtenido.to_csv(index=False), esperado.to_csv(index=False))
+
+    def test_no_genres(self):
+        df = self.df.assign(Generos_TMDb=np.nan)
+        self.assertTrue(explotar_generos(df).empty)
@@ -1,8 +1,16 @@
 import unittest
 import os
+import gzip
+import json
+import tempfile
 import pandas as pd
+import requests
 from unittest.mock import patch, MagicMock
-from scripts.run_etl import run_netflix_etl
+from scripts.run_etl import get_tmdb_details, resolve_tmdb_match, run_api_diagnostic, run_netflix_etl, setup_tmdb_apis
+from scripts.enrichment import TokenBucket
+from scripts.failures import FailureLog
+from scripts.local_store import LocalStore
+from scripts.tmdb_snapshot import TMDbSnapshot
 
 class TestNetflixETL(unittest.TestCase):
     def setUp(self):
@@ -14,36 +22,62 @@ Stranger Things,2023-01-02"""
             f.write(self.test_csv_content)
         
         os.environ['TMDB_API_KEY'] = 'test_api_key'
+        # El almacén local de estas pruebas no debe mezclarse con el del proyecto
+        self.store_dir = tempfile.TemporaryDirectory()
+        self.store_patch = patch('scripts.run_etl.STORE_PATH', os.path.join(self.store_dir.name, 'store.sqlite'))
+        self.store_patch.start()
 
     def tearDown(self):
+        self.store_patch.stop()
+        self.store_dir.cleanup()
         if os.path.exists(self.test_csv_path):
             os.remove(self.test_csv_path)
         if 'TMDB_API_KEY' in os.environ:
             del os.environ['TMDB_API_KEY']
 
-    @patch('scripts.run_etl.requests.get')
-    def test_api_request_failure(self, mock_get):
-        mock_get.side_effect = Exception("API Error")
+    def test_api_request_failure(self):
+        # El diagnóstico usa la sesión del cliente TMDb; sus errores se registran sin detener el ETL
+        search_api = MagicMock()
+        search_api.multi.side_effect = requests.exceptions.ConnectionError("API Error")
         with self.assertLogs(level='ERROR') as log:
-            run_netflix_etl()
-        self.assertTrue(any("ERROR EN PRUEBA DIRECTA" in msg for msg in log.output))
+            run_api_diagnostic(search_api)
+        self.assertTrue(any("ERROR EN PRUEBA DIRECTA - RequestException" in msg for msg in log.output))
+        search_api.multi.side_effect = ValueError("Respuesta rara")
+        with self.assertLogs(level='ERROR') as log:
+            run_api_diagnostic(search_api)
+        self.assertTrue(any("ERROR INESPERADO EN PRUEBA DIRECTA" in msg for msg in log.output))
 
-    @patch('scripts.run_etl.pd.read_csv')
+    @patch('pandas.read_csv', side_effect=Exception("Sin historial"))
+    @patch('scripts.run_etl.setup_tmdb_apis', return_value=('search', 'movie', 'tv'))
+    @patch('scripts.run_etl.run_api_diagnostic')
+    def test_api_diagnostic_is_opt_in(self, mock_diagnostic, mock_setup, mock_read_csv):
+        run_netflix_etl(metrics_path='')
+        mock_diagnostic.assert_not_called()
+        run_netflix_etl(metrics_path='', diagnostic=True)
+        mock_diagnostic.assert_called_once_with('search')
+
+    @patch('pandas.read_csv')
     def test_invalid_csv_format(self, mock_read_csv):
         mock_read_csv.return_value = pd.DataFrame({'WrongColumn': ['data']})
         with self.assertLogs(level='ERROR') as log:
             run_netflix_etl()
         self.assertTrue(any("El CSV debe contener 'Title' y 'Date'" in msg for msg in log.output))
 
-    @patch('scripts.run_etl.TMDb')
-    @patch('scripts.run_etl.Search')
+    @patch('scripts.tmdb_client.TMDb')
+    @patch('scripts.tmdb_client.Search')
     def test_tmdb_api_configuration_failure(self, mock_search, mock_tmdb):
         mock_tmdb.side_effect = Exception("TMDb Config Error")
         with self.assertLogs(level='ERROR') as log:
             run_netflix_etl()
         self.assertTrue(any("Error al configurar los objetos API de TMDb" in msg for msg in log.output))
 
-    @patch('scripts.run_etl.pd.read_csv')
+    def test_concurrent_apis_share_one_rate_limiter(self):
+        search_api, movie_api, tv_api = setup_tmdb_apis('key', pool_size=4)
+        self.assertIsInstance(search_api.tmdb.rate_limiter, TokenBucket)
+        self.assertIs(movie_api.tmdb.rate_limiter, tv_api.tmdb.rate_limiter)
+        self.assertIsNone(setup_tmdb_apis('key', pool_size=1)[0].tmdb.rate_limiter)
+
+    @patch('pandas.read_csv')
     def test_empty_dataframe_after_cleaning(self, mock_read_csv):
         mock_read_csv.return_value = pd.DataFrame({
             'Title': [None, None],
@@ -54,7 +88,7 @@ Stranger Things,2023-01-02"""
         self.assertTrue(any("No quedaron filas válidas" in msg for msg in log.output))
 
     @patch('scripts.run_etl.get_tmdb_details')
-    @patch('scripts.run_etl.pd.read_csv')
+    @patch('pandas.read_csv')
     def test_successful_data_enrichment(self, mock_read_csv, mock_get_details):
         mock_read_csv.return_value = pd.DataFrame({
             'Title': ['Test Movie'],
@@ -76,7 +110,7 @@ Stranger Things,2023-01-02"""
             run_netflix_etl()
         self.assertTrue(any("No se encontró TMDB_API_KEY" in msg for msg in log.output))
 
-    @patch('scripts.run_etl.pd.read_csv')
+    @patch('pandas.read_csv')
     def test_invalid_date_format(self, mock_read_csv):
         mock_read_csv.return_value = pd.DataFrame({
             'Title': ['Test Movie'],
@@ -85,3 +119,341 @@ Stranger Things,2023-01-02"""
         with self.assertLogs(level='ERROR') as log:
             run_netflix_etl()
         self.assertTrue(any("Error de formato fecha" in msg for msg in log.output))
+
+
+class ETLTempDirTestCase(unittest.TestCase):
+    """Base para tests que ejecutan el ETL completo con rutas en un directorio temporal y TMDb simulado."""
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.raw_path = os.path.join(self.tmp_dir.name, 'NetflixViewingHistory.csv')
+        self.out_path = os.path.join(self.tmp_dir.name, 'netflix_viewing_enriched.csv')
+        self.patches = [
+            patch('scripts.run_etl.RAW_DATA_PATH', self.raw_path),
+            patch('scripts.run_etl.PROCESSED_DATA_PATH', self.out_path),
+            patch('scripts.run_etl.WATERMARK_PATH', os.path.join(self.tmp_dir.name, 'watermark.json')),
+            patch('scripts.run_etl.FAILED_TITLES_LOG_PATH', os.path.join(self.tmp_dir.name, 'failed.log')),
+            patch('scripts.run_etl.JOURNAL_PATH', os.path.join(self.tmp_dir.name, 'journal.jsonl')),
+            patch('scripts.run_etl.METRICS_REPORT_PATH', os.path.join(self.tmp_dir.name, 'etl_metrics.json')),
+            patch('scripts.run_etl.STORE_PATH', os.path.join(self.tmp_dir.name, 'store.sqlite')),
+            patch('requests.get'),
+            patch.dict(os.environ, {'TMDB_API_KEY': 'test_api_key'}),
+        ]
+        for p in self.patches:
+            p.start()
+        # TMDb simulado: cada título se resuelve a un id igual a su longitud
+        resolve_patch = patch('scripts.run_etl.resolve_tmdb_match',
+                              side_effect=lambda title, *args, **kwargs: ('movie', len(title)))
+        fetch_patch = patch('scripts.run_etl.fetch_tmdb_details',
+                            side_effect=lambda media_type, item_id, *args, **kwargs: {'tmdb_id': item_id, 'tmdb_media_type': media_type})
+        self.mock_resolve = resolve_patch.start()
+        self.mock_fetch = fetch_patch.start()
+        self.patches += [resolve_patch, fetch_patch]
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        self.tmp_dir.cleanup()
+
+    def _write_history(self, rows):
+        pd.DataFrame(rows, columns=['Title', 'Date']).to_csv(self.raw_path, index=False)
+
+    def _searched_titles(self):
+        return [c.args[0] for c in self.mock_resolve.call_args_list]
+
+
+class TestIncrementalETL(ETLTempDirTestCase):
+    def test_only_new_titles_are_enriched(self):
+        self._write_history([('Dark: Temporada 1: Secretos', '1/2/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        self.assertEqual(self.mock_resolve.call_count, 2)
+
+        self.mock_resolve.reset_mock()
+        self._write_history([('Roma', '1/3/23'), ('Dark: Temporada 1: Mentiras', '1/3/23'),
+                             ('Dark: Temporada 1: Secretos', '1/2/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False, incremental=True)
+        self.assertEqual(self._searched_titles(), ['Roma'])
+
+        df_out = pd.read_csv(self.out_path)
+        self.assertEqual(len(df_out), 4)
+        self.assertEqual(df_out['tmdb_id'].notna().sum(), 4)
+
+    def _failed_title_is_searched_again(self, use_store):
+        network_down = True
+        def resolve(title, *args, failures=None, **kwargs):
+            if title == 'Roma' and network_down:
+                failures.record(title, 'network')
+                return None
+            return ('movie', len(title))
+        self.mock_resolve.side_effect = resolve
+        self._write_history([('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False, use_store=use_store)
+        network_down = False
+        self.mock_resolve.reset_mock()
+        self._write_history([('Roma', '1/4/23'), ('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False, incremental=True, use_store=use_store)
+        self.assertEqual(self._searched_titles(), ['Roma'])
+        df_out = pd.read_csv(self.out_path)
+        self.assertEqual(df_out.loc[df_out['Date'] == '2023-01-04', 'tmdb_id'].tolist(), [4])
+
+    def test_failed_titles_are_searched_again_from_store(self):
+        self._failed_title_is_searched_again(use_store=True)
+
+    def test_failed_titles_are_searched_again_from_file(self):
+        self._failed_title_is_searched_again(use_store=False)
+
+    def test_changed_history_triggers_full_run(self):
+        self._write_history([('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        self.mock_resolve.reset_mock()
+        self._write_history([('Roma', '1/3/23'), ('Interstellar', '1/1/23')])
+        run_netflix_etl(use_cache=False, incremental=True)
+        self.assertEqual(self.mock_resolve.call_count, 2)
+
+
+    def test_incremental_reads_parquet_output(self):
+        self._write_history([('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False, output_format='parquet')
+        self.mock_resolve.reset_mock()
+        self._write_history([('Dune', '1/4/23'), ('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False, incremental=True, output_format='parquet')
+        self.assertEqual(self._searched_titles(), ['Dune'])
+        df_out = pd.read_parquet(os.path.splitext(self.out_path)[0] + '.parquet')
+        self.assertEqual(len(df_out), 3)
+        self.assertEqual(str(df_out['tmdb_id'].dtype), 'Int64')
+
+class TestResumableETL(ETLTempDirTestCase):
+    def test_resume_skips_journaled_titles(self):
+        journal_path = os.path.join(self.tmp_dir.name, 'journal.jsonl')
+        with open(journal_path, 'w', encoding='utf-8') as f:
+            f.write('{"title": "Inception", "status": "ok", "data": {"search_title_query": "Inception", "tmdb_id": 27205}}\n')
+            f.write('{"title": "Roma", "status": "fai')  # línea truncada por una caída
+        self._write_history([('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False, resume=True)
+
+        self.assertEqual(self._searched_titles(), ['Roma'])
+        df_out = pd.read_csv(self.out_path)
+        self.assertEqual(sorted(df_out['tmdb_id'].tolist()), [4, 27205])
+        self.assertFalse(os.path.exists(journal_path))
+        self.assertEqual([f for f in os.listdir(self.tmp_dir.name) if f.endswith('.tmp')], [])
+
+
+class TestTwoPhaseEnrichment(ETLTempDirTestCase):
+    def test_details_fetched_once_per_tmdb_id(self):
+        # 'Roma' y 'Dune' tienen la misma longitud => mismo id simulado
+        self._write_history([('Roma', '1/3/23'), ('Dune', '1/2/23'), ('Inception', '1/1/23')])
+        with self.assertLogs(level='INFO') as log:
+            run_netflix_etl(use_cache=False)
+        self.assertEqual(self.mock_resolve.call_count, 3)
+        self.assertEqual(self.mock_fetch.call_count, 2)
+        self.assertTrue(any("ahorradas 1" in msg for msg in log.output))
+        df_out = pd.read_csv(self.out_path)
+        self.assertEqual(df_out.set_index('Title')['tmdb_id'].to_dict(), {'Roma': 4, 'Dune': 4, 'Inception': 9})
+
+
+class TestRunMetricsReport(ETLTempDirTestCase):
+    def test_report_has_stage_timings_and_counters(self):
+        self._write_history([('Roma', '1/3/23'), ('Dark: Temporada 1: Secretos', '1/2/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        with open(os.path.join(self.tmp_dir.name, 'etl_metrics.json'), encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(list(report['stages']), ['ingest', 'date_parse', 'title_cleaning', 'enrichment', 'store', 'merge', 'write'])
+        self.assertEqual(report['stages']['ingest']['rows'], 3)
+        self.assertEqual(report['stages']['enrichment']['rows'], 3)
+        self.assertEqual(report['counters']['enriched_titles'], 3)
+        self.assertEqual(report['counters']['detail_calls'], 2)  # 'Roma' y 'Dark' comparten id simulado
+
+
+class TestLocalStoreETL(ETLTempDirTestCase):
+    def _store(self):
+        return LocalStore(os.path.join(self.tmp_dir.name, 'store.sqlite'))
+
+    def test_store_is_updated_and_export_is_optional(self):
+        self.mock_resolve.side_effect = lambda title, *args, **kwargs: None if title == 'Desconocida' else ('movie', len(title))
+        self._write_history([('Desconocida', '1/2/23'), ('Dark: Temporada 1: Secretos', '1/2/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        df_file = pd.read_csv(self.out_path)
+        with self._store() as store:
+            df_store = store.load_enriched()
+            self.assertEqual(df_store['Title'].tolist(), df_file['Title'].tolist())
+            self.assertEqual(df_store['tmdb_id'].tolist()[1:], [4, 9])
+            self.assertEqual(store.failures()['title_key'].tolist(), ['Desconocida'])
+
+        # Incremental sin exportar: el archivo no se reescribe y el almacén recibe solo las filas nuevas
+        self._write_history([('Roma', '1/3/23'), ('Desconocida', '1/2/23'), ('Dark: Temporada 1: Secretos', '1/2/23'),
+                             ('Inception', '1/1/23')])
+        mtime = os.path.getmtime(self.out_path)
+        self.mock_resolve.reset_mock()
+        run_netflix_etl(use_cache=False, incremental=True, export=False)
+        self.assertEqual(self._searched_titles(), ['Roma'])
+        self.assertEqual(os.path.getmtime(self.out_path), mtime)
+        with self._store() as store:
+            df_store = store.load_enriched()
+            self.assertEqual(sorted(df_store['Title']), ['Dark: Temporada 1: Secretos', 'Desconocida', 'Inception', 'Roma'])
+            self.assertEqual(df_store.set_index('Title').loc['Roma', 'tmdb_id'], 4)
+
+    def test_no_store_and_no_export_is_rejected(self):
+        self._write_history([('Roma', '1/3/23')])
+        with self.assertLogs(level='ERROR') as log:
+            run_netflix_etl(use_cache=False, use_store=False, export=False)
+        self.assertTrue(any("Sin almacén local ni exportación" in msg for msg in log.output))
+        self.assertEqual(self.mock_resolve.call_count, 0)
+
+
+class TestFailedTitlesRetry(ETLTempDirTestCase):
+    def _store(self):
+        return LocalStore(os.path.join(self.tmp_dir.name, 'store.sqlite'))
+
+    def test_no_match_is_skipped_until_backoff_expires(self):
+        self.mock_resolve.side_effect = lambda title, *args, **kwargs: None if title == 'Desconocida' else ('movie', len(title))
+        self._write_history([('Desconocida', '1/2/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        with self._store() as store:
+            failures = store.failures().set_index('title_key')
+            self.assertEqual(failures.loc['Desconocida', 'reason'], 'no_match')
+
+        self.mock_resolve.reset_mock()
+        with self.assertLogs(level='INFO') as log:
+            run_netflix_etl(use_cache=False)
+        self.assertEqual(self._searched_titles(), ['Inception'])
+        self.assertTrue(any("Omitidos 1 títulos" in msg for msg in log.output))
+        with open(os.path.join(self.tmp_dir.name, 'failed.log'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "Desconocida\tbackoff\n")
+        with self._store() as store:
+            self.assertEqual(store.failures().set_index('title_key').loc['Desconocida', 'attempts'], 1)
+
+        self.mock_resolve.reset_mock()
+        run_netflix_etl(use_cache=False, failure_backoff_days=0)
+        self.assertEqual(self._searched_titles(), ['Desconocida', 'Inception'])
+
+    def test_transient_failures_get_a_retry_pass(self):
+        attempts = {}
+        def resolve(title, *args, failures=None, **kwargs):
+            attempts[title] = attempts.get(title, 0) + 1
+            if title == 'Roma' and attempts[title] == 1:
+                failures.record(title, 'network')
+                return None
+            return ('movie', len(title))
+        self.mock_resolve.side_effect = resolve
+        self._write_history([('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        self.assertEqual(self._searched_titles(), ['Roma', 'Inception', 'Roma'])
+        df_out = pd.read_csv(self.out_path)
+        self.assertEqual(df_out['tmdb_id'].notna().sum(), 2)
+        with open(os.path.join(self.tmp_dir.name, 'etl_metrics.json'), encoding='utf-8') as f:
+            counters = json.load(f)['counters']
+        self.assertEqual((counters['retried_titles'], counters['recovered_on_retry']), (1, 1))
+        with self._store() as store:
+            self.assertTrue(store.failures().empty)
+
+
+    def test_single_transient_failure_is_retried(self):
+        attempts = []
+        def resolve(title, *args, failures=None, **kwargs):
+            attempts.append(title)
+            if len(attempts) == 1:
+                failures.record(title, 'network')
+                return None
+            return ('movie', len(title))
+        self.mock_resolve.side_effect = resolve
+        self._write_history([('Roma', '1/3/23')])
+        run_netflix_etl(use_cache=False)
+        self.assertEqual(attempts, ['Roma', 'Roma'])
+        self.assertEqual(pd.read_csv(self.out_path)['tmdb_id'].tolist(), [4])
+
+    def test_http_client_errors_are_not_transient(self):
+        def http_error(status):
+            return requests.exceptions.HTTPError(f"{status}", response=MagicMock(status_code=status))
+        search_api = MagicMock()
+        search_api.multi.side_effect = [http_error(401), http_error(404), http_error(503)]
+        failures = FailureLog()
+        for title in ('Roma', 'Dune', 'Dark'):
+            self.assertIsNone(resolve_tmdb_match(title, search_api, failures=failures))  # La función real, sin el mock
+        self.assertEqual([failures.get(t) for t in ('Roma', 'Dune', 'Dark')], ['auth', 'rejected', 'network'])
+
+    def test_bad_api_key_is_reported_and_not_counted(self):
+        self.mock_resolve.side_effect = lambda title, *args, failures=None, **kwargs: failures.record(title, 'auth')
+        self._write_history([('Roma', '1/3/23'), ('Inception', '1/1/23')])
+        with self.assertLogs(level='ERROR') as log:
+            run_netflix_etl(use_cache=False)
+        self.assertTrue(any("TMDB_API_KEY" in msg for msg in log.output))
+        self.assertEqual(self.mock_resolve.call_count, 2)  # Sin pasada de reintento
+        with self._store() as store:
+            self.assertTrue(store.failures().empty)
+
+    def test_cached_no_match_does_not_add_attempts(self):
+        self.mock_resolve.side_effect = lambda title, *args, cache=None, **kwargs: cache.set(title, None)
+        self._write_history([('Desconocida', '1/2/23')])
+        with patch('scripts.run_etl.TMDB_CACHE_PATH', os.path.join(self.tmp_dir.name, 'cache.sqlite')):
+            run_netflix_etl(failure_backoff_days=0)
+            run_netflix_etl(failure_backoff_days=0)
+        self.assertEqual(self.mock_resolve.call_count, 1)
+        with self._store() as store:
+            self.assertEqual(store.failures().set_index('title_key').loc['Desconocida', 'attempts'], 1)
+
+class TestSnapshotEnrichment(ETLTempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.snapshot_path = os.path.join(self.tmp_dir.name, 'tmdb_snapshot.jsonl.gz')
+        with gzip.open(self.snapshot_path, 'wt', encoding='utf-8') as f:
+            for entry in [{'id': 500, 'media_type': 'movie', 'title': 'Roma', 'original_title': 'Roma', 'popularity': 9.0},
+                          {'id': 600, 'media_type': 'tv', 'name': 'Dark', 'original_name': 'Dark', 'popularity': 50.0,
+                           'overview': 'Winden.', 'genres': [{'name': 'Drama'}], 'episode_run_time': [55]}]:
+                f.write(json.dumps(entry) + '\n')
+        self._write_history([('Roma', '1/3/23'), ('Dark: Temporada 1: Secretos', '1/2/23'), ('Inception', '1/1/23')])
+
+    def test_snapshot_replaces_search_and_complete_entries_skip_details(self):
+        run_netflix_etl(use_cache=False, snapshot_paths=[self.snapshot_path])
+        self.assertEqual(self._searched_titles(), ['Inception'])
+        self.assertEqual([c.args[:2] for c in self.mock_fetch.call_args_list], [('movie', 500), ('movie', 9)])
+        df_out = pd.read_csv(self.out_path).set_index('Title')
+        self.assertEqual(df_out['tmdb_id'].tolist(), [500, 600, 9])
+        self.assertEqual(df_out.loc['Dark: Temporada 1: Secretos', 'tmdb_runtime_minutes'], 55)
+
+    def test_offline_run_needs_no_api_key(self):
+        with patch.dict(os.environ, {'TMDB_API_KEY': ''}), patch('scripts.run_etl.setup_tmdb_apis') as setup_apis:
+            run_netflix_etl(use_cache=False, snapshot_paths=[self.snapshot_path], offline=True)
+        setup_apis.assert_not_called()
+        self.assertEqual((self.mock_resolve.call_count, self.mock_fetch.call_count), (0, 0))
+        df_out = pd.read_csv(self.out_path).set_index('Title')
+        self.assertEqual(df_out.loc['Roma', 'tmdb_title'], 'Roma')
+        self.assertEqual(df_out.loc['Dark: Temporada 1: Secretos', 'tmdb_genres'], 'Drama')
+        self.assertTrue(pd.isna(df_out.loc['Inception', 'tmdb_id']))
+        with open(os.path.join(self.tmp_dir.name, 'failed.log'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "Inception\tnot_in_snapshot\n")
+        with LocalStore(os.path.join(self.tmp_dir.name, 'store.sqlite')) as store:
+            self.assertTrue(store.failures().empty)
+
+        # La siguiente ejecución con red sí busca el título: no quedó en backoff
+        run_netflix_etl(use_cache=False, snapshot_paths=[self.snapshot_path])
+        self.assertEqual(self._searched_titles(), ['Inception'])
+
+    def test_get_tmdb_details_resolves_in_process(self):
+        snapshot = TMDbSnapshot.from_files([self.snapshot_path])
+        self.assertEqual(get_tmdb_details('Dark', None, None, None, snapshot=snapshot, offline=True)['tmdb_runtime_minutes'], 55)
+        self.assertIsNone(get_tmdb_details('Inception', None, None, None, snapshot=snapshot, offline=True))
+        # Si la API no devuelve los detalles que faltan, vale lo que trae la instantánea
+        self.mock_fetch.side_effect = lambda *args, **kwargs: None
+        record = get_tmdb_details('Roma', MagicMock(), MagicMock(), MagicMock(), snapshot=snapshot)
+        self.assertEqual((record['tmdb_id'], record['tmdb_popularity'], record['search_title_query']), (500, 9.0, 'Roma'))
+        self.assertEqual(self.mock_resolve.call_count, 0)
+
+    def test_offline_without_snapshot_is_rejected(self):
+        with self.assertLogs(level='ERROR') as log:
+            run_netflix_etl(use_cache=False, offline=True)
+        self.assertTrue(any("--snapshot" in msg for msg in log.output))
+
+
+class TestStreamingETL(ETLTempDirTestCase):
+    @patch('scripts.streaming.MIN_CHUNK_ROWS', 2)
+    def test_streaming_output_matches_full_run(self):
+        self._write_history([('Roma', '1/5/23'), ('Dark: Temporada 1: Secretos', '1/4/23'), ('Sin fecha', 'xx'),
+                             ('Dark: Temporada 1: Mentiras', '1/3/23'), ('Inception', '1/2/23'), ('Roma', '1/1/23')])
+        run_netflix_etl(use_cache=False)
+        df_full = pd.read_csv(self.out_path)
+
+        run_netflix_etl(use_cache=False, streaming=True, memory_budget_mb=0)
+        df_streaming = pd.read_csv(self.out_path)
+        pd.testing.assert_frame_equal(df_full, df_streaming)
+        # 3 títulos únicos por ejecución: en streaming cada título se resuelve una sola vez aunque aparezca en varios bloques
+        self.assertEqual(self.mock_resolve.call_count, 2 * 3)
+
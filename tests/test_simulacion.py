@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.simulacion import crear_generador, simular_datos_tmdb, simular_tiempo_visto
+from scripts.powerbi_prep import transformar_para_powerbi
+
+class TestSimulacion(unittest.TestCase):
+    def test_tiempo_visto_rangos_y_nulos(self):
+        duracion = pd.Series([100, 100, np.nan, 0, 45], index=[3, 5, 7, 9, 11])
+        tipo = pd.Series(['movie', 'tv', 'movie', 'tv', None], index=duracion.index)
+        visto = simular_tiempo_visto(duracion, tipo, crear_generador(1))
+        self.assertEqual(str(visto.dtype), 'Int64')
+        self.assertEqual(visto.index.tolist(), [3, 5, 7, 9, 11])
+        self.assertTrue(70 <= visto[3] <= 100)
+        self.assertTrue(80 <= visto[5] <= 100)
+        self.assertTrue(visto[[7, 9]].isna().all())
+        self.assertTrue(36 <= visto[11] <= 45)  # Sin tipo: como una serie
+
+    def test_misma_semilla_mismos_datos(self):
+        base = pd.DataFrame({'Titulo_Limpio_Busqueda': ['Dark', 'Roma', 'Narcos'] * 1000})
+        a = simular_datos_tmdb(base.copy(), crear_generador(7))
+        b = simular_datos_tmdb(base.copy(), crear_generador(7))
+        c = simular_datos_tmdb(base.copy(), crear_generador(8))
+        pd.testing.assert_frame_equal(a, b)
+        self.assertFalse(a['Popularidad_TMDb'].equals(c['Popularidad_TMDb']))
+        self.assertAlmostEqual((a['Tipo_Medio_TMDb'] == 'tv').mean(), 0.7, delta=0.05)
+        generos = a['Generos_TMDb'].str.split(', ')
+        self.assertTrue(generos.str.len().between(1, 2).all())
+        self.assertTrue((generos.apply(lambda g: len(set(g))) == generos.str.len()).all())
+        series = a['Tipo_Medio_TMDb'] == 'tv'
+        self.assertTrue(a.loc[series, 'Duracion_Minutos_TMDb'].between(20, 59).all())
+        self.assertTrue(a.loc[~series, 'Duracion_Minutos_TMDb'].between(80, 179).all())
+
+    def test_transformacion_reproducible(self):
+        df = pd.DataFrame({'Duracion_Minutos_TMDb': [50, 120, None], 'Tipo_Medio_TMDb': ['tv', 'movie', 'tv']})
+        a = transformar_para_powerbi(df.copy(), crear_generador(3))['Tiempo_Visualizacion']
+        b = transformar_para_powerbi(df.copy(), crear_generador(3))['Tiempo_Visualizacion']
+        pd.testing.assert_series_equal(a, b)
+        self.assertTrue(pd.isna(a.iloc[2]))
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.title_catalogue import TitleCatalogue
+from scripts.run_etl import merge_tmdb_data
+
+RECORDS = [
+    {'search_title_query': 'Dark', 'tmdb_id': 70523, 'tmdb_title': 'Dark', 'tmdb_genres': 'Drama, Mystery',
+     'tmdb_popularity': 50.5, 'tmdb_vote_count': 1200, 'tmdb_media_type': 'tv'},
+    {'search_title_query': 'Roma', 'tmdb_id': 426426, 'tmdb_title': 'Roma', 'tmdb_genres': 'Drama',
+     'tmdb_popularity': 12.0, 'tmdb_vote_count': None, 'tmdb_media_type': 'movie'},
+    {'search_title_query': 'Narcos', 'tmdb_id': 63351, 'tmdb_title': 'Narcos', 'tmdb_genres': None,
+     'tmdb_popularity': np.nan, 'tmdb_vote_count': 900, 'tmdb_media_type': 'tv'},
+    {'search_title_query': 'Dark', 'tmdb_id': 1, 'tmdb_title': 'Duplicado', 'tmdb_genres': 'Comedy',
+     'tmdb_popularity': 1.0, 'tmdb_vote_count': 1, 'tmdb_media_type': 'movie'},
+]
+
+
+def _as_objects(df):
+    return df.astype(object).where(df.notna(), None)
+
+
+class TestTitleCatalogue(unittest.TestCase):
+    def setUp(self):
+        self.history = pd.DataFrame({
+            'Title': ['Dark: T1', 'Roma', 'Otro', 'Dark: T2', 'Narcos', None],
+            'Date': pd.to_datetime(['2023-01-01'] * 6),
+            'Title_Cleaned_For_API': ['Dark', 'Roma', 'Otro', 'Dark', 'Narcos', None],
+        }, index=[10, 11, 12, 13, 14, 15])
+
+    def test_union_igual_que_merge_por_texto(self):
+        df_lookup = pd.DataFrame(RECORDS[:3])
+        expected = pd.merge(self.history, df_lookup, left_on='Title_Cleaned_For_API', right_on='search_title_query',
+                            how='left').drop(columns=['search_title_query'])
+        merged = merge_tmdb_data(self.history, TitleCatalogue.from_records(RECORDS[:3]))
+        self.assertEqual(merged.columns.tolist(), expected.columns.tolist())
+        self.assertEqual(merged.index.tolist(), list(range(6)))
+        pd.testing.assert_frame_equal(_as_objects(merged), _as_objects(expected))
+        # Un DataFrame de registros se convierte al catálogo dentro de merge_tmdb_data
+        pd.testing.assert_frame_equal(merge_tmdb_data(self.history, df_lookup), merged)
+
+    def test_tipos_compactos_y_primer_registro_gana(self):
+        catalogue = TitleCatalogue.from_records(RECORDS + [None])
+        self.assertEqual(len(catalogue), 3)
+        taken = catalogue.take(catalogue.positions(['Dark', 'Otro', 'Narcos']))
+        self.assertEqual(taken.loc[0, 'tmdb_title'], 'Dark')
+        self.assertEqual(str(taken['tmdb_media_type'].dtype), 'category')
+        self.assertEqual(list(taken['tmdb_media_type'].cat.categories), ['tv', 'movie'])
+        self.assertEqual(str(taken['tmdb_id'].dtype), 'Int64')
+        self.assertEqual(str(taken['tmdb_vote_count'].dtype), 'Int64')
+        self.assertTrue(taken.iloc[1].isna().all())
+        self.assertTrue(pd.isna(taken.loc[2, 'tmdb_genres']))
+        self.assertGreater(catalogue.nbytes(), 0)
+        self.assertEqual(catalogue.bytes_per_joined_row(), 4 * 3 + 9 * 3)
+
+    def test_generos_como_codigos_ordenados(self):
+        records = RECORDS[:3] + [{'search_title_query': 'Ozark', 'tmdb_id': 69740, 'tmdb_genres': 'Mystery, Crime, Drama'}]
+        catalogue = TitleCatalogue.from_records(records)
+        kind, offsets, codes, vocabulary = catalogue.columns['tmdb_genres']
+        self.assertEqual(kind, 'genres')
+        self.assertEqual(list(vocabulary), ['Drama', 'Mystery', 'Crime'])
+        self.assertEqual(offsets.tolist(), [0, 2, 3, 3, 6])
+        self.assertEqual(codes.tolist(), [0, 1, 0, 1, 2, 0])
+        # Se decodifica al sacar la columna, con el orden original de TMDb
+        taken = catalogue.take(catalogue.positions(['Ozark', 'Narcos', 'Otro', 'Dark', 'Ozark']))
+        self.assertEqual(str(taken['tmdb_genres'].dtype), 'category')
+        self.assertEqual(taken['tmdb_genres'].astype(object).where(taken['tmdb_genres'].notna(), None).tolist(),
+                         ['Mystery, Crime, Drama', None, None, 'Drama, Mystery', 'Mystery, Crime, Drama'])
+        self.assertEqual(list(taken['tmdb_genres'].cat.categories), ['Mystery, Crime, Drama', 'Drama, Mystery'])
+
+    def test_catalogo_vacio(self):
+        merged = merge_tmdb_data(self.history, TitleCatalogue.from_records([]))
+        self.assertNotIn('Title_Cleaned_For_API', merged.columns)
+        self.assertEqual(len(merged), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import MagicMock
+from scripts.title_index import TitleIndex, normalize_title, number_tokens
+from scripts.tmdb_cache import TMDbCache, CACHE_MISS
+from scripts.run_etl import enrich_titles
+
+PAPEL = {'search_title_query': 'La casa de papel', 'tmdb_id': 71446, 'tmdb_title': 'La casa de papel',
+         'tmdb_original_title': 'Money Heist', 'tmdb_media_type': 'tv'}
+ELITE = {'search_title_query': 'Élite', 'tmdb_id': 76669, 'tmdb_title': 'Élite',
+         'tmdb_original_title': 'Elite', 'tmdb_media_type': 'tv'}
+
+class TestTitleIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TitleIndex.from_records([PAPEL, ELITE, None, {'tmdb_id': None, 'tmdb_title': 'Sin id'}])
+
+    def test_normalize_folds_accents_and_punctuation(self):
+        self.assertEqual(normalize_title("  ¡Élite!: Año 2 "), "elite ano 2")
+        self.assertEqual(normalize_title(None), "")
+
+    def test_exact_and_original_title_match(self):
+        record, score = self.index.lookup("ELITE")
+        self.assertEqual((record['tmdb_id'], score), (76669, 1.0))
+        self.assertEqual(self.index.lookup("Money Heist")[0]['tmdb_id'], 71446)
+
+    def test_similar_title_above_threshold(self):
+        self.assertEqual(self.index.lookup("La Casa de Papel.")[0]['tmdb_id'], 71446)
+        record, score = self.index.lookup("La casa de papeles")
+        self.assertEqual(record['tmdb_id'], 71446)
+        self.assertGreaterEqual(score, 0.88)
+        self.assertEqual(self.index.lookup("La casa de papell")[0]['tmdb_id'], 71446)
+
+    def test_unrelated_or_short_titles_do_not_match(self):
+        self.assertIsNone(self.index.lookup("La casa del dragón"))
+        self.assertIsNone(self.index.lookup("La casa de papel: Corea"))  # Otra serie, por debajo del umbral
+        self.assertIsNone(self.index.lookup("Elit"))
+        self.assertIsNone(self.index.lookup(""))
+        self.assertEqual(len(self.index), 3)  # 'la casa de papel', 'money heist', 'elite' (sin claves repetidas)
+
+
+    def test_sequels_only_match_the_same_number(self):
+        index = TitleIndex.from_records([
+            {'search_title_query': 'Paranormal Activity 2', 'tmdb_id': 41436, 'tmdb_title': 'Paranormal Activity 2'},
+            {'search_title_query': 'Rápidos y furiosos 7', 'tmdb_id': 168259, 'tmdb_title': 'Fast & Furious 7'},
+            {'search_title_query': 'Misión imposible II', 'tmdb_id': 955, 'tmdb_title': 'Mission: Impossible II'}])
+        self.assertIsNone(index.lookup("Paranormal Activity 3"))
+        self.assertIsNone(index.lookup("Rápidos y furiosos 8"))
+        self.assertIsNone(index.lookup("Rápidos y furiosos 9"))
+        self.assertIsNone(index.lookup("Misión imposible 3"))
+        self.assertEqual(number_tokens(normalize_title("Misión imposible II")), number_tokens("mision imposible 2"))
+        self.assertEqual(number_tokens("civil war xiv 1917"), (14, 1917))
+        self.assertEqual(index.lookup("Paranormal Activitty 2")[0]['tmdb_id'], 41436)
+
+    def test_repeated_words_order_and_plurals_do_not_match(self):
+        index = TitleIndex.from_records([
+            {'search_title_query': title, 'tmdb_id': tmdb_id}
+            for tmdb_id, title in enumerate(['Mirror', 'Wild Tiempo Wild', 'Money Mar', 'The Witcher'], start=1)])
+        for title in ("Mirror Mirror", "Wild Tiempo", "Mar Money", "The Witchers", "Money Heists"):
+            self.assertIsNone(index.lookup(title), title)
+
+class TestEnrichWithTitleIndex(unittest.TestCase):
+    def test_failed_and_new_titles_resolved_locally(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TMDbCache(os.path.join(tmp, 'cache.sqlite'))
+            cache.set('La casa de papel', PAPEL)
+            cache.set('Money Heist.', None)  # Falló en una ejecución anterior
+            index = TitleIndex.from_records(cache.cached_records())
+            search = MagicMock()
+            search.multi.return_value = []
+            results, metrics = enrich_titles(['Money Heist.', 'La Casa de Papel!', 'Desconocida'],
+                                             search, MagicMock(), MagicMock(), cache=cache, title_index=index)
+            # Solo el título realmente desconocido va a la red
+            self.assertEqual(search.multi.call_count, 1)
+            self.assertEqual(results['Money Heist.']['tmdb_id'], 71446)
+            self.assertEqual(results['Money Heist.']['search_title_query'], 'Money Heist.')
+            self.assertEqual(results['La Casa de Papel!']['tmdb_id'], 71446)
+            self.assertIsNone(results['Desconocida'])
+            self.assertEqual(metrics['matched_locally'], 2)
+            # Las coincidencias locales no se escriben en la caché TMDb
+            self.assertIsNone(cache.get('Money Heist.'))
+            self.assertIs(cache.get('La Casa de Papel!'), CACHE_MISS)
+            cache.close()
@@ -0,0 +1,42 @@
+import unittest
+import pandas as pd
+from scripts.title_normalization import build_title_mapping, canonical_title_keys, map_canonical_titles
+from scripts.run_etl import clean_netflix_title
+
+class TestTitleNormalization(unittest.TestCase):
+    def test_season_part_and_episode_markers(self):
+        cases = {
+            'La casa de papel: Parte 5: Volumen 2: Episodio 1': 'La casa de papel',
+            'Stranger Things: Season 4: Chapter One': 'Stranger Things',
+            'The Crown: Temporada 3': 'The Crown',
+            'Twin Peaks: T1: Piloto': 'Twin Peaks',
+            'Friends: 1.ª temporada: El piloto': 'Friends',
+            'Gambito de dama: Miniserie: Aperturas': 'Gambito de dama',
+        }
+        self.assertEqual(canonical_title_keys(list(cases)).tolist(), list(cases.values()))
+
+    def test_show_names_with_colons_are_kept(self):
+        keys = canonical_title_keys(['Star Wars: The Clone Wars: Temporada 1: Emboscada',
+                                     'Avatar: La leyenda de Aang: Libro 1: Agua: El chico del iceberg'])
+        self.assertEqual(keys.tolist(), ['Star Wars: The Clone Wars', 'Avatar: La leyenda de Aang'])
+
+    def test_words_that_look_like_numerals_are_not_markers(self):
+        keys = canonical_title_keys(['Marvel: Agents: Six: Temporada 2: El regreso', 'Doctor Who: TV: Temporada 1: Rose',
+                                     'Rocky: Parte II: Final', 'Dune: Mesías: parte iv'])
+        self.assertEqual(keys.tolist(), ['Marvel: Agents: Six', 'Doctor Who: TV', 'Rocky', 'Dune'])
+
+    def test_without_marker_first_segment_is_used(self):
+        keys = canonical_title_keys(['Dark: Secretos', 'Inception', '  Roma  ', None])
+        self.assertEqual(keys.tolist(), ['Dark', 'Inception', 'Roma', ''])
+        self.assertEqual(clean_netflix_title('Narcos: México: Temporada 2: X'), 'Narcos: México')
+        self.assertEqual(clean_netflix_title(None), '')
+
+    def test_mapping_table_and_row_mapping(self):
+        titles = pd.Series(['Dark: Temporada 1: Secretos', 'Dark: Temporada 2: Ciclos', 'Roma',
+                            'Dark: Temporada 1: Secretos'], index=[10, 11, 12, 13])
+        mapping = build_title_mapping(titles)
+        self.assertEqual(len(mapping), 3)
+        self.assertEqual(mapping['Title_Cleaned_For_API'].nunique(), 2)
+        keys = map_canonical_titles(titles)
+        self.assertEqual(keys.index.tolist(), [10, 11, 12, 13])
+        self.assertEqual(keys.tolist(), ['Dark', 'Dark', 'Roma', 'Dark'])
@@ -0,0 +1,57 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock
+from scripts.tmdb_cache import TMDbCache, CACHE_MISS
+from scripts.run_etl import get_tmdb_details
+
+class TestTMDbCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'cache.sqlite')
+        self.cache = TMDbCache(self.db_path, max_entries=2)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_hit_and_negative_entry(self):
+        self.cache.set('Inception', {'tmdb_id': 27205})
+        self.cache.set('Titulo Inexistente', None)
+        self.assertEqual(self.cache.get('Inception'), {'tmdb_id': 27205})
+        self.assertIsNone(self.cache.get('Titulo Inexistente'))
+        self.assertIs(self.cache.get('Otro'), CACHE_MISS)
+        self.assertEqual(self.cache.stats()['hits'], 2)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_expired_entry_is_a_miss(self):
+        self.cache.set('Inception', {'tmdb_id': 27205}, ttl_seconds=-1)
+        self.assertFalse(self.cache.contains('Inception'))
+        self.assertIs(self.cache.get('Inception'), CACHE_MISS)
+
+    def test_purge_expired(self):
+        self.cache.set('Inception', {'tmdb_id': 27205}, ttl_seconds=-1)
+        self.cache.set('Roma', {'tmdb_id': 426426})
+        self.assertEqual(self.cache.purge_expired(), 1)
+        self.assertEqual(self.cache.purge_expired(), 0)
+        self.assertTrue(self.cache.contains('Roma'))
+
+    def test_lru_eviction(self):
+        self.cache.set('A', {'tmdb_id': 1})
+        time.sleep(0.01)
+        self.cache.set('B', {'tmdb_id': 2})
+        time.sleep(0.01)
+        self.cache.get('A')  # 'A' pasa a ser la más reciente
+        time.sleep(0.01)
+        self.cache.set('C', {'tmdb_id': 3})
+        self.assertTrue(self.cache.contains('A'))
+        self.assertFalse(self.cache.contains('B'))
+        self.assertTrue(self.cache.contains('C'))
+
+    def test_get_tmdb_details_uses_cache(self):
+        search_api = MagicMock()
+        search_api.multi.return_value = []
+        self.assertIsNone(get_tmdb_details('Nada', search_api, MagicMock(), MagicMock(), cache=self.cache))
+        self.assertIsNone(get_tmdb_details('Nada', search_api, MagicMock(), MagicMock(), cache=self.cache))
+        self.assertEqual(search_api.multi.call_count, 1)
@@ -0,0 +1,79 @@
+import unittest
+import json
+import random
+import requests
+from email.utils import formatdate
+from unittest.mock import MagicMock
+from scripts.metrics import RunMetrics
+from scripts.tmdb_client import TMDb, Search, Movie, backoff_delay, endpoint_label, parse_retry_after
+
+def make_response(status, payload=None, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload or {}).encode('utf-8')
+    response.headers.update(headers or {})
+    return response
+
+class TestTMDbClient(unittest.TestCase):
+    def _client(self, responses, **kwargs):
+        session = MagicMock()
+        session.get.side_effect = responses
+        self.sleeps = []
+        return TMDb('key', session=session, sleep=self.sleeps.append, **kwargs), session
+
+    def test_search_returns_attribute_objects_and_sends_api_key(self):
+        tmdb, session = self._client([make_response(200, {'results': [{'media_type': 'movie', 'id': 27205, 'title': 'Inception'}]})])
+        results = Search(tmdb).multi({'query': 'Inception', 'language': 'es-ES'})
+        self.assertEqual((results[0].media_type, results[0].id), ('movie', 27205))
+        args, kwargs = session.get.call_args
+        self.assertEqual(args[0], 'https://api.themoviedb.org/3/search/multi')
+        self.assertEqual(kwargs['params'], {'api_key': 'key', 'query': 'Inception', 'language': 'es-ES'})
+        self.assertIsNotNone(kwargs['timeout'])
+
+    def test_429_waits_retry_after(self):
+        tmdb, _ = self._client([make_response(429, headers={'Retry-After': '7'}), make_response(200, {'id': 1, 'runtime': 90})])
+        self.assertEqual(Movie(tmdb).details(1)['runtime'], 90)
+        self.assertEqual(self.sleeps, [7.0])
+
+    def test_transient_errors_use_backoff_and_are_counted(self):
+        metrics = RunMetrics('test')
+        tmdb, session = self._client([make_response(503), requests.exceptions.ConnectionError("reset"), make_response(500)],
+                                     max_retries=3, backoff_base=1, run_metrics=metrics)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            Movie(tmdb).details(5)
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertLessEqual(self.sleeps[0], 1)
+        self.assertLessEqual(self.sleeps[1], 2)
+        summary = metrics.api_summary()['movie/details']
+        self.assertEqual((summary['errors'], summary['retries']), (3, 2))
+
+    def test_every_attempt_takes_a_rate_limiter_token(self):
+        limiter = MagicMock()
+        tmdb, session = self._client([make_response(429, headers={'Retry-After': '1'}), make_response(503),
+                                      make_response(200, {'id': 1})], rate_limiter=limiter)
+        self.assertEqual(Movie(tmdb).details(1)['id'], 1)
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(limiter.acquire.call_count, 3)  # Los reintentos también consumen token
+
+    def test_client_errors_are_not_retried(self):
+        tmdb, session = self._client([make_response(401), make_response(200)])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            Search(tmdb).multi({'query': 'Dark'})
+        self.assertEqual(session.get.call_count, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_helpers(self):
+        self.assertEqual(parse_retry_after('3'), 3.0)
+        self.assertAlmostEqual(parse_retry_after(formatdate(1000.0 + 30, usegmt=True), now=1000.0), 30.0)
+        self.assertIsNone(parse_retry_after('pronto'))
+        delays = [backoff_delay(5, base=0.5, cap=4, rng=random.Random(1)) for _ in range(20)]
+        self.assertTrue(all(0 <= d <= 4 for d in delays))
+        self.assertEqual(endpoint_label('/tv/1399'), 'tv/details')
+        self.assertEqual(endpoint_label('/search/multi'), 'search/multi')
+
+    def test_session_is_shared_and_pooled(self):
+        tmdb = TMDb('key', pool_size=8)
+        self.assertIs(Search(tmdb).tmdb.session, Movie(tmdb).tmdb.session)
+        self.assertEqual(tmdb.session.get_adapter('https://api.themoviedb.org')._pool_maxsize, 8)
+        tmdb.close()
@@ -0,0 +1,65 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from scripts.tmdb_snapshot import TMDbSnapshot, media_type_from_path
+
+
+def write_snapshot(path, entries):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for entry in entries:
+            f.write((entry if isinstance(entry, str) else json.dumps(entry)) + '\n')
+    return path
+
+
+class TestTMDbSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_daily_exports_are_indexed_by_title_and_media_type(self):
+        movies = write_snapshot(self._path('movie_ids_10_17_2026.json.gz'), [
+            {'adult': False, 'id': 1, 'original_title': 'Roma', 'popularity': 12.5, 'video': False},
+            {'adult': False, 'id': 2, 'original_title': 'Roma', 'popularity': 0.6, 'video': False},
+            '{"id": 3, "original_title": ',  # Línea cortada
+            {'id': 4, 'popularity': 1.0},     # Sin título
+        ])
+        series = write_snapshot(self._path('tv_series_ids_10_17_2026.json.gz'), [
+            {'id': 70, 'original_name': 'Élite', 'popularity': 40.0},
+            {'id': 71, 'original_name': 'Roma', 'popularity': 3.0},
+        ])
+        with self.assertLogs(level='WARNING') as log:
+            snapshot = TMDbSnapshot.from_files([movies, series])
+        self.assertEqual(len(snapshot), 4)
+        self.assertTrue(any("2 líneas" in msg for msg in log.output))
+        self.assertEqual(snapshot.match('ROMA'), ('movie', 1))  # La más popular entre películas y series
+        self.assertEqual(snapshot.match('Roma', 'tv'), ('tv', 71))
+        self.assertEqual(snapshot.match('elite'), ('tv', 70))
+        self.assertIsNone(snapshot.match('Dark'))
+        self.assertFalse(snapshot.has_details(('tv', 70)))
+        self.assertEqual(snapshot.details(('tv', 70)), {'id': 70, 'name': 'Élite', 'original_name': 'Élite', 'popularity': 40.0})
+
+    def test_entries_with_details_and_explicit_media_type(self):
+        path = write_snapshot(self._path('tmdb_snapshot.jsonl'), [
+            {'id': 27205, 'media_type': 'movie', 'title': 'Origen', 'original_title': 'Inception', 'popularity': 80.1,
+             'overview': 'Sueños.', 'genres': ['Acción'], 'runtime': 148},
+            {'id': 9, 'title': 'Sin tipo'},
+        ])
+        snapshot = TMDbSnapshot()
+        self.assertEqual(snapshot.load(path), 1)
+        self.assertIsNone(media_type_from_path(path))
+        match = snapshot.match('inception')
+        self.assertEqual(match, snapshot.match('Origen'))
+        self.assertTrue(snapshot.has_details(match))
+        self.assertEqual(snapshot.details(match)['runtime'], 148)
+
+
+if __name__ == '__main__':
+    unittest.main()